@@ -1,16 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from datetime import datetime, date
 
-from backend.database import get_db
-from backend.models import JournalEntry, JournalEntryCreate, JournalEntryUpdate, JournalEntryResponse
+from backend.database import SessionLocal, get_db
+from backend.models import (
+    JournalEntry, EntryChange, JournalEntryCreate, JournalEntryUpdate, JournalEntryResponse, JournalEntrySummary, JournalEntryFields, EntryChangesResponse,
+    BatchOperation, BatchRequest, BatchResponse, BatchOperationResult
+)
+from backend.services.idempotency import (
+    IdempotencyStore, IdempotencyKeyMismatch, MAX_IDEMPOTENCY_KEY_LENGTH, request_fingerprint
+)
+from backend.services.json_response import FastJSONResponse
+from backend.services.change_log import ChangeLogCompactor, CursorTooOld
 
 router = APIRouter()
+idempotency_store = IdempotencyStore()
+change_log = ChangeLogCompactor(SessionLocal)
+
+BATCH_IDEMPOTENCY_SCOPE = "entries.batch"
+CREATE_IDEMPOTENCY_SCOPE = "entries.create"
+MAX_BATCH_OPERATIONS = 500
+
+# JournalEntryResponse's fields as columns, in the model's order, for list endpoints
+ENTRY_RESPONSE_COLUMNS = [getattr(JournalEntry, field) for field in JournalEntryResponse.model_fields]
+# Predefined projections for GET /entries?view=
+ENTRY_VIEWS = {"full": JournalEntryResponse, "summary": JournalEntrySummary}
+
+def entry_projection(view: Optional[str], fields: Optional[str]) -> list:
+    """Columns to select for a list of entries: the view's model fields, or the comma-separated fields plus id"""
+    if view and fields:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass either view or fields, not both"
+        )
+    view = view or "full"
+    if view not in ENTRY_VIEWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown view '{view}'; expected one of: {', '.join(ENTRY_VIEWS)}"
+        )
+    if not fields:
+        names = ENTRY_VIEWS[view].model_fields
+    else:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(JournalEntryResponse.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        # Model order, so the output does not depend on how the client listed them
+        names = [name for name in JournalEntryResponse.model_fields if name in requested or name == "id"]
+    return [getattr(JournalEntry, name) for name in names]
+
+def entry_rows(rows) -> List[dict]:
+    """Rows selected with ENTRY_RESPONSE_COLUMNS (or an entry_projection) as response dicts.
+
+    The columns already have the response model's types, so list endpoints
+    skip building ORM objects and validating every row with pydantic.
+    """
+    return [row._asdict() for row in rows]
+
+def batch_operation_fingerprint(op: BatchOperation) -> str:
+    """Fingerprint of what a batch operation does, ignoring its idempotency key"""
+    return request_fingerprint(op.dict(exclude={"idempotency_key"}))
+
+def replay_idempotent_request(db: Session, scope: str, key: str, request_hash: str, response: Response):
+    """Return the stored response for a retried request, or None if the key is new"""
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+    try:
+        stored = idempotency_store.lookup(db, scope, key, request_hash)
+    except IdempotencyKeyMismatch:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+    return stored
 
 @router.post("/entries", response_model=JournalEntryResponse)
-def create_entry(entry: JournalEntryCreate, db: Session = Depends(get_db)):
-    """Create a new journal entry"""
+def create_entry(
+    entry: JournalEntryCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Create a new journal entry; retries with the same Idempotency-Key return the original entry"""
+    request_hash = None
+    if idempotency_key:
+        request_hash = request_fingerprint(entry.dict())
+        stored = replay_idempotent_request(db, CREATE_IDEMPOTENCY_SCOPE, idempotency_key, request_hash, response)
+        if stored is not None:
+            return stored
+    
     try:
         # Create new entry instance
         db_entry = JournalEntry(**entry.dict())
@@ -20,10 +110,31 @@ def create_entry(entry: JournalEntryCreate, db: Session = Depends(get_db)):
             db_entry.timestamp = datetime.now()
         
         db.add(db_entry)
+        
+        if idempotency_key:
+            # Store the response in the same transaction as the entry
+            db.flush()
+            db.refresh(db_entry)
+            result = JournalEntryResponse.model_validate(db_entry)
+            idempotency_store.add(db, CREATE_IDEMPOTENCY_SCOPE, idempotency_key, result.model_dump(mode="json"), request_hash)
+            db.commit()
+            return result
+        
         db.commit()
         db.refresh(db_entry)
         
         return db_entry
+    except IntegrityError as e:
+        db.rollback()
+        # A concurrent retry with the same key committed first; answer with its entry
+        if idempotency_key:
+            stored = replay_idempotent_request(db, CREATE_IDEMPOTENCY_SCOPE, idempotency_key, request_hash, response)
+            if stored is not None:
+                return stored
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to create entry: {str(e)}"
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -31,18 +142,137 @@ def create_entry(entry: JournalEntryCreate, db: Session = Depends(get_db)):
             detail=f"Failed to create entry: {str(e)}"
         )
 
-@router.get("/entries", response_model=List[JournalEntryResponse])
+@router.post("/entries/batch", response_model=BatchResponse)
+def batch_entries(batch: BatchRequest, db: Session = Depends(get_db)):
+    """Apply a queue of offline create/update/delete operations in one transaction.
+
+    Each operation gets its own result. Invalid operations or missing entries
+    are reported and skipped; everything else commits together, or nothing
+    does if the commit fails. Operations whose idempotency_key was already
+    applied return the stored result instead of being applied again.
+    """
+    if len(batch.operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can contain at most {MAX_BATCH_OPERATIONS} operations"
+        )
+    
+    try:
+        # Like single creates, a key only replays for the same operation; the first use in the batch counts
+        request_hashes = {}
+        for op in batch.operations:
+            if op.idempotency_key and op.idempotency_key not in request_hashes:
+                request_hashes[op.idempotency_key] = batch_operation_fingerprint(op)
+        replays, mismatched = idempotency_store.get_many(db, BATCH_IDEMPOTENCY_SCOPE, request_hashes)
+        
+        # Load every update/delete target in one query
+        target_ids = {op.id for op in batch.operations if op.op in ("update", "delete") and op.id is not None}
+        targets = {}
+        if target_ids:
+            targets = {entry.id: entry for entry in db.query(JournalEntry).filter(JournalEntry.id.in_(target_ids)).all()}
+        
+        now = datetime.now()
+        results = []
+        pending = []  # (result, entry) pairs whose entry is serialized after the flush
+        seen_keys = {}
+        duplicates = []  # (index, key) of operations repeating a key used earlier in this batch
+        
+        for index, op in enumerate(batch.operations):
+            result = BatchOperationResult(index=index, op=op.op, status=status.HTTP_200_OK, id=op.id)
+            results.append(result)
+            
+            if op.idempotency_key and (
+                op.idempotency_key in mismatched or batch_operation_fingerprint(op) != request_hashes[op.idempotency_key]
+            ):
+                result.status = 422
+                result.error = "Idempotency-Key was already used for a different request"
+                continue
+            if op.idempotency_key in replays:
+                results[-1] = BatchOperationResult(**replays[op.idempotency_key], index=index, replayed=True)
+                continue
+            if op.idempotency_key and op.idempotency_key in seen_keys:
+                # Same key twice in one batch: apply once, echo the first result after the flush
+                duplicates.append((index, op.idempotency_key))
+                continue
+            if op.idempotency_key:
+                seen_keys[op.idempotency_key] = result
+            
+            try:
+                if op.op == "create":
+                    entry_data = JournalEntryCreate(**(op.data or {}))
+                    db_entry = JournalEntry(**entry_data.dict(), timestamp=now, created_at=now, updated_at=now)
+                    db.add(db_entry)
+                    result.status = status.HTTP_201_CREATED
+                    pending.append((result, db_entry))
+                
+                elif op.op in ("update", "delete"):
+                    db_entry = targets.get(op.id)
+                    if db_entry is None:
+                        result.status = status.HTTP_404_NOT_FOUND
+                        result.error = "Entry not found"
+                        continue
+                    
+                    if op.op == "update":
+                        update_data = JournalEntryUpdate(**(op.data or {})).dict(exclude_unset=True)
+                        for field, value in update_data.items():
+                            setattr(db_entry, field, value)
+                        # Set explicitly so the flush doesn't expire it and force a re-select
+                        db_entry.updated_at = now
+                        pending.append((result, db_entry))
+                    else:
+                        db.delete(db_entry)
+                        del targets[op.id]
+                
+                else:
+                    result.status = 422
+                    result.error = f"Unknown operation '{op.op}'"
+            
+            except ValidationError as e:
+                result.status = 422
+                result.error = str(e)
+        
+        # One flush sends all inserts together, then the updates and deletes
+        db.flush()
+        
+        for result, db_entry in pending:
+            result.id = db_entry.id
+            result.entry = JournalEntryResponse.model_validate(db_entry)
+        
+        for index, key in duplicates:
+            results[index] = seen_keys[key].model_copy(update={"index": index, "replayed": True})
+        
+        idempotency_store.add_many(db, BATCH_IDEMPOTENCY_SCOPE, {
+            key: result.model_dump(mode="json", exclude={"index", "replayed"})
+            for key, result in seen_keys.items()
+            if result.status < 400
+        }, request_hashes)
+        
+        db.commit()
+        return {"results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to apply batch: {str(e)}"
+        )
+
+@router.get("/entries", response_model=Union[List[JournalEntryResponse], List[JournalEntrySummary], List[JournalEntryFields]])
 def get_entries(
     skip: int = 0, 
     limit: int = 100, 
     entry_type: str = None,
     date_from: str = None,
     date_to: str = None,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get journal entries with optional filtering"""
+    """Get journal entries with optional filtering; view=summary or fields=a,b,c (not both) return only those columns"""
+    columns = entry_projection(view, fields)
     try:
-        query = db.query(JournalEntry)
+        query = db.query(*columns)
         
         # Filter by entry type if provided
         if entry_type:
@@ -58,13 +288,66 @@ def get_entries(
         query = query.order_by(JournalEntry.timestamp.desc())
         
         entries = query.offset(skip).limit(limit).all()
-        return entries
+        return FastJSONResponse(entry_rows(entries))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve entries: {str(e)}"
         )
 
+@router.get("/entries/changes", response_model=EntryChangesResponse)
+def get_entry_changes(
+    since: int = 0,
+    limit: int = 500,
+    db: Session = Depends(get_db)
+):
+    """Get entries created, updated or deleted after a sync cursor.
+
+    Answers 410 when the cursor predates the compacted part of the change
+    log; the client must then sync again from since=0.
+    """
+    try:
+        change_rows = db.query(EntryChange.id, EntryChange.entry_id, EntryChange.operation).filter(
+            EntryChange.id > since
+        ).order_by(EntryChange.id.asc()).limit(limit + 1).all()
+        
+        has_more = len(change_rows) > limit
+        change_rows = change_rows[:limit]
+        cursor = change_rows[-1].id if change_rows else since
+        
+        # Only the latest operation per entry in this page matters
+        latest_operation = {}
+        for change in change_rows:
+            latest_operation[change.entry_id] = change.operation
+        
+        upsert_ids = [entry_id for entry_id, operation in latest_operation.items() if operation == "upsert"]
+        deleted_ids = [entry_id for entry_id, operation in latest_operation.items() if operation == "delete"]
+        
+        # An entry deleted after this page will be reported as deleted on a later page
+        changed_entries = []
+        if upsert_ids:
+            changed_entries = entry_rows(db.query(*ENTRY_RESPONSE_COLUMNS).filter(
+                JournalEntry.id.in_(upsert_ids)
+            ).order_by(JournalEntry.id.asc()).all())
+        
+        change_log.check_cursor(db, since)
+        return FastJSONResponse({
+            "changes": changed_entries,
+            "deleted": deleted_ids,
+            "cursor": cursor,
+            "has_more": has_more
+        })
+    except CursorTooOld:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync cursor is older than the change log; sync again from since=0"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve changes: {str(e)}"
+        )
+
 @router.get("/entries/{entry_id}", response_model=JournalEntryResponse)
 def get_entry(entry_id: int, db: Session = Depends(get_db)):
     """Get a specific journal entry by ID"""
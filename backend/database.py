@@ -41,5 +41,18 @@ def get_db():
 
 # Initialize database tables
 def init_db():
-    from backend.models import Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    from backend.models import Base, EntryChange, JournalEntry
+    from sqlalchemy import literal, select
+    Base.metadata.create_all(bind=engine)
+
+    # Seed the sync change log with entries written before it existed
+    db = SessionLocal()
+    try:
+        if db.query(EntryChange.id).first() is None:
+            db.execute(EntryChange.__table__.insert().from_select(
+                ["entry_id", "operation"],
+                select(JournalEntry.id, literal("upsert")).order_by(JournalEntry.id)
+            ))
+            db.commit()
+    finally:
+        db.close()
@@ -1,22 +1,41 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.datastructures import Default
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
+import asyncio
 import os
 from datetime import datetime, timedelta
 
-from backend.database import get_db, init_db
-from backend.api.routes import router as entries_router
-from backend.models import JournalEntry, AIFeedbackRequest, AIFeedbackResponse
-from backend.services.openai_service import OpenAIService
-from backend.services.export_service import ExportService
+from backend.database import SessionLocal, engine, get_db, init_db
+from backend.api.routes import router as entries_router, change_log, idempotency_store, replay_idempotent_request
+from backend.models import JournalEntry, EntryChange, ExportJob, AIFeedbackRequest, AIFeedbackResponse, ExportJobCreate, ExportJobResponse
+from backend.services.openai_service import WEEKLY_COACHING_FALLBACK, OpenAIService
+from backend.services.compression import CompressionMiddleware
+from backend.services.json_response import FastJSONResponse
+from backend.services.llm_providers import configured_provider_names
+from backend.services.lazy import LazyService
+from backend.services.render_pool import RenderPool, RenderQueueFull, entry_to_export_row, write_rows_file
+from backend.services.export_cache import ExportCache
+from backend.services.export_jobs import ExportJobRunner
+from backend.services.idempotency import request_fingerprint
+from backend.services.precompute import PrecomputeScheduler
+from backend.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, registry as metrics_registry
+from backend.services.sql_profiler import SQL_PROFILE, SQLProfilerMiddleware, profile_engine
+from backend.services.profiling import ProfilingMiddleware, RequestProfiler, current_profile_prefix
+from backend.services.tracing import TracingMiddleware, exporter as trace_exporter, span, trace_engine, trace_print
 
 # Initialize FastAPI app
 app = FastAPI(
     title="ChroniCompanion API",
     description="A gentle journaling API for people with chronic illness and mental health conditions",
-    version="1.0.0"
+    version="1.0.0",
+    # As a default (not an explicit class), routes with a response_model keep pydantic's direct-to-bytes encoding
+    default_response_class=Default(FastJSONResponse)
 )
 
 # Configure CORS
@@ -27,10 +46,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip/brotli for JSON and text bodies above RESPONSE_COMPRESSION_MIN_BYTES
+app.add_middleware(CompressionMiddleware)
+# On-demand CPU/allocation profiling, gated by PROFILE_ADMIN_TOKEN
+request_profiler = RequestProfiler()
+if request_profiler.enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+if SQL_PROFILE:
+    app.add_middleware(SQLProfilerMiddleware)
+    profile_engine(engine)
+app.add_middleware(TracingMiddleware)
+trace_engine(engine)
+# Outermost, so latency covers CORS handling too
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
 
 # Initialize services
-openai_service = OpenAIService()
-export_service = ExportService()
+# Built on first use (or by the startup warm-up, off the event loop) so AI SDK imports never delay startup
+openai_service: OpenAIService = LazyService(OpenAIService)
+render_pool = RenderPool()
+export_cache = ExportCache()
+export_jobs = ExportJobRunner(render_pool, SessionLocal)
+ai_warm_up_tasks = set()
+# Nightly AI artifacts and analytics rollups; precomputing yields while live AI calls are in flight
+precompute_scheduler = PrecomputeScheduler(
+    SessionLocal, engine, is_busy=lambda: openai_service.loaded and openai_service.single_flight.stats()["in_flight"] > 0
+)
 
 # Include routers
 app.include_router(entries_router, prefix="/api", tags=["entries"])
@@ -40,6 +81,27 @@ async def startup_event():
     """Initialize database on startup"""
     init_db()
     print("Database initialized successfully")
+    await export_jobs.start()
+    await change_log.start()
+    # Build and connect AI backends in the background so startup never waits on imports or the network
+    warm_up = asyncio.ensure_future(run_in_threadpool(lambda: openai_service.instance().warm_up()))
+    ai_warm_up_tasks.add(warm_up)
+    warm_up.add_done_callback(ai_warm_up_tasks.discard)
+    await precompute_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the precompute scheduler, change log compaction, export job workers, PDF render processes and AI backend connections, then flush trace spans"""
+    await precompute_scheduler.stop()
+    await change_log.stop()
+    if feedback_upgrades:
+        # Give AI feedback that missed its deadline a chance to be saved
+        await asyncio.wait(feedback_upgrades, timeout=FEEDBACK_UPGRADE_SHUTDOWN_SECONDS)
+    await export_jobs.stop()
+    render_pool.shutdown()
+    if openai_service.loaded:
+        openai_service.close()
+    trace_exporter.shutdown()
 
 @app.get("/")
 async def root():
@@ -65,6 +127,35 @@ async def health_check():
         "database": "connected"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+def _require_profiling_admin(x_admin_token: Optional[str] = Header(None)):
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is not enabled")
+    if not request_profiler.is_admin(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+@app.get("/api/admin/profiling", dependencies=[Depends(_require_profiling_admin)])
+async def profiling_status():
+    """Profiler toggle state and counters"""
+    return request_profiler.stats()
+
+@app.post("/api/admin/profiling", dependencies=[Depends(_require_profiling_admin)])
+async def enable_profiling(seconds: int = 60):
+    """Profile every export and analytics request for the next few seconds"""
+    granted = request_profiler.enable_for(seconds)
+    print(f"🔬 Request profiling enabled for {granted}s")
+    return request_profiler.stats()
+
+@app.delete("/api/admin/profiling", dependencies=[Depends(_require_profiling_admin)])
+async def disable_profiling():
+    """Turn the profiling toggle off early"""
+    request_profiler.disable()
+    return request_profiler.stats()
+
 @app.get("/api/ai/debug")
 async def ai_debug_status():
     """Debug endpoint to check OpenAI service status"""
@@ -74,16 +165,68 @@ async def ai_debug_status():
         "api_key_preview": f"{os.getenv('OPENAI_API_KEY', '')[:10]}..." if os.getenv('OPENAI_API_KEY') else None,
         "model": openai_service.model,
         "client_initialized": openai_service.client is not None,
+        "single_flight": openai_service.single_flight.stats(),
+        "providers": [
+            {"name": provider.name, "type": provider.kind, "model": provider.model, "transport": provider.transport_info()}
+            for provider in openai_service.providers
+        ],
+        "routes": openai_service.router.stats(),
+        "circuit_breakers": {name: breaker.stats() for name, breaker in openai_service.circuit_breakers.items()},
+        "hedging": openai_service.hedger.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
 # AI Integration Endpoints
+AI_FEEDBACK_IDEMPOTENCY_SCOPE = "ai.feedback"
+AI_FEEDBACK_COLUMNS = {"summary": "ai_summary", "insights": "ai_insights"}
+FEEDBACK_UPGRADE_SHUTDOWN_SECONDS = 10
+
+# Background saves of AI feedback that missed the request deadline
+feedback_upgrades = set()
+
+async def _save_feedback_upgrade(entry_id: int, pending: Dict[str, asyncio.Future]):
+    """Wait for AI text that missed the deadline and save it onto the entry"""
+    values = {}
+    for field, task in pending.items():
+        try:
+            text = await task
+        except Exception as e:
+            trace_print(f"🚨 ERROR finishing AI {field} for entry {entry_id}: {type(e).__name__}: {e}")
+            continue
+        if text:
+            values[AI_FEEDBACK_COLUMNS[field]] = text
+    if values:
+        await run_in_threadpool(_save_ai_feedback, entry_id, values)
+
+def _save_ai_feedback(entry_id: int, values: Dict[str, str]):
+    db = SessionLocal()
+    try:
+        entry = db.query(JournalEntry).filter(JournalEntry.id == entry_id).first()
+        if entry is None:
+            return  # deleted while the AI was still answering
+        for column, text in values.items():
+            setattr(entry, column, text)
+        with span("persist"):
+            db.commit()
+        trace_print(f"✅ Saved upgraded AI feedback for entry {entry_id}")
+    finally:
+        db.close()
+
 @app.post("/api/ai/feedback", response_model=AIFeedbackResponse)
 async def generate_ai_feedback(
     request: AIFeedbackRequest,
+    http_response: Response,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Generate AI feedback for a journal entry"""
+    """Generate AI feedback for a journal entry; retries with the same Idempotency-Key reuse the first result"""
+    request_hash = None
+    if idempotency_key:
+        request_hash = request_fingerprint(request.dict())
+        stored = replay_idempotent_request(db, AI_FEEDBACK_IDEMPOTENCY_SCOPE, idempotency_key, request_hash, http_response)
+        if stored is not None:
+            return stored
+    
     try:
         # Get the entry
         entry = db.query(JournalEntry).filter(JournalEntry.id == request.entry_id).first()
@@ -114,26 +257,62 @@ async def generate_ai_feedback(
         
         response = AIFeedbackResponse()
         
-        # Generate summary if requested
+        # Generate the requested summary and insights in parallel
+        generators = {}
         if request.generate_summary:
-            summary = openai_service.generate_entry_summary(entry_data)
-            response.summary = summary
-            
-            # Save to database
-            if summary:
-                entry.ai_summary = summary
-        
-        # Generate insights if requested
+            generators["summary"] = openai_service.generate_entry_summary
         if request.generate_insights:
-            insights = openai_service.generate_insights_and_encouragement(entry_data)
-            response.insights = insights
+            generators["insights"] = openai_service.generate_insights_and_encouragement
+        tasks = {
+            field: asyncio.ensure_future(run_in_threadpool(generate, entry_data))
+            for field, generate in generators.items()
+        }
+        if tasks:
+            timeout = max(request.deadline_ms, 0) / 1000 if request.deadline_ms is not None else None
+            await asyncio.wait(tasks.values(), timeout=timeout)
+        
+        pending = {}
+        for field, task in tasks.items():
+            if not task.done():
+                pending[field] = task
+                continue
+            text = task.result()
+            setattr(response, field, text)
             
             # Save to database
-            if insights:
-                entry.ai_insights = insights
+            if text:
+                setattr(entry, AI_FEEDBACK_COLUMNS[field], text)
+        
+        if request.deadline_ms is not None:
+            # Show local text now rather than nothing; late AI text is saved to the entry when it arrives
+            local_generators = {"summary": openai_service.local_entry_summary, "insights": openai_service.local_insights}
+            for field in tasks:
+                if not getattr(response, field):
+                    setattr(response, field, local_generators[field](entry_data))
+                    response.fallback = True
+            if pending:
+                response.upgrade_pending = True
+                upgrade = asyncio.create_task(_save_feedback_upgrade(entry.id, pending))
+                feedback_upgrades.add(upgrade)
+                upgrade.add_done_callback(feedback_upgrades.discard)
+        
+        # Only remember responses that carry generated text, so a retry after an outage tries again
+        if idempotency_key and not response.fallback and (response.summary or response.insights):
+            idempotency_store.add(db, AI_FEEDBACK_IDEMPOTENCY_SCOPE, idempotency_key, response.model_dump(mode="json"), request_hash)
         
         # Commit changes to database
-        db.commit()
+        try:
+            with span("persist"):
+                db.commit()
+        except IntegrityError:
+            db.rollback()
+            if not idempotency_key:
+                raise
+            # A concurrent retry with the same key finished first; return its result
+            stored = replay_idempotent_request(db, AI_FEEDBACK_IDEMPOTENCY_SCOPE, idempotency_key, request_hash, http_response)
+            if stored is None:
+                raise
+            return stored
         
         return response
         
@@ -146,47 +325,13 @@ async def generate_ai_feedback(
         )
 
 @app.get("/api/ai/weekly-reflection")
-async def generate_weekly_reflection(db: Session = Depends(get_db)):
+async def generate_weekly_reflection(refresh: bool = False, db: Session = Depends(get_db)):
     """Generate a weekly reflection based on recent entries"""
     try:
-        # Get entries from the last 7 days
-        week_ago = datetime.now() - timedelta(days=7)
-        entries = db.query(JournalEntry).filter(
-            JournalEntry.timestamp >= week_ago
-        ).order_by(JournalEntry.timestamp.desc()).all()
-        
-        if not entries:
-            return {"reflection": "No entries found in the past week to reflect on."}
-        
-        # Convert entries to dict format
-        entries_data = []
-        for entry in entries:
-            entry_data = {
-                "entry_type": entry.entry_type,
-                "date": entry.date,
-                "morning_feeling": entry.morning_feeling,
-                "morning_hopes": entry.morning_hopes,
-                "morning_symptoms": entry.morning_symptoms,
-                "evening_day_review": entry.evening_day_review,
-                "evening_gratitude": entry.evening_gratitude,
-                "evening_symptoms": entry.evening_symptoms,
-                "mood_overall": entry.mood_overall,
-                "energy_level": entry.energy_level,
-                "anxiety_level": entry.anxiety_level,
-                "pain_level": entry.pain_level,
-                "fatigue_level": entry.fatigue_level,
-                "sleep_quality": entry.sleep_quality,
-                "additional_notes": entry.additional_notes
-            }
-            entries_data.append(entry_data)
-        
-        reflection = openai_service.generate_weekly_reflection(entries_data)
-        
-        return {
-            "reflection": reflection,
-            "entries_count": len(entries),
-            "date_range": f"{entries[-1].date} to {entries[0].date}"
-        }
+        precomputed = None if refresh else precompute_scheduler.lookup(db, "weekly_reflection", "7d")
+        if precomputed is not None:
+            return precomputed
+        return await _weekly_reflection_payload(db)
         
     except Exception as e:
         raise HTTPException(
@@ -194,43 +339,62 @@ async def generate_weekly_reflection(db: Session = Depends(get_db)):
             detail=f"Failed to generate weekly reflection: {str(e)}"
         )
 
+async def _weekly_reflection_payload(db: Session, fallback: bool = True) -> Optional[dict]:
+    """Weekly reflection payload; without fallback, None when the AI service gave no reflection"""
+    # Get entries from the last 7 days
+    week_ago = datetime.now() - timedelta(days=7)
+    entries = db.query(JournalEntry).filter(
+        JournalEntry.timestamp >= week_ago
+    ).order_by(JournalEntry.timestamp.desc()).all()
+    
+    if not entries:
+        return {"reflection": "No entries found in the past week to reflect on."}
+    
+    # Convert entries to dict format
+    entries_data = []
+    for entry in entries:
+        entry_data = {
+            "entry_type": entry.entry_type,
+            "date": entry.date,
+            "morning_feeling": entry.morning_feeling,
+            "morning_hopes": entry.morning_hopes,
+            "morning_symptoms": entry.morning_symptoms,
+            "evening_day_review": entry.evening_day_review,
+            "evening_gratitude": entry.evening_gratitude,
+            "evening_symptoms": entry.evening_symptoms,
+            "mood_overall": entry.mood_overall,
+            "energy_level": entry.energy_level,
+            "anxiety_level": entry.anxiety_level,
+            "pain_level": entry.pain_level,
+            "fatigue_level": entry.fatigue_level,
+            "sleep_quality": entry.sleep_quality,
+            "additional_notes": entry.additional_notes
+        }
+        entries_data.append(entry_data)
+    
+    reflection = await run_in_threadpool(openai_service.generate_weekly_reflection, entries_data)
+    if reflection is None and not fallback:
+        return None
+    
+    return {
+        "reflection": reflection,
+        "entries_count": len(entries),
+        "date_range": f"{entries[-1].date} to {entries[0].date}"
+    }
+
 # Advanced AI Endpoints
 @app.get("/api/ai/predictive-insights")
 async def get_predictive_insights(
     days: int = 7,
+    refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """Generate predictive insights based on recent patterns"""
     try:
-        # Get recent entries
-        start_date = datetime.now() - timedelta(days=days)
-        entries = db.query(JournalEntry).filter(
-            JournalEntry.timestamp >= start_date
-        ).order_by(JournalEntry.timestamp.desc()).all()
-        
-        if not entries:
-            return {"message": "Not enough data for predictive insights. Add more journal entries."}
-        
-        # Convert entries to dict format
-        entries_data = [{
-            'entry_type': entry.entry_type,
-            'date': entry.date,
-            'mood_overall': entry.mood_overall,
-            'energy_level': entry.energy_level,
-            'pain_level': entry.pain_level,
-            'anxiety_level': entry.anxiety_level,
-            'fatigue_level': entry.fatigue_level,
-            'additional_notes': entry.additional_notes
-        } for entry in entries]
-        
-        # Generate predictive insights
-        insights = openai_service.generate_predictive_insights(entries_data)
-        
-        return {
-            "insights": insights or {"prediction": "Unable to generate insights at this time."},
-            "based_on_entries": len(entries),
-            "generated_at": datetime.now().isoformat()
-        }
+        precomputed = None if refresh else precompute_scheduler.lookup(db, "predictive_insights", f"{days}d")
+        if precomputed is not None:
+            return precomputed
+        return await _predictive_insights_payload(db, days)
         
     except Exception as e:
         raise HTTPException(
@@ -238,6 +402,40 @@ async def get_predictive_insights(
             detail=f"Failed to generate predictive insights: {str(e)}"
         )
 
+async def _predictive_insights_payload(db: Session, days: int = 7, fallback: bool = True) -> Optional[dict]:
+    """Predictive insights payload; without fallback, None when the AI service gave no insights"""
+    # Get recent entries
+    start_date = datetime.now() - timedelta(days=days)
+    entries = db.query(JournalEntry).filter(
+        JournalEntry.timestamp >= start_date
+    ).order_by(JournalEntry.timestamp.desc()).all()
+    
+    if not entries:
+        return {"message": "Not enough data for predictive insights. Add more journal entries."}
+    
+    # Convert entries to dict format
+    entries_data = [{
+        'entry_type': entry.entry_type,
+        'date': entry.date,
+        'mood_overall': entry.mood_overall,
+        'energy_level': entry.energy_level,
+        'pain_level': entry.pain_level,
+        'anxiety_level': entry.anxiety_level,
+        'fatigue_level': entry.fatigue_level,
+        'additional_notes': entry.additional_notes
+    } for entry in entries]
+    
+    # Generate predictive insights
+    insights = await run_in_threadpool(openai_service.generate_predictive_insights, entries_data)
+    if not insights and not fallback:
+        return None
+    
+    return {
+        "insights": insights or {"prediction": "Unable to generate insights at this time."},
+        "based_on_entries": len(entries),
+        "generated_at": datetime.now().isoformat()
+    }
+
 @app.post("/api/ai/coping-strategies")
 async def get_coping_strategies(
     current_symptoms: dict,
@@ -260,7 +458,7 @@ async def get_coping_strategies(
         } for entry in recent_entries]
         
         # Generate coping strategies
-        strategies = openai_service.generate_coping_strategies(current_symptoms, entries_data)
+        strategies = await run_in_threadpool(openai_service.generate_coping_strategies, current_symptoms, entries_data)
         
         return {
             "strategies": strategies or {"immediate_strategies": ["Take a moment to breathe deeply"]},
@@ -298,7 +496,7 @@ async def crisis_pattern_check(
         } for entry in recent_entries]
         
         # Perform crisis pattern detection
-        crisis_analysis = openai_service.detect_crisis_patterns(entries_data)
+        crisis_analysis = await run_in_threadpool(openai_service.detect_crisis_patterns, entries_data)
         
         return {
             "analysis": crisis_analysis or {"risk_level": "none", "supportive_message": "You're doing well by tracking your health."},
@@ -314,41 +512,15 @@ async def crisis_pattern_check(
 
 @app.get("/api/ai/weekly-coaching")
 async def get_weekly_coaching(
+    refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """Generate comprehensive weekly wellness coaching"""
     try:
-        # Get past week's entries
-        start_date = datetime.now() - timedelta(days=7)
-        entries = db.query(JournalEntry).filter(
-            JournalEntry.timestamp >= start_date
-        ).order_by(JournalEntry.timestamp.asc()).all()
-        
-        if not entries:
-            return {"message": "Not enough recent entries for weekly coaching. Add more journal entries this week."}
-        
-        entries_data = [{
-            'entry_type': entry.entry_type,
-            'date': entry.date,
-            'mood_overall': entry.mood_overall,
-            'energy_level': entry.energy_level,
-            'pain_level': entry.pain_level,
-            'anxiety_level': entry.anxiety_level,
-            'fatigue_level': entry.fatigue_level,
-            'morning_hopes': entry.morning_hopes,
-            'evening_gratitude': entry.evening_gratitude,
-            'additional_notes': entry.additional_notes
-        } for entry in entries]
-        
-        # Generate weekly coaching
-        coaching = openai_service.generate_weekly_coaching(entries_data)
-        
-        return {
-            "coaching": coaching or {"weekly_summary": "You've shown strength by continuing to track your health this week."},
-            "entries_analyzed": len(entries),
-            "week_period": f"{start_date.strftime('%Y-%m-%d')} to {datetime.now().strftime('%Y-%m-%d')}",
-            "generated_at": datetime.now().isoformat()
-        }
+        precomputed = None if refresh else precompute_scheduler.lookup(db, "weekly_coaching", "7d")
+        if precomputed is not None:
+            return precomputed
+        return await _weekly_coaching_payload(db)
         
     except Exception as e:
         raise HTTPException(
@@ -356,9 +528,114 @@ async def get_weekly_coaching(
             detail=f"Failed to generate weekly coaching: {str(e)}"
         )
 
+async def _weekly_coaching_payload(db: Session, fallback: bool = True) -> Optional[dict]:
+    """Weekly coaching payload; without fallback, None when the AI service gave no coaching"""
+    # Get past week's entries
+    start_date = datetime.now() - timedelta(days=7)
+    entries = db.query(JournalEntry).filter(
+        JournalEntry.timestamp >= start_date
+    ).order_by(JournalEntry.timestamp.asc()).all()
+    
+    if not entries:
+        return {"message": "Not enough recent entries for weekly coaching. Add more journal entries this week."}
+    
+    entries_data = [{
+        'entry_type': entry.entry_type,
+        'date': entry.date,
+        'mood_overall': entry.mood_overall,
+        'energy_level': entry.energy_level,
+        'pain_level': entry.pain_level,
+        'anxiety_level': entry.anxiety_level,
+        'fatigue_level': entry.fatigue_level,
+        'morning_hopes': entry.morning_hopes,
+        'evening_gratitude': entry.evening_gratitude,
+        'additional_notes': entry.additional_notes
+    } for entry in entries]
+    
+    # Generate weekly coaching
+    coaching = await run_in_threadpool(openai_service.generate_weekly_coaching, entries_data)
+    if (not coaching or coaching == WEEKLY_COACHING_FALLBACK) and not fallback:
+        return None
+    
+    return {
+        "coaching": coaching or {"weekly_summary": "You've shown strength by continuing to track your health this week."},
+        "entries_analyzed": len(entries),
+        "week_period": f"{start_date.strftime('%Y-%m-%d')} to {datetime.now().strftime('%Y-%m-%d')}",
+        "generated_at": datetime.now().isoformat()
+    }
+
 # Export Endpoints
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "200"))
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def _iter_file_chunks(file_obj, chunk_size: int = EXPORT_CHUNK_SIZE, remove_path: str = None, length: int = None):
+    """Stream an open file in fixed-size chunks, closing it (and optionally deleting it) once sent.
+
+    With length set, stops after that many bytes from the current position.
+    """
+    remaining = length
+    try:
+        while remaining is None or remaining > 0:
+            chunk = file_obj.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()
+        if remove_path:
+            os.remove(remove_path)
+
+def _parse_byte_range(range_header: str, size: int):
+    """Parse a single 'bytes=' range into inclusive (start, end); None if it can't be satisfied"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # suffix range: the last N bytes
+            start = max(0, size - int(end_text))
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@app.get("/api/tracing/debug")
+async def tracing_debug_status():
+    """Debug endpoint with trace sampling and span export counters"""
+    return {
+        **trace_exporter.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/export/debug")
+async def export_debug_status():
+    """Debug endpoint with PDF render pool queue and timing metrics"""
+    return {
+        "render_pool": render_pool.stats(),
+        "cache": export_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/export")
 async def export_entries(
+    request: Request,
     report_type: str = "comprehensive",
     days: int = 30,
     db: Session = Depends(get_db)
@@ -367,79 +644,195 @@ async def export_entries(
     try:
         # Get entries for the specified period
         start_date = datetime.now() - timedelta(days=days)
-        entries = db.query(JournalEntry).filter(
+        query = db.query(JournalEntry).filter(
             JournalEntry.timestamp >= start_date
-        ).order_by(JournalEntry.timestamp.desc()).all()
+        ).order_by(JournalEntry.timestamp.desc())
         
-        if not entries:
+        entry_count, last_updated, change_cursor = db.query(
+            func.count(JournalEntry.id),
+            func.max(JournalEntry.updated_at),
+            select(func.max(EntryChange.id)).scalar_subquery()
+        ).filter(JournalEntry.timestamp >= start_date).one()
+        
+        if not entry_count:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No entries found for the specified period"
             )
         
-        # Convert to dict format for export service
-        entries_data = []
-        for entry in entries:
-            entry_data = {
-                "id": entry.id,
-                "entry_type": entry.entry_type,
-                "date": entry.date,
-                "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
-                "morning_feeling": entry.morning_feeling,
-                "morning_hopes": entry.morning_hopes,
-                "morning_symptoms": entry.morning_symptoms,
-                "evening_day_review": entry.evening_day_review,
-                "evening_gratitude": entry.evening_gratitude,
-                "evening_symptoms": entry.evening_symptoms,
-                "mood_overall": entry.mood_overall,
-                "energy_level": entry.energy_level,
-                "anxiety_level": entry.anxiety_level,
-                "pain_level": entry.pain_level,
-                "fatigue_level": entry.fatigue_level,
-                "sleep_quality": entry.sleep_quality,
-                "additional_notes": entry.additional_notes,
-                "ai_summary": entry.ai_summary,
-                "ai_insights": entry.ai_insights
-            }
-            entries_data.append(entry_data)
-        
-        # Generate PDF
-        pdf_buffer = export_service.generate_pdf_report(entries_data, report_type)
-        
-        # Create filename
-        filename = f"chroni_companion_{report_type}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        # Identical entry sets produce identical reports, so serve repeats from the cache
+        report_date = datetime.now().strftime('%Y%m%d')
+        cache_key = ExportCache.fingerprint(report_type, days, last_updated, entry_count, report_date, change_cursor)
+        etag = f'"{cache_key}"'
+        filename = f"chroni_companion_{report_type}_{report_date}.pdf"
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "ETag": etag,
+            "Cache-Control": "private, no-cache"
+        }
+        
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+        
+        pdf_file = export_cache.open(cache_key)
+        if pdf_file is not None:
+            headers["Content-Length"] = str(os.fstat(pdf_file.fileno()).st_size)
+            return StreamingResponse(_iter_file_chunks(pdf_file), media_type="application/pdf", headers=headers)
+        
+        # Serialize rows for the render process, streaming them out of the database in batches
+        rows = (entry_to_export_row(entry) for entry in query.yield_per(EXPORT_YIELD_PER))
+        with span("pdf.serialize_rows"):
+            rows_path, _ = await run_in_threadpool(write_rows_file, rows)
+        
+        # Generate PDF in the render pool so layout never blocks the event loop
+        try:
+            with span("pdf.render", report_type=report_type):
+                pdf_path = await render_pool.render(rows_path, report_type, profile_prefix=current_profile_prefix())
+        finally:
+            os.remove(rows_path)
+        
+        pdf_file = open(pdf_path, "rb")
+        headers["Content-Length"] = str(os.fstat(pdf_file.fileno()).st_size)
+        remove_path = None
+        if export_cache.enabled:
+            # The open handle keeps reading the same file after it moves into the cache. Moving out of
+            # EXPORT_WORK_DIR may copy the whole PDF across filesystems, and eviction scans the cache
+            await run_in_threadpool(export_cache.put, cache_key, pdf_path)
+        else:
+            remove_path = pdf_path
         
         # Return as streaming response
         return StreamingResponse(
-            pdf_buffer,
+            _iter_file_chunks(pdf_file, remove_path=remove_path),
             media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers=headers
         )
         
     except HTTPException:
         raise
+    except RenderQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports are being prepared right now, please try again shortly"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to export entries: {str(e)}"
         )
 
+@app.post("/api/export/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    job_request: ExportJobCreate,
+    db: Session = Depends(get_db)
+):
+    """Queue a PDF export to be rendered in the background"""
+    start_date = datetime.now() - timedelta(days=job_request.days)
+    entry_count = db.query(func.count(JournalEntry.id)).filter(JournalEntry.timestamp >= start_date).scalar()
+    if not entry_count:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No entries found for the specified period"
+        )
+    
+    job = export_jobs.create_job(db, job_request.report_type, job_request.days)
+    return _export_job_response(job)
+
+@app.get("/api/export/jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(job_id: str, db: Session = Depends(get_db)):
+    """Poll the status of an export job"""
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    return _export_job_response(job)
+
+@app.get("/api/export/jobs/{job_id}/download")
+async def download_export_job(job_id: str, request: Request, db: Session = Depends(get_db)):
+    """Download a finished export, with Range support so interrupted downloads can resume"""
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job.status}"
+        )
+    
+    try:
+        pdf_file = open(job.file_path, "rb")
+    except (FileNotFoundError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export file has expired, please create a new export"
+        )
+    
+    size = os.fstat(pdf_file.fileno()).st_size
+    etag = f'"{job.id}"'
+    filename = f"chroni_companion_{job.report_type}_{job.created_at.strftime('%Y%m%d')}.pdf"
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Accept-Ranges": "bytes",
+        "ETag": etag
+    }
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_byte_range(range_header, size)
+        if byte_range is None:
+            pdf_file.close()
+            return Response(
+                status_code=416,  # Range Not Satisfiable
+                headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"}
+            )
+        start, end = byte_range
+        pdf_file.seek(start)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _iter_file_chunks(pdf_file, length=end - start + 1),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type="application/pdf",
+            headers=headers
+        )
+    
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(_iter_file_chunks(pdf_file), media_type="application/pdf", headers=headers)
+
+def _export_job_response(job: ExportJob) -> ExportJobResponse:
+    response = ExportJobResponse.model_validate(job)
+    if job.status == "completed":
+        response.download_url = f"/api/export/jobs/{job.id}/download"
+    return response
+
 @app.get("/api/export/doctor-summary")
 async def export_doctor_summary(
+    request: Request,
     days: int = 30,
     db: Session = Depends(get_db)
 ):
     """Export a medical summary for doctors"""
-    return await export_entries(report_type="doctor_summary", days=days, db=db)
+    return await export_entries(request, report_type="doctor_summary", days=days, db=db)
 
 # Analytics Endpoints
 @app.get("/api/analytics/trends")
 async def get_trends(
     days: int = 30,
+    refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """Get trend analytics for mood, pain, energy, etc."""
     try:
+        precomputed = None if refresh else precompute_scheduler.lookup(db, "analytics_trends", f"{days}d")
+        if precomputed is not None:
+            return precomputed
+        
         start_date = datetime.now() - timedelta(days=days)
         entries = db.query(JournalEntry).filter(
             JournalEntry.timestamp >= start_date
@@ -482,12 +875,21 @@ async def get_trends(
 async def get_chart_data(
     days: int = 30,
     metric: str = "all",
+    refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """Get chart-ready data for visualization"""
     try:
+        precomputed = None if refresh else precompute_scheduler.lookup(db, "analytics_chart_data", f"{days}d:{metric}")
+        if precomputed is not None:
+            return precomputed
+        
         start_date = datetime.now() - timedelta(days=days)
-        entries = db.query(JournalEntry).filter(
+        # Only the charted columns; the journal text is never needed here
+        entries = db.query(
+            JournalEntry.date, JournalEntry.mood_overall, JournalEntry.energy_level,
+            JournalEntry.pain_level, JournalEntry.anxiety_level, JournalEntry.fatigue_level
+        ).filter(
             JournalEntry.timestamp >= start_date
         ).order_by(JournalEntry.timestamp.asc()).all()
         
@@ -613,6 +1015,43 @@ async def get_chart_data(
             detail=f"Failed to get chart data: {str(e)}"
         )
 
+# Precomputed artifacts
+def _precomputed_result(endpoint, result_key: str, **params):
+    """Builder that stores an endpoint's fresh payload, skipping "no data" responses"""
+    async def build(db: Session):
+        payload = await endpoint(refresh=True, db=db, **params)
+        return payload if payload.get(result_key) else None
+    return build
+
+def _precomputed_ai_result(build_payload, result_key: str, **params):
+    """Builder for an AI payload, skipping "no data" responses and ones where the AI call failed"""
+    async def build(db: Session):
+        if not openai_service.enabled:
+            return None
+        payload = await build_payload(db, fallback=False, **params)
+        return payload if payload and payload.get(result_key) else None
+    return build
+
+if configured_provider_names():
+    # Without an AI backend these endpoints only return placeholders, so there is nothing to precompute.
+    # Checked from the environment so registering does not build the AI service at import.
+    precompute_scheduler.register("weekly_reflection", "7d", _precomputed_ai_result(_weekly_reflection_payload, "entries_count"))
+    precompute_scheduler.register("weekly_coaching", "7d", _precomputed_ai_result(_weekly_coaching_payload, "coaching"))
+    precompute_scheduler.register("predictive_insights", "7d", _precomputed_ai_result(_predictive_insights_payload, "insights", days=7))
+# Analytics are cheap to rebuild, so they are only served while no entry has changed since
+precompute_scheduler.register("analytics_trends", "30d", _precomputed_result(get_trends, "trends", days=30), serve_stale=False)
+precompute_scheduler.register(
+    "analytics_chart_data", "30d:all", _precomputed_result(get_chart_data, "datasets", days=30, metric="all"), serve_stale=False
+)
+
+@app.get("/api/precompute/debug")
+async def precompute_debug_status():
+    """Debug endpoint to check the nightly precompute scheduler"""
+    return {
+        **precompute_scheduler.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, event, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict, Any
 
 Base = declarative_base()
 
@@ -45,6 +46,91 @@ class JournalEntry(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+class EntryChange(Base):
+    """Log of journal entry writes; the id is the sync cursor.
+
+    Cursor values must become visible in increasing order, or a client could
+    sync past an id whose transaction had not committed yet and never see it.
+    SQLite has a single writer, so ids are handed out in commit order; on
+    Postgres writers take ENTRY_CHANGE_LOCK_KEY before logging, so each one
+    commits before the next can take an id.
+    """
+    __tablename__ = "entry_changes"
+    # AUTOINCREMENT so SQLite never hands out a cursor value twice
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entry_id = Column(Integer, nullable=False, index=True)
+    operation = Column(String(10), nullable=False)  # 'upsert' or 'delete'
+    changed_at = Column(DateTime, default=func.now())
+
+class EntryChangeCompaction(Base):
+    """One run of change log compaction; cursors below the highest horizon can no longer be served"""
+    __tablename__ = "entry_change_compactions"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    horizon = Column(Integer, nullable=False)  # highest entry_changes id whose removal lost information
+    compacted_at = Column(DateTime, default=func.now())
+
+# Transaction-scoped advisory lock serializing change log writers on Postgres
+ENTRY_CHANGE_LOCK_KEY = 0x6368726F
+
+@event.listens_for(Session, "after_flush")
+def record_entry_changes(session, flush_context):
+    """Log every journal entry insert, update and delete in the same transaction"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, JournalEntry):
+            changes.append({"entry_id": obj.id, "operation": "upsert"})
+    for obj in session.dirty:
+        if isinstance(obj, JournalEntry) and session.is_modified(obj, include_collections=False):
+            changes.append({"entry_id": obj.id, "operation": "upsert"})
+    for obj in session.deleted:
+        if isinstance(obj, JournalEntry):
+            changes.append({"entry_id": obj.id, "operation": "delete"})
+    if changes:
+        connection = session.connection()
+        if connection.dialect.name == "postgresql":
+            # Held until commit; re-taking it in a later flush of the same transaction is free
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ENTRY_CHANGE_LOCK_KEY})
+        connection.execute(EntryChange.__table__.insert(), changes)
+
+class IdempotencyRecord(Base):
+    """Stored response for a client-supplied idempotency key"""
+    __tablename__ = "idempotency_keys"
+    
+    scope = Column(String(40), primary_key=True)  # which endpoint the key belongs to
+    key = Column(String(200), primary_key=True)
+    request_hash = Column(String(64), nullable=True)  # sha256 of the request that used the key
+    response = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=func.now(), index=True)
+
+class PrecomputedArtifact(Base):
+    """Endpoint payload computed off-peak by the precompute scheduler"""
+    __tablename__ = "precomputed_artifacts"
+    
+    kind = Column(String(40), primary_key=True)  # e.g. weekly_coaching, analytics_trends
+    key = Column(String(100), primary_key=True)  # endpoint parameters, e.g. 7d
+    payload = Column(Text, nullable=False)  # JSON
+    change_cursor = Column(Integer, nullable=False, default=0)  # latest entry_changes id when computed
+    computed_at = Column(DateTime, default=func.now(), nullable=False)
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    report_type = Column(String(30), nullable=False)
+    days = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    entry_count = Column(Integer, nullable=True)
+    file_path = Column(String(500), nullable=True)
+    file_size = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
 # Pydantic models for API validation
 class JournalEntryBase(BaseModel):
     entry_type: str
@@ -81,12 +167,91 @@ class JournalEntryResponse(JournalEntryBase):
     class Config:
         from_attributes = True
 
+# The scores and metadata the app's entry list shows, without the journal text (GET /api/entries?view=summary)
+class JournalEntrySummary(BaseModel):
+    id: int
+    entry_type: str
+    date: str
+    timestamp: datetime
+    mood_overall: Optional[int] = None
+    energy_level: Optional[int] = None
+    anxiety_level: Optional[int] = None
+    pain_level: Optional[int] = 0
+    fatigue_level: Optional[int] = 0
+    sleep_quality: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+# Any subset of JournalEntryResponse's fields; id is always included (GET /api/entries?fields=)
+class JournalEntryFields(JournalEntryResponse):
+    entry_type: Optional[str] = None
+    date: Optional[str] = None
+    pain_level: Optional[int] = None
+    fatigue_level: Optional[int] = None
+    timestamp: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class BatchOperation(BaseModel):
+    op: str  # 'create', 'update' or 'delete'
+    id: Optional[int] = None  # target entry for update/delete
+    data: Optional[Dict[str, Any]] = None  # entry fields for create/update
+    idempotency_key: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    status: int  # HTTP status the equivalent single request would have returned
+    id: Optional[int] = None
+    entry: Optional[JournalEntryResponse] = None
+    error: Optional[str] = None
+    replayed: bool = False
+
+class BatchResponse(BaseModel):
+    results: List[BatchOperationResult]
+
+class EntryChangesResponse(BaseModel):
+    changes: List[JournalEntryResponse]
+    deleted: List[int]
+    cursor: int
+    has_more: bool
+
 class AIFeedbackRequest(BaseModel):
     entry_id: int
     generate_summary: bool = True
     generate_insights: bool = True
+    # Return local template text if the AI has not answered within this many milliseconds
+    deadline_ms: Optional[int] = None
 
 class AIFeedbackResponse(BaseModel):
     summary: Optional[str] = None
     insights: Optional[str] = None
-    encouragement: Optional[str] = None 
\ No newline at end of file
+    encouragement: Optional[str] = None
+    # True when summary or insights are local template text rather than AI output
+    fallback: bool = False
+    # True when the AI text is still being generated and will be saved to the entry
+    upgrade_pending: bool = False
+
+class ExportJobCreate(BaseModel):
+    report_type: str = "comprehensive"
+    days: int = 30
+
+class ExportJobResponse(BaseModel):
+    id: str
+    report_type: str
+    days: int
+    status: str
+    entry_count: Optional[int] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
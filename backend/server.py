@@ -0,0 +1,221 @@
+import gc
+import importlib.util
+import os
+import signal
+import sys
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Production server settings; run_app.py --production flags override them
+SERVER_HOST = os.getenv("API_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("PORT", os.getenv("API_PORT", "8000")))
+# Worker processes; 0 starts one per available CPU core
+SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", "0"))
+# Pending connections the kernel queues while every worker is busy
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Idle keep-alive; longer than common load balancer idle timeouts (60s) so the proxy always closes first
+SERVER_KEEP_ALIVE_SECONDS = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "75"))
+# On SIGTERM, in-flight requests (AI calls, PDF renders) get this long before being cancelled
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+# Connections per worker before new ones get 503; 0 means no limit
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))
+# Import the app once before forking so workers share its memory; 0 imports it in every worker
+SERVER_PRELOAD = int(os.getenv("SERVER_PRELOAD", "1"))
+
+APP = "backend.main:app"
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))  # honours container CPU pinning
+    return os.cpu_count() or 1
+
+def event_loop_name() -> str:
+    """uvloop when installed (uvicorn[standard]), else the stock asyncio loop"""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def http_protocol_name() -> str:
+    """httptools when installed (uvicorn[standard]), else the pure-Python h11 parser"""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+def size_render_pool(workers: int):
+    """Split the cores between the workers' PDF render pools unless EXPORT_RENDER_WORKERS is set.
+
+    Must run before the app is imported, since render_pool reads it then.
+    """
+    os.environ.setdefault("EXPORT_RENDER_WORKERS", str(max(1, available_cores() // workers)))
+
+def build_config(
+    host: str,
+    port: int,
+    keep_alive: int = SERVER_KEEP_ALIVE_SECONDS,
+    backlog: int = SERVER_BACKLOG,
+    graceful_timeout: int = SERVER_GRACEFUL_TIMEOUT,
+    limit_concurrency: int = SERVER_LIMIT_CONCURRENCY
+):
+    import uvicorn
+    return uvicorn.Config(
+        APP,
+        host=host,
+        port=port,
+        loop=event_loop_name(),
+        http=http_protocol_name(),
+        timeout_keep_alive=keep_alive,
+        backlog=backlog,
+        timeout_graceful_shutdown=graceful_timeout,
+        limit_concurrency=limit_concurrency or None,
+        proxy_headers=True,
+        access_log=False,  # per-request logging costs more than it is worth here; see /metrics
+        log_level="info"
+    )
+
+class PreforkSupervisor:
+    """Runs uvicorn in forked worker processes that share one listening socket.
+
+    With preload the app is imported once in the supervisor, so its modules
+    and objects are shared copy-on-write by every worker. SIGTERM or SIGINT
+    is passed on to the workers, which stop accepting connections, finish
+    in-flight requests within the graceful timeout and run the app's shutdown
+    handlers; workers that die otherwise are replaced.
+    """
+
+    def __init__(self, config, workers: int, preload: bool = True):
+        self.config = config
+        self.workers = workers
+        self.preload = preload
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self._socket = None
+
+    def run(self):
+        from backend.database import engine, init_db
+
+        self._socket = self.config.bind_socket()
+        # Create the schema once here; workers starting together would race on CREATE TABLE
+        init_db()
+        engine.dispose()
+        if self.preload:
+            self.config.load()
+            # Objects created by the import are never freed, so keep the collector from touching
+            # (and thereby un-sharing) their pages in every worker
+            gc.collect()
+            gc.freeze()  # stays frozen in the workers too
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for _ in range(self.workers):
+            self._spawn()
+        print(f"🚀 Supervisor {os.getpid()} running {self.workers} worker(s){' (preloaded)' if self.preload else ''}")
+
+        deadline: Optional[float] = None
+        while self.children:
+            self._reap()
+            if self.stopping:
+                # Workers bound themselves by the graceful timeout and app shutdown; this only catches hangs
+                deadline = deadline or time.monotonic() + self.config.timeout_graceful_shutdown + 60
+                if time.monotonic() > deadline:
+                    for pid in list(self.children):
+                        print(f"⚠️  Worker {pid} did not stop in time, killing it")
+                        self._signal(pid, signal.SIGKILL)
+            else:
+                while len(self.children) < self.workers:
+                    self._spawn()
+            time.sleep(0.2)
+        self._socket.close()
+        print("💚 All workers stopped")
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self.children[pid] = time.monotonic()
+
+    def _run_worker(self):
+        import uvicorn
+
+        # The supervisor forwards stop signals; uvicorn installs its own handlers while serving
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # Connections must never be shared between processes
+        from backend.database import engine
+        engine.dispose(close=False)
+        code = 0
+        try:
+            uvicorn.Server(self.config).run(sockets=[self._socket])
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException as e:
+            print(f"🚨 ERROR in worker {os.getpid()}: {type(e).__name__}: {e}")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Skip the supervisor's atexit handlers, which this process inherited
+            os._exit(code)
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if not self.stopping:
+                print(f"⚠️  Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting it")
+                if started is not None and time.monotonic() - started < 1:
+                    time.sleep(1)  # don't spin on a worker that crashes at startup
+
+    def _handle_stop(self, signum, frame):
+        if not self.stopping:
+            print(f"🛑 {signal.Signals(signum).name} received, draining {len(self.children)} worker(s)...")
+        self.stopping = True
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+def serve(
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    workers: int = SERVER_WORKERS,
+    preload: bool = bool(SERVER_PRELOAD),
+    **options
+):
+    """Run the API for production: pre-forked workers where fork exists, uvicorn's own supervisor elsewhere"""
+    import uvicorn
+
+    workers = workers or available_cores()
+    size_render_pool(workers)
+    config = build_config(host, port, **options)
+    if workers == 1:
+        uvicorn.Server(config).run()
+    elif hasattr(os, "fork"):
+        PreforkSupervisor(config, workers, preload).run()
+    else:
+        # Without fork uvicorn spawns the workers and each imports the app itself
+        uvicorn.run(
+            APP,
+            host=host,
+            port=port,
+            workers=workers,
+            loop=config.loop,
+            http=config.http,
+            timeout_keep_alive=config.timeout_keep_alive,
+            backlog=config.backlog,
+            timeout_graceful_shutdown=config.timeout_graceful_shutdown,
+            limit_concurrency=config.limit_concurrency,
+            proxy_headers=True,
+            access_log=False,
+            log_level="info"
+        )
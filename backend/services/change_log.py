@@ -0,0 +1,105 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.orm import Session, aliased
+
+from backend.models import EntryChange, EntryChangeCompaction
+
+# Records of deleted entries are dropped after this many days; clients whose cursor predates them must resync
+ENTRY_CHANGE_TOMBSTONE_DAYS = int(os.getenv("ENTRY_CHANGE_TOMBSTONE_DAYS", "90"))
+# How often each process compacts the change log in the background
+ENTRY_CHANGE_COMPACT_INTERVAL_SECONDS = int(os.getenv("ENTRY_CHANGE_COMPACT_INTERVAL_SECONDS", "3600"))
+
+class CursorTooOld(Exception):
+    """Raised when changes after a sync cursor were removed by compaction"""
+
+class ChangeLogCompactor:
+    """Keeps the entry change log from growing without bound.
+
+    A change superseded by a later change to the same entry is deleted at
+    any time: every cursor before it still gets the later one. Delete
+    records (tombstones) are the only trace of a deleted entry, so they are
+    kept for ENTRY_CHANGE_TOMBSTONE_DAYS; dropping them moves the horizon,
+    and clients syncing from a cursor below it must start over from 0.
+    Compaction runs on startup and then every interval in the background,
+    so reading the log never writes to it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        tombstone_days: int = ENTRY_CHANGE_TOMBSTONE_DAYS,
+        interval_seconds: int = ENTRY_CHANGE_COMPACT_INTERVAL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.tombstone_ttl = timedelta(days=tombstone_days)
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def horizon(self, db: Session) -> int:
+        """Cursors below this may have missed compacted deletes"""
+        return db.query(func.max(EntryChangeCompaction.horizon)).scalar() or 0
+
+    def check_cursor(self, db: Session, since: int):
+        """Raise CursorTooOld if changes after since may have been compacted away.
+
+        Call it after reading the page: a compaction committed before the
+        read is then always seen, one committed after it removed nothing the
+        page needed.
+        """
+        # A client starting from 0 holds no entries, so it cannot miss a delete
+        if since > 0 and since < self.horizon(db):
+            raise CursorTooOld(since)
+
+    async def start(self):
+        """Compact in the background now and then every interval"""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_compaction)
+            except Exception as e:
+                print(f"🚨 ERROR compacting entry change log: {type(e).__name__}: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def run_compaction(self) -> Dict[str, int]:
+        """Compact and commit in a session of its own"""
+        db = self.session_factory()
+        try:
+            result = self.compact(db)
+            db.commit()
+            return result
+        finally:
+            db.close()
+
+    def compact(self, db: Session) -> Dict[str, int]:
+        """Delete superseded changes and expired tombstones; committed by the caller"""
+        newer = aliased(EntryChange)
+        superseded = db.query(EntryChange).filter(
+            exists().where(newer.entry_id == EntryChange.entry_id, newer.id > EntryChange.id)
+        ).delete(synchronize_session=False)
+
+        # The newest change stays, so the latest cursor (a cache key elsewhere) never goes backwards
+        newest = db.query(func.max(EntryChange.id)).scalar() or 0
+        horizon = db.query(func.max(EntryChange.id)).filter(
+            EntryChange.operation == "delete",
+            EntryChange.changed_at < datetime.now() - self.tombstone_ttl,
+            EntryChange.id < newest
+        ).scalar()
+        expired = 0
+        if horizon:
+            expired = db.query(EntryChange).filter(
+                EntryChange.operation == "delete", EntryChange.id <= horizon
+            ).delete(synchronize_session=False)
+            db.add(EntryChangeCompaction(horizon=horizon))
+        return {"superseded": superseded, "expired_tombstones": expired, "horizon": horizon or self.horizon(db)}
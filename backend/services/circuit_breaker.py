@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the circuit is open"""
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for a flaky upstream dependency.
+
+    Closed: calls go through and their outcomes fill a sliding window. Once
+    the window holds at least min_calls outcomes and the failure rate reaches
+    failure_rate, the circuit opens and calls fail immediately with
+    CircuitOpenError. After open_seconds it turns half-open and lets
+    half_open_probes calls through; a success closes it, a failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        is_failure: Optional[Callable[[BaseException], bool]] = None
+    ):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        # Decides which exceptions count against the upstream; by default all do
+        self.is_failure = is_failure or (lambda e: True)
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)  # True for success
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run fn through the breaker, raising CircuitOpenError without calling it while open"""
+        probe = self._before_call()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._record(probe, success=not self.is_failure(e))
+            raise
+        self._record(probe, success=True)
+        return result
+
+    def _refresh_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+    def _before_call(self) -> bool:
+        """Admit or reject a call; returns True when the call is a half-open probe"""
+        with self._lock:
+            self._refresh_state()
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.short_circuited += 1
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(f"Circuit open, retrying upstream in {retry_in:.0f}s")
+
+    def _record(self, probe: bool, success: bool):
+        with self._lock:
+            if probe:
+                self._probes_in_flight -= 1
+                if self._state != self.HALF_OPEN:
+                    return  # another probe already decided the outcome
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+
+            if self._state != self.CLOSED:
+                return  # a call admitted before the circuit opened
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state plus window and short-circuit counters"""
+        with self._lock:
+            self._refresh_state()
+            failures = self._outcomes.count(False)
+            calls = len(self._outcomes)
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+            return {
+                "state": self._state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "failure_rate_threshold": self.failure_rate,
+                "retry_in_seconds": retry_in,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+            }
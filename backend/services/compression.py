@@ -0,0 +1,155 @@
+import os
+import re
+import zlib
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone covers every client
+    brotli = None
+
+# Smaller responses gain less from compression than the header and CPU cost
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+RESPONSE_COMPRESSION_THREAD_BYTES = int(os.getenv("RESPONSE_COMPRESSION_THREAD_BYTES", str(256 * 1024)))
+# Per-request levels: past these, output barely shrinks while CPU time keeps growing
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = (b"text/", b"application/json", b"application/javascript", b"application/xml", b"image/svg+xml")
+
+def choose_coding(accept_encoding: str) -> Optional[str]:
+    """The smallest coding we support that the client's Accept-Encoding allows, if any"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+class _Encoder:
+    """Incremental gzip or brotli encoder for one response"""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flushed, so streamed output reaches the client as it is produced
+        if self.coding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def last(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+def _compressible(status_code: int, headers) -> bool:
+    if status_code < 200 or status_code in (204, 206, 304):
+        return False
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False  # already encoded (or deliberately identity)
+        if name == b"content-type":
+            content_type = value.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+def _encoded_headers(headers, coding: str, length: Optional[int]):
+    """Response headers for the encoded body: new length, Content-Encoding, and a weak ETag
+    since the bytes differ from the identity response's"""
+    encoded = []
+    for name, value in headers:
+        if name == b"content-length":
+            continue
+        if name == b"etag" and not value.startswith(b"W/"):
+            value = b"W/" + value
+        encoded.append((name, value))
+    encoded.append((b"content-encoding", coding.encode("latin-1")))
+    if length is not None:
+        encoded.append((b"content-length", str(length).encode("latin-1")))
+    return encoded
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing text and JSON responses with brotli or gzip.
+
+    Complete bodies below minimum_size are sent as they are; streamed
+    bodies of a compressible type are compressed chunk by chunk. Responses
+    that already carry a Content-Encoding (or are ranges, or binary such as
+    PDFs) pass through untouched. Vary: Accept-Encoding is added whenever
+    the representation could depend on it.
+    """
+
+    def __init__(self, app, minimum_size: int = RESPONSE_COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                coding = choose_coding(value.decode("latin-1"))
+                break
+
+        start = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if passthrough or message["type"] not in ("http.response.start", "http.response.body"):
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if not _compressible(message["status"], message.get("headers", [])):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Held back until the first body chunk shows the size
+                start = dict(message, headers=list(message.get("headers", [])) + [(b"vary", b"Accept-Encoding")])
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                if coding is None or (not more and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Encoder(coding)
+                if more:
+                    await send(dict(start, headers=_encoded_headers(start["headers"], coding, None)))
+                else:
+                    if len(body) > RESPONSE_COMPRESSION_THREAD_BYTES:
+                        body = await run_in_threadpool(encoder.last, body)
+                    else:
+                        body = encoder.last(body)
+                    await send(dict(start, headers=_encoded_headers(start["headers"], coding, len(body))))
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            data = encoder.chunk(body) if more else encoder.last(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
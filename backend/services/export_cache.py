@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Any, BinaryIO, Optional
+
+# Cached PDFs live on disk so every worker process can share them
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join("data", "export_cache"))
+# Least recently served reports are evicted once the cache grows past this; 0 disables caching
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+class ExportCache:
+    """Disk-backed cache of rendered export PDFs with size-based LRU eviction.
+
+    Entries are keyed by a fingerprint of the report parameters and the entry
+    set they cover, so a new or edited entry simply produces a new key and
+    stale reports age out through eviction. A file's mtime is its last use.
+    """
+
+    def __init__(self, directory: str = EXPORT_CACHE_DIR, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def fingerprint(
+        report_type: str,
+        days: int,
+        last_updated: Optional[datetime],
+        entry_count: int,
+        report_date: str,
+        change_cursor: Optional[int] = None
+    ) -> str:
+        """Cache key for a report over a given entry set.
+
+        report_date is part of the key because the PDF prints the day it was
+        generated. change_cursor (the latest entry change log id) catches edits
+        that land within the same second as the previous updated_at.
+        """
+        last_updated_text = last_updated.isoformat() if last_updated else ""
+        raw = f"{report_type}|{days}|{last_updated_text}|{entry_count}|{report_date}|{change_cursor or 0}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open a cached report for reading and mark it recently used, or None on a miss"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            cached_file = open(path, "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by another worker; the open handle still reads fine
+        self.hits += 1
+        return cached_file
+
+    def put(self, key: str, source_path: str) -> str:
+        """Move a freshly rendered PDF into the cache and return its cached path"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        staging_path = f"{path}.{os.getpid()}.tmp"
+        shutil.move(source_path, staging_path)
+        os.replace(staging_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        """Remove least recently used reports until the cache fits in max_bytes"""
+        files = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                total += stat.st_size
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
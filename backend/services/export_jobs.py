@@ -0,0 +1,254 @@
+import asyncio
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models import ExportJob, JournalEntry
+from backend.services.render_pool import RenderPool, entry_to_export_row, write_rows_file
+
+# Finished job artifacts are kept here until they expire
+EXPORT_JOBS_DIR = os.getenv("EXPORT_JOBS_DIR", os.path.join("data", "export_jobs"))
+# Number of jobs rendered concurrently by this process
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "1"))
+# Completed artifacts older than this are deleted
+EXPORT_JOB_RETENTION_HOURS = int(os.getenv("EXPORT_JOB_RETENTION_HOURS", "24"))
+EXPORT_JOB_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "200"))
+# On shutdown, jobs already rendering get this long to finish; later ones stay queued for the next start
+EXPORT_JOB_DRAIN_SECONDS = int(os.getenv("EXPORT_JOB_DRAIN_SECONDS", "30"))
+# A job still running this long after it was claimed was orphaned by a killed worker and is queued again
+EXPORT_JOB_LEASE_SECONDS = int(os.getenv("EXPORT_JOB_LEASE_SECONDS", "1800"))
+# How often orphaned jobs are recovered and expired artifacts purged, even while no jobs arrive
+EXPORT_JOB_SWEEP_SECONDS = int(os.getenv("EXPORT_JOB_SWEEP_SECONDS", "600"))
+
+class ExportJobRunner:
+    """Background worker that renders queued export jobs into the job file store.
+
+    Job state lives in the export_jobs table so any API process can report
+    status and serve downloads; jobs are claimed with a conditional update so
+    a job picked up after a restart is never rendered twice.
+    """
+
+    def __init__(
+        self,
+        render_pool: RenderPool,
+        session_factory: sessionmaker,
+        jobs_dir: str = EXPORT_JOBS_DIR,
+        workers: int = EXPORT_JOB_WORKERS,
+        retention_hours: int = EXPORT_JOB_RETENTION_HOURS,
+        drain_seconds: int = EXPORT_JOB_DRAIN_SECONDS,
+        lease_seconds: int = EXPORT_JOB_LEASE_SECONDS,
+        sweep_seconds: int = EXPORT_JOB_SWEEP_SECONDS
+    ):
+        self.render_pool = render_pool
+        self.session_factory = session_factory
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.retention = timedelta(hours=retention_hours)
+        self.drain_seconds = drain_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.sweep_seconds = sweep_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._busy: Set[asyncio.Task] = set()
+        self._running: Set[str] = set()  # job ids this process is rendering
+        self._stopping = False
+
+    def create_job(self, db: Session, report_type: str, days: int) -> ExportJob:
+        """Record a new job and queue it for rendering"""
+        job = ExportJob(id=uuid.uuid4().hex, report_type=report_type, days=days, status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def start(self):
+        """Start the worker tasks and pick up jobs left queued (or orphaned while running) by a previous run"""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        await asyncio.to_thread(self._requeue_orphaned)
+        await asyncio.to_thread(self._purge_expired)
+        for job_id in await asyncio.to_thread(self._pending_job_ids):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        """Let jobs already rendering finish within drain_seconds, then cancel the workers.
+
+        Jobs not finished by then go back to queued for the next start.
+        """
+        self._stopping = True
+        busy = [task for task in self._tasks if task in self._busy]
+        if busy and self.drain_seconds > 0:
+            print(f"⏳ Waiting up to {self.drain_seconds}s for {len(busy)} export job(s) to finish...")
+            await asyncio.wait(busy, timeout=self.drain_seconds)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        task = asyncio.current_task()
+        while not self._stopping:
+            job_id = await self._queue.get()
+            self._busy.add(task)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"🚨 ERROR running export job {job_id}: {type(e).__name__}: {e}")
+            finally:
+                self._busy.discard(task)
+                self._queue.task_done()
+            if self._queue.empty():
+                await asyncio.to_thread(self._purge_expired)
+
+    async def _sweeper(self):
+        """Periodically recover jobs orphaned by crashed workers (in any process) and purge expired ones"""
+        while not self._stopping:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                for job_id in await asyncio.to_thread(self._requeue_orphaned):
+                    self._queue.put_nowait(job_id)
+                await asyncio.to_thread(self._purge_expired)
+            except Exception as e:
+                print(f"🚨 ERROR sweeping export jobs: {type(e).__name__}: {e}")
+
+    async def _run(self, job_id: str):
+        """Claim and render one job"""
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return  # already claimed by another worker or no longer queued
+
+        self._running.add(job_id)
+        try:
+            await self._render(job)
+        finally:
+            self._running.discard(job_id)
+
+    async def _render(self, job: ExportJob):
+        """Render a claimed job, recording the outcome on its row"""
+        job_id = job.id
+        try:
+            rows_path, entry_count = await asyncio.to_thread(self._write_rows, job.days)
+            try:
+                pdf_path = await self.render_pool.render(rows_path, job.report_type)
+            finally:
+                os.remove(rows_path)
+            artifact_path = os.path.join(self.jobs_dir, f"{job.id}.pdf")
+            await asyncio.to_thread(shutil.move, pdf_path, artifact_path)
+        except asyncio.CancelledError:
+            # Shutting down mid-render: hand the job back so the next start renders it
+            await asyncio.to_thread(self._requeue, job_id)
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self._finish, job_id, "failed", error=f"{type(e).__name__}: {e}")
+            raise
+
+        await asyncio.to_thread(
+            self._finish, job_id, "completed",
+            file_path=artifact_path, file_size=os.path.getsize(artifact_path), entry_count=entry_count
+        )
+
+    def _requeue_orphaned(self) -> List[str]:
+        """Put running jobs whose lease expired back in the queue; returns their ids.
+
+        Uses the same conditional update as _claim, so of several processes
+        sweeping at once only one re-queues each job. Jobs this process is
+        still rendering are left alone however long they take.
+        """
+        cutoff = datetime.now() - self.lease
+        db = self.session_factory()
+        try:
+            stale = db.query(ExportJob.id).filter(
+                ExportJob.status == "running", ExportJob.started_at < cutoff
+            ).all()
+            requeued = []
+            for job_id, in stale:
+                if job_id in self._running:
+                    continue
+                updated = db.query(ExportJob).filter(
+                    ExportJob.id == job_id, ExportJob.status == "running", ExportJob.started_at < cutoff
+                ).update({"status": "queued", "started_at": None}, synchronize_session=False)
+                db.commit()
+                if updated:
+                    print(f"♻️  Re-queued export job {job_id}, orphaned while running")
+                    requeued.append(job_id)
+            return requeued
+        finally:
+            db.close()
+
+    def _pending_job_ids(self) -> List[str]:
+        db = self.session_factory()
+        try:
+            jobs = db.query(ExportJob.id).filter(ExportJob.status == "queued").order_by(ExportJob.created_at).all()
+            return [job_id for job_id, in jobs]
+        finally:
+            db.close()
+
+    def _claim(self, job_id: str) -> Optional[ExportJob]:
+        db = self.session_factory()
+        try:
+            claimed = db.query(ExportJob).filter(
+                ExportJob.id == job_id, ExportJob.status == "queued"
+            ).update({"status": "running", "started_at": datetime.now()}, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return None
+            job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+            db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def _write_rows(self, days: int):
+        db = self.session_factory()
+        try:
+            start_date = datetime.now() - timedelta(days=days)
+            query = db.query(JournalEntry).filter(
+                JournalEntry.timestamp >= start_date
+            ).order_by(JournalEntry.timestamp.desc())
+            return write_rows_file(entry_to_export_row(entry) for entry in query.yield_per(EXPORT_JOB_YIELD_PER))
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, status: str, **fields):
+        db = self.session_factory()
+        try:
+            db.query(ExportJob).filter(ExportJob.id == job_id).update(
+                {"status": status, "completed_at": datetime.now(), **fields}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _requeue(self, job_id: str):
+        db = self.session_factory()
+        try:
+            db.query(ExportJob).filter(ExportJob.id == job_id, ExportJob.status == "running").update(
+                {"status": "queued", "started_at": None}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _purge_expired(self):
+        """Delete artifacts and rows of jobs finished longer ago than the retention period"""
+        cutoff = datetime.now() - self.retention
+        db = self.session_factory()
+        try:
+            expired = db.query(ExportJob).filter(
+                ExportJob.status.in_(["completed", "failed"]), ExportJob.completed_at < cutoff
+            ).all()
+            for job in expired:
+                if job.file_path and os.path.exists(job.file_path):
+                    os.remove(job.file_path)
+                db.delete(job)
+            db.commit()
+        finally:
+            db.close()
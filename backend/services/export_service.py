@@ -6,47 +6,176 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from io import BytesIO
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, BinaryIO
+import tempfile
 import os
 
-class ExportService:
+# Reports smaller than this stay in memory; larger ones roll over to a temp file on disk
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(1024 * 1024)))
+
+# How many flowables ReportLab may see ahead of the one it is laying out
+STORY_LOOKAHEAD = 64
+
+class _FlowableStream(list):
+    """List-like story that pulls flowables from a generator as ReportLab consumes them.
+
+    ReportLab's doc.build() walks the story with len(), indexing, del and insert,
+    so topping the buffer up on len() and item access keeps only a small window
+    of flowables alive instead of one per entry for the whole report.
+    """
+
+    def __init__(self, flowables: Iterable, lookahead: int = STORY_LOOKAHEAD):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+class _ReportStats:
+    """Single-pass accumulator for the statistics shown in a report"""
+
+    METRICS = (
+        ('mood', 'mood_overall'),
+        ('energy', 'energy_level'),
+        ('pain', 'pain_level'),
+        ('anxiety', 'anxiety_level'),
+        ('fatigue', 'fatigue_level'),
+    )
+
     def __init__(self):
+        self.total = 0
+        self.morning_count = 0
+        self.evening_count = 0
+        self.first_date = None
+        self.last_date = None
+        self.sleep_counts = {}
+        self.high_pain_count = 0
+        self.poor_sleep_count = 0
+        self.low_energy_count = 0
+        self.high_anxiety_count = 0
+        self._sums = {name: 0 for name, _ in self.METRICS}
+        self._counts = {name: 0 for name, _ in self.METRICS}
+        self._mins = {name: None for name, _ in self.METRICS}
+        self._maxs = {name: None for name, _ in self.METRICS}
+
+    def add(self, entry: Dict[str, Any]):
+        self.total += 1
+        if entry.get('entry_type') == 'morning':
+            self.morning_count += 1
+        elif entry.get('entry_type') == 'evening':
+            self.evening_count += 1
+
+        entry_date = entry.get('date')
+        if entry_date:
+            if self.first_date is None or entry_date < self.first_date:
+                self.first_date = entry_date
+            if self.last_date is None or entry_date > self.last_date:
+                self.last_date = entry_date
+
+        for name, field in self.METRICS:
+            value = entry.get(field)
+            if value is None:
+                continue
+            self._sums[name] += value
+            self._counts[name] += 1
+            if self._mins[name] is None or value < self._mins[name]:
+                self._mins[name] = value
+            if self._maxs[name] is None or value > self._maxs[name]:
+                self._maxs[name] = value
+
+        sleep = entry.get('sleep_quality')
+        if sleep:
+            self.sleep_counts[sleep] = self.sleep_counts.get(sleep, 0) + 1
+            if sleep in ['poor', 'very_poor']:
+                self.poor_sleep_count += 1
+
+        if (entry.get('pain_level') or 0) >= 7:
+            self.high_pain_count += 1
+        if entry.get('energy_level') is not None and entry['energy_level'] <= 3:
+            self.low_energy_count += 1
+        if (entry.get('anxiety_level') or 0) >= 7:
+            self.high_anxiety_count += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Averages and ranges keyed like avg_mood / mood_range"""
+        stats = {}
+        for name, _ in self.METRICS:
+            if self._counts[name]:
+                stats[f'avg_{name}'] = self._sums[name] / self._counts[name]
+                stats[f'{name}_range'] = f"{self._mins[name]}-{self._maxs[name]}"
+            else:
+                stats[f'avg_{name}'] = None
+                stats[f'{name}_range'] = None
+        return stats
+
+# Entry text fields per entry type, with their labels pre-rendered as markup
+ENTRY_TEXT_FIELDS = {
+    'morning': tuple((field, f"<b>{label}:</b> ") for field, label in (
+        ('morning_feeling', 'Morning Feeling'),
+        ('morning_hopes', 'Hopes for Today'),
+        ('morning_symptoms', 'Morning Symptoms'),
+    )),
+    'evening': tuple((field, f"<b>{label}:</b> ") for field, label in (
+        ('evening_day_review', 'Day Review'),
+        ('evening_gratitude', 'Gratitude'),
+        ('evening_symptoms', 'Evening Symptoms'),
+    )),
+}
+
+RATING_FIELDS = (
+    ('mood_overall', 'Mood: '),
+    ('energy_level', 'Energy: '),
+    ('anxiety_level', 'Anxiety: '),
+    ('pain_level', 'Pain: '),
+    ('fatigue_level', 'Fatigue: '),
+)
+
+class ExportService:
+    """Renders journal PDF reports.
+
+    Styles, the statistics table style and the document settings are built
+    once here and only read afterwards, so one instance can be shared by
+    threads; render processes each build their own.
+    """
+
+    def __init__(self, spool_max_size: int = EXPORT_SPOOL_MAX_BYTES):
         self.sage_green = HexColor("#5a6e5a")
         self.lavender = HexColor("#a593c2")
         self.light_gray = HexColor("#f6f7f6")
-        
-    def generate_pdf_report(self, entries: List[Dict[str, Any]], report_type: str = "comprehensive") -> BytesIO:
-        """Generate a PDF report from journal entries"""
-        buffer = BytesIO()
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
-        
-        # Build the story (content)
-        story = []
-        styles = getSampleStyleSheet()
+        self.spool_max_size = spool_max_size
+
+        self.styles = getSampleStyleSheet()
+        self.normal_style = self.styles['Normal']
+        self.subheading_style = self.styles['Heading3']
         
         # Custom styles
-        title_style = ParagraphStyle(
+        self.title_style = ParagraphStyle(
             'CustomTitle',
-            parent=styles['Heading1'],
+            parent=self.styles['Heading1'],
             fontSize=24,
             spaceAfter=30,
             textColor=self.sage_green,
             alignment=TA_CENTER
         )
         
-        heading_style = ParagraphStyle(
+        self.heading_style = ParagraphStyle(
             'CustomHeading',
-            parent=styles['Heading2'],
+            parent=self.styles['Heading2'],
             fontSize=16,
             spaceAfter=12,
             textColor=self.sage_green,
@@ -54,50 +183,112 @@ class ExportService:
             borderColor=self.sage_green,
             borderPadding=5
         )
+
+        self.summary_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), self.light_gray),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+        self.summary_col_widths = [2*inch, 1.5*inch, 1.5*inch]
+
+        # Page setup shared by every document; frames and page templates carry
+        # per-build layout state, so SimpleDocTemplate still creates those itself
+        self.document_settings = dict(
+            pagesize=letter,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18
+        )
+        
+    def generate_pdf_report(self, entries: List[Dict[str, Any]], report_type: str = "comprehensive") -> BytesIO:
+        """Generate a PDF report from journal entries"""
+        buffer = BytesIO()
+        self.write_pdf_report(buffer, lambda: iter(entries), report_type)
+        buffer.seek(0)
+        return buffer
+
+    def generate_pdf_report_chunked(
+        self,
+        row_source: Callable[[], Iterable[Dict[str, Any]]],
+        report_type: str = "comprehensive"
+    ) -> BinaryIO:
+        """Generate a PDF report into a spooled temp file, reading entries lazily.
+
+        row_source is called once per pass over the entries (statistics first,
+        then the entry pages) and must return a fresh iterator each time, e.g. a
+        yield_per() query. The caller owns the returned file and must close it.
+        """
+        output = tempfile.SpooledTemporaryFile(max_size=self.spool_max_size, mode="w+b")
+        try:
+            self.write_pdf_report(output, row_source, report_type)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output
+
+    def write_pdf_report(self, output: BinaryIO, row_source: Callable[[], Iterable[Dict[str, Any]]], report_type: str = "comprehensive"):
+        """Lay out the report into a writable binary file without holding the whole story in memory"""
+        # Create the PDF document
+        doc = SimpleDocTemplate(output, **self.document_settings)
+
+        # First pass: statistics only, so the story itself can be streamed
+        stats = _ReportStats()
+        for entry in row_source():
+            stats.add(entry)
+
+        story = _FlowableStream(self._iter_story(row_source, report_type, stats))
+        doc.build(story)
+
+    def _iter_story(self, row_source: Callable[[], Iterable[Dict[str, Any]]], report_type: str, stats: _ReportStats) -> Iterator:
+        """Yield the report's flowables in order"""
+        title_style = self.title_style
+        normal_style = self.normal_style
         
         # Title page
-        story.append(Paragraph("ChroniCompanion", title_style))
-        story.append(Paragraph("Journal Report", title_style))
-        story.append(Spacer(1, 20))
+        yield Paragraph("ChroniCompanion", title_style)
+        yield Paragraph("Journal Report", title_style)
+        yield Spacer(1, 20)
         
         # Report metadata
         report_date = datetime.now().strftime("%B %d, %Y")
-        story.append(Paragraph(f"<b>Report Generated:</b> {report_date}", styles['Normal']))
-        story.append(Paragraph(f"<b>Total Entries:</b> {len(entries)}", styles['Normal']))
+        yield Paragraph(f"<b>Report Generated:</b> {report_date}", normal_style)
+        yield Paragraph(f"<b>Total Entries:</b> {stats.total}", normal_style)
         
-        if entries:
-            date_range = self._get_date_range(entries)
-            story.append(Paragraph(f"<b>Date Range:</b> {date_range}", styles['Normal']))
+        if stats.total:
+            date_range = self._get_date_range(stats)
+            yield Paragraph(f"<b>Date Range:</b> {date_range}", normal_style)
         
-        story.append(Spacer(1, 30))
+        yield Spacer(1, 30)
         
         if report_type == "comprehensive":
             # Summary statistics
-            story.extend(self._create_summary_section(entries, heading_style, styles))
+            yield from self._create_summary_section(stats)
             
             # Individual entries
-            story.extend(self._create_entries_section(entries, heading_style, styles))
+            yield from self._create_entries_section(row_source(), stats.total)
             
         elif report_type == "doctor_summary":
             # Medical-focused summary
-            story.extend(self._create_medical_summary(entries, heading_style, styles))
-            
-        # Build the PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+            yield from self._create_medical_summary(row_source(), stats)
     
-    def _create_summary_section(self, entries: List[Dict[str, Any]], heading_style, styles) -> List:
+    def _create_summary_section(self, report_stats: _ReportStats) -> Iterator:
         """Create summary statistics section"""
-        story = []
-        story.append(Paragraph("Summary Statistics", heading_style))
+        normal_style = self.normal_style
+        yield Paragraph("Summary Statistics", self.heading_style)
         
-        if not entries:
-            story.append(Paragraph("No entries to analyze.", styles['Normal']))
-            return story
+        if not report_stats.total:
+            yield Paragraph("No entries to analyze.", normal_style)
+            return
         
         # Calculate statistics
-        stats = self._calculate_statistics(entries)
+        stats = report_stats.as_dict()
         
         # Create statistics table
         data = [
@@ -112,82 +303,65 @@ class ExportService:
              f"{stats['anxiety_range']}" if stats['anxiety_range'] else 'N/A'],
         ]
         
-        table = Table(data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.light_gray),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
+        table = Table(data, colWidths=self.summary_col_widths)
+        table.setStyle(self.summary_table_style)
         
-        story.append(table)
-        story.append(Spacer(1, 20))
+        yield table
+        yield Spacer(1, 20)
         
         # Entry type breakdown
-        morning_count = len([e for e in entries if e.get('entry_type') == 'morning'])
-        evening_count = len([e for e in entries if e.get('entry_type') == 'evening'])
-        
-        story.append(Paragraph(f"<b>Entry Types:</b> {morning_count} Morning, {evening_count} Evening", styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        return story
+        yield Paragraph(f"<b>Entry Types:</b> {report_stats.morning_count} Morning, {report_stats.evening_count} Evening", normal_style)
+        yield Spacer(1, 20)
     
-    def _create_entries_section(self, entries: List[Dict[str, Any]], heading_style, styles) -> List:
+    def _create_entries_section(self, entries: Iterable[Dict[str, Any]], total: int) -> Iterator:
         """Create individual entries section"""
-        story = []
-        story.append(PageBreak())
-        story.append(Paragraph("Journal Entries", heading_style))
+        yield PageBreak()
+        yield Paragraph("Journal Entries", self.heading_style)
         
         for i, entry in enumerate(entries):
             if i > 0:
-                story.append(Spacer(1, 20))
+                yield Spacer(1, 20)
             
-            story.extend(self._format_single_entry(entry, styles))
+            yield from self._format_single_entry(entry)
             
             # Page break every 3 entries to keep readability
-            if (i + 1) % 3 == 0 and i < len(entries) - 1:
-                story.append(PageBreak())
-        
-        return story
+            if (i + 1) % 3 == 0 and i < total - 1:
+                yield PageBreak()
     
-    def _create_medical_summary(self, entries: List[Dict[str, Any]], heading_style, styles) -> List:
+    def _create_medical_summary(self, entries: Iterable[Dict[str, Any]], report_stats: _ReportStats) -> Iterator:
         """Create medical-focused summary for doctors"""
-        story = []
-        story.append(Paragraph("Medical Summary Report", heading_style))
+        normal_style = self.normal_style
+        yield Paragraph("Medical Summary Report", self.heading_style)
         
         # Patient tracking overview
-        stats = self._calculate_statistics(entries)
+        stats = report_stats.as_dict()
         
-        story.append(Paragraph("<b>Symptom Tracking Summary</b>", styles['Heading3']))
+        yield Paragraph("<b>Symptom Tracking Summary</b>", self.subheading_style)
         
         # Symptom trends
         symptom_text = f"""
-        <b>Pain Levels:</b> Average {stats['avg_pain']:.1f}/10, Range: {stats['pain_range']}<br/>
-        <b>Fatigue Levels:</b> Average {stats['avg_fatigue']:.1f}/10, Range: {stats['fatigue_range']}<br/>
-        <b>Sleep Quality:</b> {self._analyze_sleep_patterns(entries)}<br/>
-        <b>Mood Tracking:</b> Average {stats['avg_mood']:.1f}/10, Range: {stats['mood_range']}<br/>
-        <b>Energy Levels:</b> Average {stats['avg_energy']:.1f}/10, Range: {stats['energy_range']}<br/>
+        <b>Pain Levels:</b> Average {self._format_average(stats['avg_pain'])}, Range: {stats['pain_range']}<br/>
+        <b>Fatigue Levels:</b> Average {self._format_average(stats['avg_fatigue'])}, Range: {stats['fatigue_range']}<br/>
+        <b>Sleep Quality:</b> {self._analyze_sleep_patterns(report_stats)}<br/>
+        <b>Mood Tracking:</b> Average {self._format_average(stats['avg_mood'])}, Range: {stats['mood_range']}<br/>
+        <b>Energy Levels:</b> Average {self._format_average(stats['avg_energy'])}, Range: {stats['energy_range']}<br/>
         """
         
-        story.append(Paragraph(symptom_text, styles['Normal']))
-        story.append(Spacer(1, 15))
+        yield Paragraph(symptom_text, normal_style)
+        yield Spacer(1, 15)
         
         # Notable patterns
-        story.append(Paragraph("<b>Notable Patterns & Concerns</b>", styles['Heading3']))
-        patterns = self._identify_medical_patterns(entries)
+        yield Paragraph("<b>Notable Patterns & Concerns</b>", self.subheading_style)
+        patterns = self._identify_medical_patterns(report_stats)
         for pattern in patterns:
-            story.append(Paragraph(f"• {pattern}", styles['Normal']))
+            yield Paragraph(f"• {pattern}", normal_style)
         
-        story.append(Spacer(1, 15))
+        yield Spacer(1, 15)
         
         # Recent entries summary
-        story.append(Paragraph("<b>Recent Entries (Last 7 Days)</b>", styles['Heading3']))
+        yield Paragraph("<b>Recent Entries (Last 7 Days)</b>", self.subheading_style)
         
-        recent_entries = entries[:7]  # Assuming entries are sorted by date desc
+        recent_entries = islice(entries, 7)  # Assuming entries are sorted by date desc
         for entry in recent_entries:
             entry_date = entry.get('date', 'Unknown date')
             entry_type = entry.get('entry_type', 'Unknown').title()
@@ -199,13 +373,12 @@ class ExportService:
             mood = entry.get('mood_overall', 'N/A')
             
             entry_summary = f"<b>{entry_date} ({entry_type}):</b> Pain: {pain}/10, Fatigue: {fatigue}/10, Sleep: {sleep}, Mood: {mood}/10"
-            story.append(Paragraph(entry_summary, styles['Normal']))
-        
-        return story
+            yield Paragraph(entry_summary, normal_style)
     
-    def _format_single_entry(self, entry: Dict[str, Any], styles) -> List:
+    def _format_single_entry(self, entry: Dict[str, Any]) -> List:
         """Format a single journal entry"""
         story = []
+        normal_style = self.normal_style
         
         # Entry header
         entry_date = entry.get('date', 'Unknown date')
@@ -225,147 +398,70 @@ class ExportService:
         if time_str:
             header_text += f" <i>({time_str})</i>"
         
-        story.append(Paragraph(header_text, styles['Heading3']))
+        story.append(Paragraph(header_text, self.subheading_style))
         
         # Entry content based on type
-        if entry.get('entry_type') == 'morning':
-            if entry.get('morning_feeling'):
-                story.append(Paragraph(f"<b>Morning Feeling:</b> {entry['morning_feeling']}", styles['Normal']))
-            if entry.get('morning_hopes'):
-                story.append(Paragraph(f"<b>Hopes for Today:</b> {entry['morning_hopes']}", styles['Normal']))
-            if entry.get('morning_symptoms'):
-                story.append(Paragraph(f"<b>Morning Symptoms:</b> {entry['morning_symptoms']}", styles['Normal']))
-        
-        elif entry.get('entry_type') == 'evening':
-            if entry.get('evening_day_review'):
-                story.append(Paragraph(f"<b>Day Review:</b> {entry['evening_day_review']}", styles['Normal']))
-            if entry.get('evening_gratitude'):
-                story.append(Paragraph(f"<b>Gratitude:</b> {entry['evening_gratitude']}", styles['Normal']))
-            if entry.get('evening_symptoms'):
-                story.append(Paragraph(f"<b>Evening Symptoms:</b> {entry['evening_symptoms']}", styles['Normal']))
+        for field, label_markup in ENTRY_TEXT_FIELDS.get(entry.get('entry_type'), ()):
+            if entry.get(field):
+                story.append(Paragraph(label_markup + entry[field], normal_style))
         
         # Ratings
-        ratings = []
-        if entry.get('mood_overall'):
-            ratings.append(f"Mood: {entry['mood_overall']}/10")
-        if entry.get('energy_level'):
-            ratings.append(f"Energy: {entry['energy_level']}/10")
-        if entry.get('anxiety_level'):
-            ratings.append(f"Anxiety: {entry['anxiety_level']}/10")
-        if entry.get('pain_level'):
-            ratings.append(f"Pain: {entry['pain_level']}/10")
-        if entry.get('fatigue_level'):
-            ratings.append(f"Fatigue: {entry['fatigue_level']}/10")
+        ratings = [f"{label}{entry[field]}/10" for field, label in RATING_FIELDS if entry.get(field)]
         
         if ratings:
-            story.append(Paragraph(f"<b>Ratings:</b> {' | '.join(ratings)}", styles['Normal']))
+            story.append(Paragraph(f"<b>Ratings:</b> {' | '.join(ratings)}", normal_style))
         
         if entry.get('sleep_quality'):
-            story.append(Paragraph(f"<b>Sleep Quality:</b> {entry['sleep_quality'].replace('_', ' ').title()}", styles['Normal']))
+            story.append(Paragraph(f"<b>Sleep Quality:</b> {entry['sleep_quality'].replace('_', ' ').title()}", normal_style))
         
         if entry.get('additional_notes'):
-            story.append(Paragraph(f"<b>Additional Notes:</b> {entry['additional_notes']}", styles['Normal']))
+            story.append(Paragraph(f"<b>Additional Notes:</b> {entry['additional_notes']}", normal_style))
         
         return story
     
-    def _calculate_statistics(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate statistical summaries"""
-        stats = {}
-        
-        # Mood statistics
-        mood_values = [e.get('mood_overall') for e in entries if e.get('mood_overall') is not None]
-        if mood_values:
-            stats['avg_mood'] = sum(mood_values) / len(mood_values)
-            stats['mood_range'] = f"{min(mood_values)}-{max(mood_values)}"
-        else:
-            stats['avg_mood'] = None
-            stats['mood_range'] = None
-        
-        # Energy statistics
-        energy_values = [e.get('energy_level') for e in entries if e.get('energy_level') is not None]
-        if energy_values:
-            stats['avg_energy'] = sum(energy_values) / len(energy_values)
-            stats['energy_range'] = f"{min(energy_values)}-{max(energy_values)}"
-        else:
-            stats['avg_energy'] = None
-            stats['energy_range'] = None
-        
-        # Pain statistics
-        pain_values = [e.get('pain_level') for e in entries if e.get('pain_level') is not None]
-        if pain_values:
-            stats['avg_pain'] = sum(pain_values) / len(pain_values)
-            stats['pain_range'] = f"{min(pain_values)}-{max(pain_values)}"
-        else:
-            stats['avg_pain'] = None
-            stats['pain_range'] = None
-        
-        # Anxiety statistics
-        anxiety_values = [e.get('anxiety_level') for e in entries if e.get('anxiety_level') is not None]
-        if anxiety_values:
-            stats['avg_anxiety'] = sum(anxiety_values) / len(anxiety_values)
-            stats['anxiety_range'] = f"{min(anxiety_values)}-{max(anxiety_values)}"
-        else:
-            stats['avg_anxiety'] = None
-            stats['anxiety_range'] = None
-        
-        # Fatigue statistics
-        fatigue_values = [e.get('fatigue_level') for e in entries if e.get('fatigue_level') is not None]
-        if fatigue_values:
-            stats['avg_fatigue'] = sum(fatigue_values) / len(fatigue_values)
-            stats['fatigue_range'] = f"{min(fatigue_values)}-{max(fatigue_values)}"
-        else:
-            stats['avg_fatigue'] = None
-            stats['fatigue_range'] = None
-        
-        return stats
+    def _format_average(self, value) -> str:
+        """Format an average score, tolerating metrics with no recorded values"""
+        return f"{value:.1f}/10" if value is not None else "N/A"
     
-    def _get_date_range(self, entries: List[Dict[str, Any]]) -> str:
+    def _get_date_range(self, stats: _ReportStats) -> str:
         """Get the date range of entries"""
-        dates = [e.get('date') for e in entries if e.get('date')]
-        if not dates:
+        if not stats.first_date:
             return "No dates available"
         
-        dates.sort()
-        if len(dates) == 1:
-            return dates[0]
-        return f"{dates[0]} to {dates[-1]}"
+        if stats.first_date == stats.last_date:
+            return stats.first_date
+        return f"{stats.first_date} to {stats.last_date}"
     
-    def _analyze_sleep_patterns(self, entries: List[Dict[str, Any]]) -> str:
+    def _analyze_sleep_patterns(self, stats: _ReportStats) -> str:
         """Analyze sleep quality patterns"""
-        sleep_values = [e.get('sleep_quality') for e in entries if e.get('sleep_quality')]
-        if not sleep_values:
+        sleep_counts = stats.sleep_counts
+        if not sleep_counts:
             return "No sleep data recorded"
         
-        sleep_counts = {}
-        for sleep in sleep_values:
-            sleep_counts[sleep] = sleep_counts.get(sleep, 0) + 1
-        
+        total_sleep = sum(sleep_counts.values())
         most_common = max(sleep_counts, key=sleep_counts.get)
-        return f"Most common: {most_common.replace('_', ' ').title()} ({sleep_counts[most_common]}/{len(sleep_values)} entries)"
+        return f"Most common: {most_common.replace('_', ' ').title()} ({sleep_counts[most_common]}/{total_sleep} entries)"
     
-    def _identify_medical_patterns(self, entries: List[Dict[str, Any]]) -> List[str]:
+    def _identify_medical_patterns(self, stats: _ReportStats) -> List[str]:
         """Identify notable medical patterns"""
         patterns = []
+        total = stats.total
         
         # High pain frequency
-        high_pain_count = len([e for e in entries if e.get('pain_level', 0) >= 7])
-        if high_pain_count > len(entries) * 0.3:
-            patterns.append(f"Frequent high pain levels (7+/10) in {high_pain_count} of {len(entries)} entries")
+        if stats.high_pain_count > total * 0.3:
+            patterns.append(f"Frequent high pain levels (7+/10) in {stats.high_pain_count} of {total} entries")
         
         # Sleep issues
-        poor_sleep_count = len([e for e in entries if e.get('sleep_quality') in ['poor', 'very_poor']])
-        if poor_sleep_count > len(entries) * 0.4:
-            patterns.append(f"Persistent sleep difficulties in {poor_sleep_count} of {len(entries)} entries")
+        if stats.poor_sleep_count > total * 0.4:
+            patterns.append(f"Persistent sleep difficulties in {stats.poor_sleep_count} of {total} entries")
         
         # Low energy patterns
-        low_energy_count = len([e for e in entries if e.get('energy_level', 10) <= 3])
-        if low_energy_count > len(entries) * 0.3:
-            patterns.append(f"Frequently low energy levels (≤3/10) in {low_energy_count} of {len(entries)} entries")
+        if stats.low_energy_count > total * 0.3:
+            patterns.append(f"Frequently low energy levels (≤3/10) in {stats.low_energy_count} of {total} entries")
         
         # High anxiety
-        high_anxiety_count = len([e for e in entries if e.get('anxiety_level', 0) >= 7])
-        if high_anxiety_count > len(entries) * 0.3:
-            patterns.append(f"Elevated anxiety levels (7+/10) in {high_anxiety_count} of {len(entries)} entries")
+        if stats.high_anxiety_count > total * 0.3:
+            patterns.append(f"Elevated anxiety levels (7+/10) in {stats.high_anxiety_count} of {total} entries")
         
         if not patterns:
             patterns.append("No significant concerning patterns identified in current data range")
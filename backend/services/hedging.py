@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class HedgeCancelled(Exception):
+    """Raised inside an attempt that lost the race and was told to stop"""
+
+class Hedger:
+    """Hedged calls: when the first attempt runs slower than a latency percentile, race a second one.
+
+    Attempts are callables taking a threading.Event; the loser's event is set
+    and it is expected to stop and raise HedgeCancelled (e.g. by closing its
+    response stream). The hedge also gets a report_tokens callable, through
+    which it replaces its up-front reservation with the tokens it actually
+    used. Latency is tracked per key so prompts of different sizes get their
+    own threshold, and hedges draw on an hourly token budget.
+
+    Latency and the hedge timer start when the primary starts running, not
+    when it is submitted: waiting for a free worker under load says nothing
+    about the backend, and must not set off hedges that were never needed.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_samples: int = 20,
+        min_delay_seconds: float = 0.5,
+        token_budget_per_hour: int = 50000,
+        window_size: int = 200,
+        max_workers: int = 16
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay_seconds = min_delay_seconds
+        self.token_budget_per_hour = token_budget_per_hour
+        self.window_size = window_size
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._latencies: Dict[Hashable, deque] = {}
+        self._hedge_spend = deque()  # [monotonic time, reserved or reported tokens]
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.calls = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.skipped_over_budget = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.percentile > 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-hedge")
+            return self._executor
+
+    def hedge_delay(self, key: Hashable) -> Optional[float]:
+        """Seconds to wait before hedging a call for key, or None until enough latencies are known"""
+        with self._lock:
+            samples = self._latencies.get(key)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay_seconds, ordered[index])
+
+    def _record_latency(self, key: Hashable, seconds: float):
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None:
+                samples = self._latencies[key] = deque(maxlen=self.window_size)
+            samples.append(seconds)
+
+    def _reserve_tokens(self, tokens: int) -> Optional[list]:
+        """Claim hedge budget for one hedge, None if the last hour's hedges already used it up"""
+        now = time.monotonic()
+        with self._lock:
+            while self._hedge_spend and now - self._hedge_spend[0][0] > 3600:
+                self._hedge_spend.popleft()
+            spent = sum(reserved for _, reserved in self._hedge_spend)
+            if spent + tokens > self.token_budget_per_hour:
+                self.skipped_over_budget += 1
+                return None
+            reservation = [now, tokens]
+            self._hedge_spend.append(reservation)
+            self.hedges_fired += 1
+            return reservation
+
+    def _settle_tokens(self, reservation: list, tokens: int):
+        with self._lock:
+            reservation[1] = tokens
+
+    def call(
+        self,
+        key: Hashable,
+        primary: Callable[[threading.Event], Any],
+        hedge: Callable[[threading.Event, Callable[[int], None]], Any],
+        hedge_tokens: int
+    ) -> Any:
+        """Run primary, racing hedge against it if primary is slower than the key's latency percentile"""
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay(key)
+        if delay is None:
+            started = time.monotonic()
+            result = primary(threading.Event())
+            self._record_latency(key, time.monotonic() - started)
+            return result
+
+        executor = self._get_executor()
+        primary_cancel = threading.Event()
+        primary_running = threading.Event()
+        primary_started = [time.monotonic()]
+
+        def run_primary():
+            primary_started[0] = time.monotonic()
+            primary_running.set()
+            return primary(primary_cancel)
+
+        primary_future = executor.submit(run_primary)
+        while not primary_running.wait(timeout=0.1):
+            if primary_future.done():
+                break  # cancelled by shutdown before it ran
+        started = primary_started[0]
+        done, _ = wait([primary_future], timeout=max(0.0, delay - (time.monotonic() - started)))
+        reservation = None if done else self._reserve_tokens(hedge_tokens)
+        if reservation is None:
+            result = primary_future.result()
+            self._record_latency(key, time.monotonic() - started)
+            return result
+
+        hedge_cancel = threading.Event()
+        hedge_future = executor.submit(hedge, hedge_cancel, lambda tokens: self._settle_tokens(reservation, tokens))
+        attempts = {primary_future: primary_cancel, hedge_future: hedge_cancel}
+        pending = set(attempts)
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    first_error = first_error or future.exception()
+                    continue
+                for other in pending:
+                    attempts[other].set()
+                if future is hedge_future:
+                    with self._lock:
+                        self.hedges_won += 1
+                self._record_latency(key, time.monotonic() - started)
+                return future.result()
+        raise first_error
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counters, current thresholds and remaining budget"""
+        now = time.monotonic()
+        with self._lock:
+            spent = sum(reserved for at, reserved in self._hedge_spend if now - at <= 3600)
+            keys = list(self._latencies)
+            stats = {
+                "enabled": self.enabled,
+                "percentile": self.percentile,
+                "calls": self.calls,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "skipped_over_budget": self.skipped_over_budget,
+                "hedge_tokens_last_hour": spent,
+                "token_budget_per_hour": self.token_budget_per_hour,
+            }
+        delays = {str(key): self.hedge_delay(key) for key in keys}
+        stats["hedge_delay_ms"] = {key: round(delay * 1000) if delay else None for key, delay in delays.items()}
+        return stats
+
+    def shutdown(self):
+        """Stop the attempt threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
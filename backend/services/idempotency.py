@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.models import IdempotencyRecord
+
+# How long a stored response is replayed for a retried request
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "48"))
+# Expired records are deleted at most this often per process
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 3600
+MAX_IDEMPOTENCY_KEY_LENGTH = 200
+
+class IdempotencyKeyMismatch(Exception):
+    """Raised when a key is reused with a different request body"""
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request payload, used to spot a key reused for a different request"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class IdempotencyStore:
+    """Maps client idempotency keys to the response of the first successful request.
+
+    Records are added to the caller's session so they commit (or roll back)
+    together with the write they describe. The (scope, key) primary key makes
+    a concurrent retry fail its commit rather than write twice.
+    """
+
+    def __init__(self, ttl_hours: int = IDEMPOTENCY_TTL_HOURS):
+        self.ttl = timedelta(hours=ttl_hours)
+        self._last_purge = 0.0
+
+    def _cutoff(self) -> datetime:
+        return datetime.now() - self.ttl
+
+    def lookup(self, db: Session, scope: str, key: str, request_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Stored response for a key, or None if unseen or expired.
+
+        Raises IdempotencyKeyMismatch if the key was used for a different request.
+        """
+        record = db.query(IdempotencyRecord.request_hash, IdempotencyRecord.response).filter(
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.created_at >= self._cutoff()
+        ).first()
+        if record is None:
+            return None
+        if request_hash and record.request_hash and record.request_hash != request_hash:
+            raise IdempotencyKeyMismatch(key)
+        return json.loads(record.response)
+
+    def get_many(self, db: Session, scope: str, request_hashes: Dict[str, str]) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+        """Stored responses for several keys in one query, plus the keys used for a different request.
+
+        request_hashes maps each key to the fingerprint of the request now using it.
+        """
+        if not request_hashes:
+            return {}, set()
+        records = db.query(IdempotencyRecord.key, IdempotencyRecord.request_hash, IdempotencyRecord.response).filter(
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key.in_(list(request_hashes)),
+            IdempotencyRecord.created_at >= self._cutoff()
+        ).all()
+        responses = {}
+        mismatched = set()
+        for key, request_hash, response in records:
+            if request_hash and request_hash != request_hashes[key]:
+                mismatched.add(key)
+            else:
+                responses[key] = json.loads(response)
+        return responses, mismatched
+
+    def add(self, db: Session, scope: str, key: str, response: Dict[str, Any], request_hash: Optional[str] = None):
+        """Remember a response; committed by the caller along with the write"""
+        self.add_many(db, scope, {key: response}, {key: request_hash} if request_hash else None)
+
+    def add_many(
+        self,
+        db: Session,
+        scope: str,
+        responses: Dict[str, Dict[str, Any]],
+        request_hashes: Optional[Dict[str, str]] = None
+    ):
+        """Remember several responses, replacing expired records for the same keys"""
+        if not responses:
+            return
+        self._maybe_purge(db)
+        db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key.in_(list(responses)),
+            IdempotencyRecord.created_at < self._cutoff()
+        ).delete(synchronize_session=False)
+        now = datetime.now()
+        request_hashes = request_hashes or {}
+        db.add_all([
+            IdempotencyRecord(
+                scope=scope,
+                key=key,
+                request_hash=request_hashes.get(key),
+                response=json.dumps(response, separators=(",", ":")),
+                created_at=now
+            )
+            for key, response in responses.items()
+        ])
+
+    def _maybe_purge(self, db: Session):
+        """Delete expired records, at most once per purge interval"""
+        if time.monotonic() - self._last_purge < IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.created_at < self._cutoff()
+        ).delete(synchronize_session=False)
@@ -0,0 +1,31 @@
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+class LazyService(Generic[T]):
+    """Builds a service on first use and forwards attribute access to it.
+
+    Keeps a service's heavy imports and client setup out of module import,
+    so the API starts serving before rarely used backends are ready.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def instance(self) -> T:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names not found on the holder itself
+        return getattr(self.instance(), name)
@@ -0,0 +1,122 @@
+import os
+import zlib
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+class LeaderLock:
+    """Non-blocking lock that lets exactly one worker process act as leader.
+
+    On PostgreSQL it is a session advisory lock held on a dedicated
+    connection, so it is shared across hosts and released if the leader dies.
+    Elsewhere (SQLite, one host) it is an exclusive flock on lock_path, which
+    the OS releases when the process exits.
+    """
+
+    def __init__(self, name: str, engine: Engine, lock_path: str):
+        self.name = name
+        self.engine = engine
+        self.lock_path = lock_path
+        self._key = zlib.crc32(name.encode("utf-8"))  # advisory lock ids are integers
+        self._connection: Optional[Connection] = None
+        self._lock_file = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None or self._lock_file is not None
+
+    @property
+    def backend(self) -> str:
+        if self.engine.dialect.name == "postgresql":
+            return "pg_advisory_lock"
+        return "flock" if fcntl is not None else "none"
+
+    def try_acquire(self) -> bool:
+        """Take the lock if nobody holds it; True while this process is leader.
+
+        An advisory lock is checked on every call: if its connection dropped
+        (idle suspend, network blip) the server already released it and
+        another worker may lead, so leadership is given up and retaken only
+        if the lock is free.
+        """
+        if self._connection is not None and not self._advisory_lock_alive():
+            print(f"⚠️  Lost the '{self.name}' leader lock, giving up leadership")
+            self._discard_connection()
+        if self.held:
+            return True
+        if self.engine.dialect.name == "postgresql":
+            return self._try_advisory_lock()
+        return self._try_file_lock()
+
+    def _try_advisory_lock(self) -> bool:
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self._key}).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def _advisory_lock_alive(self) -> bool:
+        """Whether this connection still holds the advisory lock, according to pg_locks"""
+        try:
+            # A single bigint key below 2**32 is stored as classid 0, objid key, objsubid 1
+            alive = self._connection.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+                " AND classid = 0 AND CAST(objid AS bigint) = :key AND objsubid = 1 AND granted)"
+            ), {"key": self._key}).scalar()
+            self._connection.commit()
+            return bool(alive)
+        except Exception:
+            return False
+
+    def _discard_connection(self):
+        try:
+            self._connection.invalidate()
+        except Exception:
+            pass
+        self._connection = None
+
+    def _try_file_lock(self) -> bool:
+        if fcntl is None:
+            return True  # no flock available; assume a single local worker
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def release(self):
+        """Give up leadership"""
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._key})
+                self._connection.commit()
+            finally:
+                self._connection.close()
+                self._connection = None
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
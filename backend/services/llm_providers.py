@@ -0,0 +1,368 @@
+import hashlib
+import json
+import os
+import random
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import openai  # imported on first use: the SDK alone costs most of the API's cold start
+
+# Tasks OpenAIService can route independently
+LLM_TASKS = ("summary", "insights", "weekly_reflection", "predictive", "coping", "crisis", "coaching")
+
+# Share of calls sent to a random non-preferred backend so its latency stays current
+AI_ROUTE_EXPLORE_RATE = float(os.getenv("AI_ROUTE_EXPLORE_RATE", "0.05"))
+# Weight of the newest sample in each backend's moving average latency
+AI_ROUTE_LATENCY_ALPHA = float(os.getenv("AI_ROUTE_LATENCY_ALPHA", "0.2"))
+
+# Connection pool of each OpenAI-compatible backend, shared by every call to it
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "100"))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "20"))
+# Idle connections are kept open this long so bursts skip the TCP/TLS handshake
+AI_HTTP_KEEPALIVE_SECONDS = float(os.getenv("AI_HTTP_KEEPALIVE_SECONDS", "120"))
+# 1 multiplexes concurrent calls over HTTP/2 connections; needs the h2 package
+AI_HTTP2 = int(os.getenv("AI_HTTP2", "0"))
+# Per-call timeouts (overridable per provider with AI_PROVIDER_<NAME>_CONNECT_TIMEOUT / _READ_TIMEOUT)
+AI_CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "5"))
+AI_READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", "30"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+# Connections opened to each backend at startup; 0 disables warm-up
+AI_HTTP_WARM_CONNECTIONS = int(os.getenv("AI_HTTP_WARM_CONNECTIONS", "2"))
+
+class LLMProvider:
+    """A chat completion backend: an OpenAI-compatible client and the model used when a route names none"""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        client: Any,
+        model: str,
+        hedge_model: Optional[str] = None,
+        timeout: Optional["openai.Timeout"] = None,
+        http_client: Any = None
+    ):
+        self.name = name
+        self.kind = kind
+        self.client = client
+        self.model = model
+        # Model for hedge requests, e.g. a cheaper/faster one; defaults to the routed model
+        self.hedge_model = hedge_model
+        # Passed on every call; None leaves the client's default
+        self.timeout = timeout
+        # Pooled HTTP client behind `client`, None for in-process backends
+        self.http_client = http_client
+
+    def warm_up(self, connections: int = AI_HTTP_WARM_CONNECTIONS) -> int:
+        """Open pooled connections ahead of traffic with parallel GET /models, returns how many succeeded"""
+        if self.http_client is None or connections <= 0:
+            return 0
+        url = str(self.client.base_url).rstrip("/") + "/models"
+        headers = {"Authorization": f"Bearer {self.client.api_key}"}
+
+        def ping() -> bool:
+            try:
+                self.http_client.get(url, headers=headers, timeout=self.timeout)
+                return True  # any response, even 401, leaves a live connection in the pool
+            except Exception as e:
+                print(f"⚠️  Warm-up request to AI provider '{self.name}' failed: {type(e).__name__}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            return sum(pool.map(lambda _: ping(), range(connections)))
+
+    def transport_info(self) -> Dict[str, Any]:
+        """Timeout and pool settings for the debug endpoint"""
+        if self.http_client is None:
+            return {"pooled": False}
+        return {
+            "pooled": True,
+            "http2": bool(AI_HTTP2) and _h2_available(),
+            "max_connections": AI_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": AI_HTTP_MAX_KEEPALIVE,
+            "keepalive_seconds": AI_HTTP_KEEPALIVE_SECONDS,
+            "connect_timeout": self.timeout.connect if self.timeout else None,
+            "read_timeout": self.timeout.read if self.timeout else None,
+        }
+
+    def close(self):
+        if self.http_client is not None:
+            self.http_client.close()
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def openai_provider(
+    name: str,
+    api_key: str,
+    model: str = "gpt-3.5-turbo",
+    base_url: Optional[str] = None,
+    hedge_model: Optional[str] = None,
+    connect_timeout: float = AI_CONNECT_TIMEOUT,
+    read_timeout: float = AI_READ_TIMEOUT,
+    ca_bundle: Optional[str] = None
+) -> LLMProvider:
+    """OpenAI, or any server speaking its API (vLLM, llama.cpp, Ollama, LM Studio) when base_url is set.
+
+    The client gets its own tuned connection pool; ca_bundle trusts a private
+    CA, as self-hosted servers often use one.
+    """
+    import openai
+
+    http2 = bool(AI_HTTP2)
+    if http2 and not _h2_available():
+        print("⚠️  AI_HTTP2 is set but the h2 package is not installed; using HTTP/1.1.")
+        http2 = False
+
+    timeout = openai.Timeout(read_timeout, connect=connect_timeout)
+    # The SDK re-exports its httpx flavour's Limits only through this default
+    limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=AI_HTTP_KEEPALIVE_SECONDS
+    )
+    http_options = {"limits": limits, "timeout": timeout, "http2": http2}
+    if ca_bundle:
+        http_options["verify"] = ssl.create_default_context(cafile=ca_bundle)
+    http_client = openai.DefaultHttpxClient(**http_options)
+
+    client_options = {"api_key": api_key, "http_client": http_client, "timeout": timeout, "max_retries": AI_MAX_RETRIES}
+    if base_url:
+        client_options["base_url"] = base_url
+    kind = "openai_compatible" if base_url else "openai"
+    return LLMProvider(name, kind, openai.OpenAI(**client_options), model, hedge_model, timeout, http_client)
+
+class FakeChatClient:
+    """Deterministic stand-in for openai.OpenAI for load tests and offline development.
+
+    Replies are a function of the prompt alone: prompts asking for JSON get
+    the JSON template from the prompt back, others get a fixed sentence.
+    Latency is latency_ms, except that a seeded tail_rate share of requests
+    take tail_ms. Streaming is supported, including early close.
+    """
+
+    def __init__(self, latency_ms: float = 50, tail_ms: float = 0, tail_rate: float = 0.0, seed: int = 0, chunks: int = 10):
+        self.latency_ms = latency_ms
+        self.tail_ms = tail_ms
+        self.tail_rate = tail_rate
+        self.chunks = chunks
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.abandoned_streams = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @staticmethod
+    def reply(messages: List[Dict[str, str]]) -> str:
+        prompt = messages[-1]["content"]
+        _, marker, template = prompt.partition("JSON format:")
+        if marker and "{" in template:
+            try:
+                return json.dumps(json.loads(template[template.index("{"):template.rindex("}") + 1]))
+            except ValueError:
+                pass
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"Thank you for sharing how things have been. Every entry is a step in caring for yourself. [{digest}]"
+
+    def _create(self, messages: List[Dict[str, str]], stream: bool = False, stream_options: Optional[Dict[str, Any]] = None, **request):
+        with self._lock:
+            self.requests += 1
+            slow = self.tail_rate > 0 and self._random.random() < self.tail_rate
+        latency = (self.tail_ms if slow else self.latency_ms) / 1000
+        content = self.reply(messages)
+        if stream:
+            usage = None
+            if stream_options and stream_options.get("include_usage"):
+                prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+                usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(content) // 4)
+            return _FakeStream(self, content, latency, usage)
+        time.sleep(latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class _FakeStream:
+    def __init__(self, client: FakeChatClient, content: str, latency: float, usage: Any = None):
+        self.client = client
+        self.content = content
+        self.latency = latency
+        self.usage = usage
+        self.finished = False
+
+    def __iter__(self):
+        step = len(self.content) // self.client.chunks + 1
+        for start in range(0, len(self.content), step):
+            time.sleep(self.latency / self.client.chunks)
+            delta = SimpleNamespace(content=self.content[start:start + step])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        if self.usage is not None:
+            # Like OpenAI with include_usage: a last chunk with no choices
+            yield SimpleNamespace(choices=[], usage=self.usage)
+        self.finished = True
+
+    def close(self):
+        if not self.finished:
+            with self.client._lock:
+                self.client.abandoned_streams += 1
+
+def fake_provider(name: str = "fake", model: str = "fake-llm", **client_options) -> LLMProvider:
+    """Provider backed by FakeChatClient"""
+    return LLMProvider(name, "fake", FakeChatClient(**client_options), model)
+
+def configured_provider_names() -> List[str]:
+    """Backend names from AI_PROVIDERS (default "openai" when OPENAI_API_KEY is set), without building any"""
+    default_names = "openai" if os.getenv("OPENAI_API_KEY") else ""
+    return [name.strip() for name in os.getenv("AI_PROVIDERS", default_names).split(",") if name.strip()]
+
+def load_providers() -> List[LLMProvider]:
+    """Build providers from the environment.
+
+    AI_PROVIDERS lists backend names (default "openai" when OPENAI_API_KEY is
+    set). Each name is configured with AI_PROVIDER_<NAME>_TYPE (openai,
+    openai_compatible or fake; inferred from the name when unset), _BASE_URL,
+    _MODEL, _API_KEY, _HEDGE_MODEL, _CONNECT_TIMEOUT, _READ_TIMEOUT,
+    _CA_BUNDLE and, for fake backends, _LATENCY_MS.
+    """
+    providers = []
+    for name in configured_provider_names():
+        prefix = f"AI_PROVIDER_{name.upper()}_"
+        kind = os.getenv(prefix + "TYPE") or (name if name in ("openai", "fake") else "openai_compatible")
+        model = os.getenv(prefix + "MODEL")
+        hedge_model = os.getenv(prefix + "HEDGE_MODEL") or None
+        transport = {
+            "connect_timeout": float(os.getenv(prefix + "CONNECT_TIMEOUT", str(AI_CONNECT_TIMEOUT))),
+            "read_timeout": float(os.getenv(prefix + "READ_TIMEOUT", str(AI_READ_TIMEOUT))),
+            "ca_bundle": os.getenv(prefix + "CA_BUNDLE") or None,
+        }
+        if kind == "fake":
+            latency_ms = float(os.getenv(prefix + "LATENCY_MS", "50"))
+            providers.append(fake_provider(name, model or "fake-llm", latency_ms=latency_ms))
+        elif kind == "openai":
+            api_key = os.getenv(prefix + "API_KEY") or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                print(f"⚠️  No API key for AI provider '{name}', skipping it.")
+                continue
+            providers.append(openai_provider(name, api_key, model or "gpt-3.5-turbo", hedge_model=hedge_model, **transport))
+        elif kind == "openai_compatible":
+            base_url = os.getenv(prefix + "BASE_URL")
+            if not base_url:
+                print(f"⚠️  No {prefix}BASE_URL for AI provider '{name}', skipping it.")
+                continue
+            # Self-hosted servers usually ignore the key, but the client requires one
+            api_key = os.getenv(prefix + "API_KEY", "not-needed")
+            providers.append(openai_provider(name, api_key, model or "local-model", base_url, hedge_model, **transport))
+        else:
+            print(f"⚠️  Unknown type '{kind}' for AI provider '{name}', skipping it.")
+    return providers
+
+def load_routes() -> Dict[str, List[str]]:
+    """Route config per task from AI_ROUTE_<TASK> (or AI_ROUTE_DEFAULT): comma-separated provider[:model] targets"""
+    default = os.getenv("AI_ROUTE_DEFAULT", "")
+    routes = {}
+    for task in LLM_TASKS:
+        spec = os.getenv(f"AI_ROUTE_{task.upper()}", default)
+        targets = [target.strip() for target in spec.split(",") if target.strip()]
+        if targets:
+            routes[task] = targets
+    return routes
+
+class RouteTarget:
+    """One provider/model option for a task, with its moving average latency"""
+
+    def __init__(self, provider: LLMProvider, model: str):
+        self.provider = provider
+        self.model = model
+        self.latency_ewma: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider.name}:{self.model}"
+
+class LLMRouter:
+    """Orders each task's targets so the one with the best recent latency is tried first.
+
+    Targets without a latency sample yet are tried first, in configured order,
+    and a small share of calls explores a random alternative. The remaining
+    targets follow as failover candidates.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        routes: Optional[Dict[str, List[str]]] = None,
+        explore_rate: float = AI_ROUTE_EXPLORE_RATE,
+        alpha: float = AI_ROUTE_LATENCY_ALPHA,
+        failure_seconds: float = AI_READ_TIMEOUT
+    ):
+        self.explore_rate = explore_rate
+        self.alpha = alpha
+        self.failure_seconds = failure_seconds
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+        by_name = {provider.name: provider for provider in providers}
+        routes = routes or {}
+        self.routes: Dict[str, List[RouteTarget]] = {}
+        for task in LLM_TASKS:
+            targets = []
+            for spec in routes.get(task) or [provider.name for provider in providers]:
+                name, _, model = spec.partition(":")
+                if name not in by_name:
+                    print(f"⚠️  AI route for '{task}' names unknown provider '{name}', ignoring it.")
+                    continue
+                targets.append(RouteTarget(by_name[name], model or by_name[name].model))
+            self.routes[task] = targets
+
+    def candidates(self, task: str) -> List[RouteTarget]:
+        """Targets for a task, preferred first"""
+        targets = self.routes.get(task, [])
+        with self._lock:
+            unmeasured = [target for target in targets if target.latency_ewma is None]
+            measured = sorted(
+                (target for target in targets if target.latency_ewma is not None),
+                key=lambda target: target.latency_ewma
+            )
+            ordered = unmeasured + measured
+            if len(ordered) > 1 and self._random.random() < self.explore_rate:
+                ordered.insert(0, ordered.pop(self._random.randrange(1, len(ordered))))
+        return ordered
+
+    def record(self, target: RouteTarget, seconds: float, success: bool):
+        """Fold a call's latency into the target's average; a failure counts as at least a read timeout"""
+        with self._lock:
+            target.calls += 1
+            if not success:
+                target.failures += 1
+                # A backend refusing calls instantly must not look like the fastest one
+                seconds = max(seconds, self.failure_seconds)
+            if target.latency_ewma is None:
+                target.latency_ewma = seconds
+            else:
+                target.latency_ewma += self.alpha * (seconds - target.latency_ewma)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-task targets with their latency averages, preferred first"""
+        with self._lock:
+            return {
+                task: [
+                    {
+                        "target": target.label,
+                        "avg_latency_ms": round(target.latency_ewma * 1000) if target.latency_ewma is not None else None,
+                        "calls": target.calls,
+                        "failures": target.failures,
+                    }
+                    for target in sorted(
+                        targets, key=lambda target: (target.latency_ewma is not None, target.latency_ewma or 0)
+                    )
+                ]
+                for task, targets in self.routes.items()
+            }
@@ -0,0 +1,229 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request and DB latencies in seconds; LLM calls get a wider range
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set, rendered cumulatively like prometheus_client"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label set -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "chronicompanion_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_seconds = registry.histogram(
+    "chronicompanion_http_request_duration_seconds", "HTTP request latency until the response is complete", ("method", "route")
+)
+http_in_progress = registry.gauge(
+    "chronicompanion_http_requests_in_progress", "HTTP requests currently being handled", ("method",)
+)
+db_query_seconds = registry.histogram(
+    "chronicompanion_db_query_duration_seconds", "SQL statement execution time by statement type", ("operation",), DB_BUCKETS
+)
+db_errors = registry.counter(
+    "chronicompanion_db_query_errors_total", "SQL statements that raised", ("operation",)
+)
+llm_request_seconds = registry.histogram(
+    "chronicompanion_llm_request_duration_seconds", "Chat completion latency per backend call", ("provider", "model", "outcome"), LLM_BUCKETS
+)
+llm_tokens = registry.counter(
+    "chronicompanion_llm_tokens_total", "Tokens reported by the backend's usage field", ("provider", "model", "type")
+)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request counts and latency.
+
+    Routes are labelled by their template (/api/entries/{entry_id}) so the
+    series count stays bounded; requests that match no route share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_progress.dec(method)
+            label = _route_label(scope)
+            http_request_seconds.observe(time.perf_counter() - started, method, label)
+            http_requests.inc(method, label, str(status_code))
+
+def _route_label(scope) -> str:
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    # Routes of an included router may report their path without the router's
+    # prefix; prefixes are static, so take the missing leading segments from the URL
+    path = scope["path"]
+    missing = path.count("/") - template.count("/")
+    if missing > 0 and ":path}" not in template:
+        template = "/".join(path.split("/")[:missing + 1]) + template
+    return template
+
+# statement text -> first keyword; statements repeat, so this skips re-splitting long SQL
+_operations: Dict[str, str] = {}
+
+def _operation(statement: str) -> str:
+    operation = _operations.get(statement)
+    if operation is None:
+        words = statement.lstrip().split(None, 1)
+        operation = words[0].upper() if words else "OTHER"
+        if len(_operations) < 1000:
+            _operations[statement] = operation
+    return operation
+
+def instrument_engine(engine: Engine):
+    """Time every statement the engine runs"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db_query_seconds.observe(time.perf_counter() - context._metrics_started, _operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        db_errors.inc(_operation(exception_context.statement or ""))
+
+def record_llm_call(provider: str, model: str, seconds: float, outcome: str, usage: Optional[object] = None):
+    """Record one chat completion call and the tokens it reported"""
+    llm_request_seconds.observe(seconds, provider, model, outcome)
+    if usage is not None:
+        llm_tokens.inc(provider, model, "prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+        llm_tokens.inc(provider, model, "completion", amount=getattr(usage, "completion_tokens", 0) or 0)
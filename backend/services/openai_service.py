@@ -1,22 +1,192 @@
-import openai
+import hashlib
+import json
 import os
+import sys
+import time
+from types import SimpleNamespace
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 
+from backend.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from backend.services.hedging import HedgeCancelled, Hedger
+from backend.services.llm_providers import LLMProvider, LLMRouter, RouteTarget, load_providers, load_routes
+from backend.services.metrics import record_llm_call
+from backend.services.single_flight import SingleFlight
+from backend.services.tracing import SPAN_KIND_CLIENT, span, trace_print, traced
+
 load_dotenv()
 
+# Circuit breaker: open after AI_BREAKER_FAILURE_RATE of the last AI_BREAKER_WINDOW calls failed
+AI_BREAKER_WINDOW = int(os.getenv("AI_BREAKER_WINDOW", "20"))
+AI_BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", "5"))
+AI_BREAKER_FAILURE_RATE = float(os.getenv("AI_BREAKER_FAILURE_RATE", "0.5"))
+# How long AI calls fail fast before a probe request is let through
+AI_BREAKER_OPEN_SECONDS = float(os.getenv("AI_BREAKER_OPEN_SECONDS", "30"))
+
+# Hedging: race a second request once a call runs past this percentile of recent latencies; 0 disables
+AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", "0"))
+AI_HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+AI_HEDGE_MIN_DELAY_MS = int(os.getenv("AI_HEDGE_MIN_DELAY_MS", "500"))
+# Upper bound on tokens spent on hedges per hour; a hedge reserves prompt estimate + max_tokens, then reports its usage
+AI_HEDGE_TOKEN_BUDGET_PER_HOUR = int(os.getenv("AI_HEDGE_TOKEN_BUDGET_PER_HOUR", "50000"))
+# Backends known to accept stream_options and send a final usage chunk; others get estimates
+STREAM_USAGE_KINDS = ("openai", "fake")
+
+# Canned coaching returned when the model's reply is not valid JSON
+WEEKLY_COACHING_FALLBACK = {"weekly_summary": "You've shown incredible strength this week.", "achievements": ["Continued tracking your health"], "motivational_message": "Keep being gentle with yourself."}
+
+def _is_provider_failure(error: BaseException) -> bool:
+    """Outages, timeouts and throttling trip the breaker; rejected requests do not"""
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return False  # no OpenAI client built yet, so this cannot be one of its errors
+    return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
 class OpenAIService:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.client = openai.OpenAI(api_key=api_key)
-            self.model = "gpt-3.5-turbo"
+    def __init__(self, providers: Optional[List[LLMProvider]] = None, routes: Optional[Dict[str, List[str]]] = None):
+        # Backends come from AI_PROVIDERS / AI_ROUTE_* unless given explicitly (load tests pass fake ones)
+        self.providers = load_providers() if providers is None else providers
+        self.router = LLMRouter(self.providers, load_routes() if routes is None else routes)
+        if self.providers:
+            self.client = self.providers[0].client
+            self.model = self.providers[0].model
             self.enabled = True
         else:
             self.client = None
             self.model = None
             self.enabled = False
             print("⚠️  OpenAI API key not found. AI features will be disabled.")
+        # Identical prompts in flight at the same time share one completion
+        self.single_flight = SingleFlight()
+        # One breaker per backend: while one is open its calls fail over to the next target,
+        # and once all are open callers fall back to their default payloads immediately
+        self.circuit_breakers = {
+            provider.name: CircuitBreaker(
+                window_size=AI_BREAKER_WINDOW,
+                min_calls=AI_BREAKER_MIN_CALLS,
+                failure_rate=AI_BREAKER_FAILURE_RATE,
+                open_seconds=AI_BREAKER_OPEN_SECONDS,
+                is_failure=_is_provider_failure
+            )
+            for provider in self.providers
+        }
+        self.hedger = Hedger(
+            percentile=AI_HEDGE_PERCENTILE,
+            min_samples=AI_HEDGE_MIN_SAMPLES,
+            min_delay_seconds=AI_HEDGE_MIN_DELAY_MS / 1000,
+            token_budget_per_hour=AI_HEDGE_TOKEN_BUDGET_PER_HOUR
+        )
+    
+    def _complete(self, task: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        """Run a chat completion for a task and return its text, coalescing identical concurrent requests"""
+        request = {
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        fingerprint = hashlib.sha256(json.dumps([task, request], sort_keys=True).encode("utf-8")).hexdigest()
+        return self.single_flight.do(fingerprint, lambda: self._route(task, request))
+    
+    def _route(self, task: str, request: Dict[str, Any]) -> str:
+        """Try the task's targets in the router's order, failing over while a backend is down"""
+        last_error = None
+        for target in self.router.candidates(task):
+            breaker = self.circuit_breakers[target.provider.name]
+            started = time.monotonic()
+            try:
+                with span("llm.call", SPAN_KIND_CLIENT, **{
+                    "gen_ai.operation.name": task,
+                    "gen_ai.system": target.provider.kind,
+                    "gen_ai.request.model": target.model,
+                    "llm.provider": target.provider.name
+                }):
+                    content = breaker.call(lambda: self._create_completion(target, request))
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            except Exception as e:
+                self.router.record(target, time.monotonic() - started, success=False)
+                if not _is_provider_failure(e):
+                    raise  # the request itself was rejected; another backend won't help
+                last_error = e
+                continue
+            self.router.record(target, time.monotonic() - started, success=True)
+            return content
+        raise last_error or RuntimeError(f"No AI provider configured for {task}")
+    
+    def _create_completion(self, target: RouteTarget, request: Dict[str, Any]) -> str:
+        provider = target.provider
+        request = dict(request, model=target.model)
+        if provider.timeout is not None:
+            request["timeout"] = provider.timeout
+        if not self.hedger.enabled:
+            started = time.perf_counter()
+            try:
+                response = provider.client.chat.completions.create(**request)
+            except Exception:
+                record_llm_call(provider.name, target.model, time.perf_counter() - started, "error")
+                raise
+            record_llm_call(provider.name, target.model, time.perf_counter() - started, "ok", getattr(response, "usage", None))
+            return response.choices[0].message.content.strip()
+        
+        hedge_request = dict(request, model=provider.hedge_model or target.model)
+        prompt_chars = sum(len(message["content"]) for message in request["messages"])
+        return self.hedger.call(
+            # prompts with the same output budget share a latency profile
+            f"{target.label}:{request['max_tokens']}",
+            lambda cancelled: self._stream_completion(provider, request, cancelled),
+            lambda cancelled, report_tokens: self._stream_completion(provider, hedge_request, cancelled, report_tokens),
+            hedge_tokens=prompt_chars // 4 + request["max_tokens"]
+        )
+    
+    def _stream_completion(self, provider: LLMProvider, request: Dict[str, Any], cancelled, report_tokens=None) -> str:
+        """Streamed completion that can be abandoned mid-way by setting cancelled.
+
+        Token usage comes from the stream's final usage chunk where the backend
+        sends one; otherwise (and for streams cut short) it is estimated from
+        the text sent and received. report_tokens, if given, gets the total.
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        parts = []
+        usage = None
+        if provider.kind in STREAM_USAGE_KINDS:
+            request = dict(request, stream_options={"include_usage": True})
+        try:
+            stream = provider.client.chat.completions.create(**request, stream=True)
+            try:
+                for chunk in stream:
+                    if cancelled.is_set():
+                        outcome = "cancelled"
+                        raise HedgeCancelled()  # closing the stream stops generation upstream
+                    if getattr(chunk, "usage", None) is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+            finally:
+                stream.close()
+            outcome = "ok"
+            return "".join(parts).strip()
+        finally:
+            if usage is None:
+                prompt_chars = sum(len(message["content"]) for message in request["messages"])
+                usage = SimpleNamespace(prompt_tokens=prompt_chars // 4, completion_tokens=sum(map(len, parts)) // 4)
+            record_llm_call(provider.name, request["model"], time.perf_counter() - started, outcome, usage)
+            if report_tokens is not None:
+                report_tokens((usage.prompt_tokens or 0) + (usage.completion_tokens or 0))
+    
+    def warm_up(self):
+        """Open pooled connections to every HTTP backend so early requests skip the handshake"""
+        for provider in self.providers:
+            opened = provider.warm_up()
+            if opened:
+                print(f"🔥 Warmed {opened} connection(s) to AI provider '{provider.name}'")
+    
+    def close(self):
+        """Stop hedge threads and close backend connection pools"""
+        self.hedger.shutdown()
+        for provider in self.providers:
+            provider.close()
     
     def generate_entry_summary(self, entry_data: Dict[str, Any]) -> Optional[str]:
         """Generate a gentle summary of a journal entry"""
@@ -42,8 +212,8 @@ class OpenAIService:
             Please provide a brief, caring summary (2-3 sentences):
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "summary",
                 messages=[
                     {"role": "system", "content": "You are a gentle, supportive AI companion for people with chronic illness and mental health challenges. Always be kind, non-judgmental, and encouraging."},
                     {"role": "user", "content": prompt}
@@ -52,10 +222,10 @@ class OpenAIService:
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return content
             
         except Exception as e:
-            print(f"Error generating summary: {e}")
+            trace_print(f"Error generating summary: {e}")
             return None
     
     def generate_insights_and_encouragement(self, entry_data: Dict[str, Any]) -> Optional[str]:
@@ -80,8 +250,8 @@ class OpenAIService:
             Please provide supportive insights (3-4 sentences):
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "insights",
                 messages=[
                     {"role": "system", "content": "You are a supportive mental health companion. Provide gentle, non-clinical insights and encouragement. Never diagnose or give medical advice."},
                     {"role": "user", "content": prompt}
@@ -90,10 +260,10 @@ class OpenAIService:
                 temperature=0.8
             )
             
-            return response.choices[0].message.content.strip()
+            return content
             
         except Exception as e:
-            print(f"Error generating insights: {e}")
+            trace_print(f"Error generating insights: {e}")
             return None
     
     def generate_weekly_reflection(self, entries_data: list) -> Optional[str]:
@@ -122,8 +292,8 @@ class OpenAIService:
             Please provide a caring weekly reflection (4-5 sentences):
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "weekly_reflection",
                 messages=[
                     {"role": "system", "content": "You are a compassionate weekly reflection companion. Highlight progress, resilience, and provide gentle encouragement."},
                     {"role": "user", "content": prompt}
@@ -132,12 +302,56 @@ class OpenAIService:
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return content
             
         except Exception as e:
-            print(f"Error generating weekly reflection: {e}")
+            trace_print(f"Error generating weekly reflection: {e}")
             return None
     
+    def local_entry_summary(self, entry_data: Dict[str, Any]) -> str:
+        """Instant template summary of an entry, shown until the AI summary is ready"""
+        entry_type = entry_data.get('entry_type', 'unknown')
+        parts = []
+        if entry_type == 'morning':
+            parts.append("Thank you for checking in this morning.")
+            highlight = entry_data.get('morning_feeling') or entry_data.get('morning_hopes')
+        elif entry_type == 'evening':
+            parts.append("Thank you for taking a moment to reflect on your day.")
+            highlight = entry_data.get('evening_gratitude') or entry_data.get('evening_day_review')
+        else:
+            parts.append("Thank you for checking in.")
+            highlight = entry_data.get('additional_notes')
+        
+        ratings = []
+        for field, label in (('mood_overall', 'mood'), ('energy_level', 'energy'), ('pain_level', 'pain')):
+            if entry_data.get(field):
+                ratings.append(f"{label} {entry_data[field]}/10")
+        if ratings:
+            parts.append(f"You rated your {', '.join(ratings)}.")
+        
+        if highlight:
+            excerpt = highlight if len(highlight) <= 120 else highlight[:117].rstrip() + "..."
+            parts.append(f"You shared: \"{excerpt}\"")
+        
+        return " ".join(parts)
+    
+    def local_insights(self, entry_data: Dict[str, Any]) -> str:
+        """Instant template encouragement based on an entry's ratings, shown until AI insights are ready"""
+        notes = []
+        if (entry_data.get('pain_level') or 0) >= 7:
+            notes.append("Your pain was high, so gentle pacing and extra rest are well earned.")
+        if (entry_data.get('fatigue_level') or 0) >= 7 or (entry_data.get('energy_level') or 10) <= 3:
+            notes.append("Your energy was low; it's okay to save your spoons for what matters most.")
+        if (entry_data.get('anxiety_level') or 0) >= 7:
+            notes.append("Anxiety was running high; a few slow breaths or a grounding exercise may help.")
+        if (entry_data.get('mood_overall') or 0) >= 7:
+            notes.append("It's lovely to see a brighter mood; notice what helped today.")
+        if not notes:
+            notes.append("Keeping track of how you feel is a meaningful act of self-care.")
+        notes.append("Be gentle with yourself.")
+        return " ".join(notes)
+    
+    @traced("ai.build_context")
     def _build_entry_context(self, entry_data: Dict[str, Any]) -> str:
         """Build context string from entry data"""
         context_parts = []
@@ -186,6 +400,7 @@ class OpenAIService:
         
         return "\n".join(context_parts)
     
+    @traced("ai.build_context")
     def _build_weekly_context(self, entries_data: list) -> str:
         """Build weekly context from multiple entries"""
         context_parts = []
@@ -225,10 +440,10 @@ class OpenAIService:
     def generate_predictive_insights(self, entries_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Generate predictive insights based on patterns"""
         if not self.enabled:
-            print("🚫 DEBUG: OpenAI service disabled - no API key")
+            trace_print("🚫 DEBUG: OpenAI service disabled - no API key")
             return None
             
-        print(f"🤖 DEBUG: Generating predictive insights for {len(entries_data)} entries")
+        trace_print(f"🤖 DEBUG: Generating predictive insights for {len(entries_data)} entries")
         try:
             # Analyze recent patterns
             recent_entries = entries_data[-7:] if len(entries_data) >= 7 else entries_data
@@ -251,20 +466,20 @@ Based on these patterns, provide insights in JSON format:
 
 Be gentle, trauma-informed, and focus on empowerment rather than alarm."""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "predictive",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=400,
                 temperature=0.6
             )
             
-            import json
             try:
-                return json.loads(response.choices[0].message.content.strip())
+                with span("ai.parse_json"):
+                    return json.loads(content)
             except json.JSONDecodeError:
                 # Fallback if JSON parsing fails
                 return {
-                    "prediction": response.choices[0].message.content.strip(),
+                    "prediction": content,
                     "confidence": "medium",
                     "suggestions": [],
                     "warning_signs": [],
@@ -272,19 +487,19 @@ Be gentle, trauma-informed, and focus on empowerment rather than alarm."""
                 }
             
         except Exception as e:
-            print(f"🚨 ERROR generating predictive insights: {type(e).__name__}: {e}")
-            print(f"🚨 Full error details: {str(e)}")
+            trace_print(f"🚨 ERROR generating predictive insights: {type(e).__name__}: {e}")
+            trace_print(f"🚨 Full error details: {str(e)}")
             import traceback
-            print(f"🚨 Traceback: {traceback.format_exc()}")
+            trace_print(f"🚨 Traceback: {traceback.format_exc()}")
             return None
 
     def generate_coping_strategies(self, current_symptoms: Dict[str, Any], entries_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Generate personalized coping strategy suggestions"""
         if not self.enabled:
-            print("🚫 DEBUG: OpenAI service disabled for coping strategies")
+            trace_print("🚫 DEBUG: OpenAI service disabled for coping strategies")
             return None
             
-        print(f"🤖 DEBUG: Generating coping strategies for symptoms: {current_symptoms}")
+        trace_print(f"🤖 DEBUG: Generating coping strategies for symptoms: {current_symptoms}")
         try:
             # Build context about current state
             current_context = f"""
@@ -312,30 +527,30 @@ Provide coping strategies in JSON format:
 
 Focus on evidence-based, gentle, and accessible strategies. Consider spoon theory and chronic illness limitations."""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "coping",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
                 temperature=0.7
             )
             
-            import json  
             try:
-                return json.loads(response.choices[0].message.content.strip())
+                with span("ai.parse_json"):
+                    return json.loads(content)
             except json.JSONDecodeError:
                 return {"immediate_strategies": ["Take gentle, deep breaths", "Rest in a comfortable position", "Reach out to a trusted friend"]}
                 
         except Exception as e:
-            print(f"🚨 ERROR generating coping strategies: {type(e).__name__}: {e}")
-            print(f"🚨 Full error details: {str(e)}")
+            trace_print(f"🚨 ERROR generating coping strategies: {type(e).__name__}: {e}")
+            trace_print(f"🚨 Full error details: {str(e)}")
             import traceback
-            print(f"🚨 Traceback: {traceback.format_exc()}")
+            trace_print(f"🚨 Traceback: {traceback.format_exc()}")
             return None
 
     def detect_crisis_patterns(self, entries_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Detect concerning patterns and provide gentle support"""
         if not self.enabled:
-            print("🚫 DEBUG: OpenAI service disabled for crisis patterns")
+            trace_print("🚫 DEBUG: OpenAI service disabled for crisis patterns")
             return None
             
         try:
@@ -366,21 +581,21 @@ Respond in JSON format:
 
 Be gentle, never alarmist. Focus on support and empowerment."""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "crisis",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=400,
                 temperature=0.5
             )
             
-            import json
             try:
-                return json.loads(response.choices[0].message.content.strip())
+                with span("ai.parse_json"):
+                    return json.loads(content)
             except json.JSONDecodeError:
                 return {"risk_level": "none", "concerning_patterns": [], "supportive_message": "You're doing great by tracking your health."}
                 
         except Exception as e:
-            print(f"Error in crisis detection: {e}")
+            trace_print(f"Error in crisis detection: {e}")
             return None
 
     def generate_weekly_coaching(self, entries_data: List[Dict[str, Any]], goals: List[str] = None) -> Optional[Dict[str, Any]]:
@@ -410,23 +625,24 @@ Provide coaching in JSON format:
 
 Use chronic illness-informed language. Celebrate small wins. Be realistic about limitations."""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._complete(
+                "coaching",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
                 temperature=0.7
             )
             
-            import json
             try:
-                return json.loads(response.choices[0].message.content.strip())
+                with span("ai.parse_json"):
+                    return json.loads(content)
             except json.JSONDecodeError:
-                return {"weekly_summary": "You've shown incredible strength this week.", "achievements": ["Continued tracking your health"], "motivational_message": "Keep being gentle with yourself."}
+                return dict(WEEKLY_COACHING_FALLBACK)
                 
         except Exception as e:
-            print(f"Error generating weekly coaching: {e}")
+            trace_print(f"Error generating weekly coaching: {e}")
             return None
 
+    @traced("ai.build_context")
     def _build_pattern_context(self, entries_data: List[Dict[str, Any]]) -> str:
         """Build context for pattern analysis"""
         if not entries_data:
@@ -454,6 +670,7 @@ Use chronic illness-informed language. Celebrate small wins. Be realistic about
         
         return "\n".join(context_parts)
 
+    @traced("ai.build_context")
     def _build_crisis_context(self, entries_data: List[Dict[str, Any]]) -> str:
         """Build context for crisis pattern detection"""
         if not entries_data:
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models import EntryChange, PrecomputedArtifact
+from backend.services.leader_lock import LeaderLock
+
+# Local hour at which the nightly run may start; -1 disables precomputing
+PRECOMPUTE_HOUR = int(os.getenv("PRECOMPUTE_HOUR", "3"))
+# Runs only start within this many hours after PRECOMPUTE_HOUR
+PRECOMPUTE_WINDOW_HOURS = int(os.getenv("PRECOMPUTE_WINDOW_HOURS", "3"))
+# AI artifacts are served for this long even if entries changed since
+PRECOMPUTE_MAX_AGE_HOURS = int(os.getenv("PRECOMPUTE_MAX_AGE_HOURS", "26"))
+# How often workers check whether a run is due (and non-leaders retry the lock)
+PRECOMPUTE_CHECK_SECONDS = int(os.getenv("PRECOMPUTE_CHECK_SECONDS", "300"))
+# Pause between artifacts, and longest wait for live AI calls to drain, so live traffic keeps priority
+PRECOMPUTE_SPACING_SECONDS = float(os.getenv("PRECOMPUTE_SPACING_SECONDS", "2"))
+PRECOMPUTE_MAX_YIELD_SECONDS = float(os.getenv("PRECOMPUTE_MAX_YIELD_SECONDS", "60"))
+PRECOMPUTE_LOCK_PATH = os.getenv("PRECOMPUTE_LOCK_PATH", os.path.join("data", "precompute.lock"))
+
+# Builds an endpoint payload from a session, or None when there is nothing worth storing
+Builder = Callable[[Session], Awaitable[Optional[Dict[str, Any]]]]
+
+class _Registration:
+    def __init__(self, kind: str, key: str, builder: Builder, serve_stale: bool):
+        self.kind = kind
+        self.key = key
+        self.builder = builder
+        self.serve_stale = serve_stale
+
+class PrecomputeScheduler:
+    """Computes expensive endpoint payloads off-peak and serves them instantly.
+
+    Every worker runs the loop, but only the one holding the leader lock
+    computes; the others keep retrying the lock so a new leader takes over if
+    the old one exits. Artifacts are computed one at a time, yielding to live
+    AI calls, during the nightly window. serve_stale artifacts (AI output)
+    are served up to PRECOMPUTE_MAX_AGE_HOURS old; the others only while no
+    entry has changed since they were computed.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        engine: Engine,
+        is_busy: Callable[[], bool] = lambda: False,
+        hour: int = PRECOMPUTE_HOUR,
+        window_hours: int = PRECOMPUTE_WINDOW_HOURS,
+        lock_path: str = PRECOMPUTE_LOCK_PATH
+    ):
+        self.session_factory = session_factory
+        self.is_busy = is_busy
+        self.hour = hour
+        self.window_hours = window_hours
+        self.max_age = timedelta(hours=PRECOMPUTE_MAX_AGE_HOURS)
+        self.lock = LeaderLock("chronicompanion.precompute", engine, lock_path)
+        self._registrations: Dict[Tuple[str, str], _Registration] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_seconds: Optional[float] = None
+        self.failures = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.hour >= 0
+
+    def register(self, kind: str, key: str, builder: Builder, serve_stale: bool = True):
+        """Precompute builder's payload nightly and serve it for (kind, key)"""
+        self._registrations[(kind, key)] = _Registration(kind, key, builder, serve_stale)
+
+    def lookup(self, db: Session, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """Stored payload for (kind, key) if it may still be served, tagged with precomputed_at"""
+        registration = self._registrations.get((kind, key))
+        if registration is None or not self.enabled:
+            return None
+        artifact = db.query(PrecomputedArtifact).filter(
+            PrecomputedArtifact.kind == kind, PrecomputedArtifact.key == key
+        ).first()
+        if artifact is None or datetime.now() - artifact.computed_at > self.max_age:
+            self.misses += 1
+            return None
+        if not registration.serve_stale and artifact.change_cursor != _change_cursor(db):
+            self.misses += 1
+            return None
+        self.hits += 1
+        payload = json.loads(artifact.payload)
+        payload["precomputed_at"] = artifact.computed_at.isoformat()
+        return payload
+
+    async def start(self):
+        """Start the scheduling loop"""
+        if self.enabled and self._registrations:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the loop and give up leadership"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.lock.release)
+
+    async def _loop(self):
+        while True:
+            try:
+                if await asyncio.to_thread(self.lock.try_acquire):
+                    due = await asyncio.to_thread(self._due_registrations)
+                    if due:
+                        await self.run(due, require_leader=True)
+            except Exception as e:
+                print(f"🚨 ERROR in precompute scheduler: {type(e).__name__}: {e}")
+            await asyncio.sleep(PRECOMPUTE_CHECK_SECONDS)
+
+    def _window_start(self, now: datetime) -> Optional[datetime]:
+        """Start of the nightly window we are currently in, or None outside it"""
+        start = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if start > now:
+            start -= timedelta(days=1)
+        return start if now < start + timedelta(hours=self.window_hours) else None
+
+    def _due_registrations(self) -> List[_Registration]:
+        window_start = self._window_start(datetime.now())
+        if window_start is None:
+            return []
+        db = self.session_factory()
+        try:
+            computed = dict(
+                ((kind, key), computed_at)
+                for kind, key, computed_at in db.query(
+                    PrecomputedArtifact.kind, PrecomputedArtifact.key, PrecomputedArtifact.computed_at
+                )
+            )
+        finally:
+            db.close()
+        return [
+            registration for ident, registration in self._registrations.items()
+            if ident not in computed or computed[ident] < window_start
+        ]
+
+    async def run(self, registrations: Optional[List[_Registration]] = None, require_leader: bool = False):
+        """Compute and store artifacts one at a time, yielding to live AI traffic between them.
+
+        With require_leader the leader lock is rechecked before each artifact,
+        and the run stops as soon as this process is no longer leader.
+        """
+        registrations = list(self._registrations.values()) if registrations is None else registrations
+        started = time.monotonic()
+        for index, registration in enumerate(registrations):
+            if index:
+                await asyncio.sleep(PRECOMPUTE_SPACING_SECONDS)
+            yield_deadline = time.monotonic() + PRECOMPUTE_MAX_YIELD_SECONDS
+            while self.is_busy() and time.monotonic() < yield_deadline:
+                await asyncio.sleep(1)
+            if require_leader and not await asyncio.to_thread(self.lock.try_acquire):
+                print(f"⚠️  No longer precompute leader, stopping after {index} artifact(s)")
+                return
+            try:
+                await self._compute(registration)
+            except Exception as e:
+                self.failures += 1
+                print(f"🚨 ERROR precomputing {registration.kind} ({registration.key}): {type(e).__name__}: {e}")
+
+        self.runs += 1
+        self.last_run_at = datetime.now()
+        self.last_run_seconds = round(time.monotonic() - started, 2)
+        print(f"✅ Precomputed {len(registrations)} artifact(s) in {self.last_run_seconds}s")
+
+    async def _compute(self, registration: _Registration):
+        db = self.session_factory()
+        try:
+            cursor = _change_cursor(db)  # taken first so changes made while building count as newer
+            payload = await registration.builder(db)
+            if payload is None:
+                db.query(PrecomputedArtifact).filter(
+                    PrecomputedArtifact.kind == registration.kind, PrecomputedArtifact.key == registration.key
+                ).delete(synchronize_session=False)
+            else:
+                db.merge(PrecomputedArtifact(
+                    kind=registration.kind,
+                    key=registration.key,
+                    payload=json.dumps(payload, default=str),
+                    change_cursor=cursor,
+                    computed_at=datetime.now()
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Schedule, leadership and serving counters for this process"""
+        return {
+            "enabled": self.enabled,
+            "hour": self.hour,
+            "window_hours": self.window_hours,
+            "leader": self.lock.held,
+            "lock": self.lock.backend,
+            "artifacts": [f"{kind}:{key}" for kind, key in self._registrations],
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_seconds": self.last_run_seconds,
+            "failures": self.failures,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def _change_cursor(db: Session) -> int:
+    return db.query(func.max(EntryChange.id)).scalar() or 0
@@ -0,0 +1,236 @@
+import contextvars
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# Admin token for on-demand profiling; empty disables the feature entirely
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "5"))
+PROFILE_TOP_ALLOCATIONS = int(os.getenv("PROFILE_TOP_ALLOCATIONS", "25"))
+# Longest the global toggle may stay on, whatever the caller asks for
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "600"))
+# Path prefixes profiled while the global toggle is on
+PROFILE_PATHS = [path.strip() for path in os.getenv("PROFILE_PATHS", "/api/export,/api/analytics").split(",") if path.strip()]
+
+# File prefix of the profile being taken for the current request, if any
+_current_prefix: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("profile_prefix", default=None)
+
+def current_profile_prefix() -> Optional[str]:
+    """Where work done elsewhere for this request (e.g. a render process) should write its profile"""
+    return _current_prefix.get()
+
+class StackSampler:
+    """Samples thread stacks on an interval and aggregates them as folded stacks.
+
+    The output is the collapsed-stack format read by flamegraph.pl and
+    speedscope. Only thread_id is sampled when given, otherwise every thread
+    except the sampler's own.
+    """
+
+    def __init__(self, interval_seconds: float = PROFILE_SAMPLE_MS / 1000, thread_id: Optional[int] = None):
+        self.interval_seconds = interval_seconds
+        self.thread_id = thread_id
+        self.samples = 0
+        self.stacks: Dict[str, int] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, int]:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stopped.wait(self.interval_seconds):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                folded = ";".join(reversed(stack))
+                self.stacks[folded] = self.stacks.get(folded, 0) + 1
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as output:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True):
+                output.write(f"{stack} {count}\n")
+
+class ProfileSession:
+    """CPU samples and allocation growth between start() and finish()"""
+
+    def __init__(self, thread_id: Optional[int] = None):
+        self.sampler = StackSampler(thread_id=thread_id)
+        self._started_tracing = False
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+
+    def start(self) -> "ProfileSession":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def finish(self, prefix: str, title: str) -> Dict[str, Any]:
+        """Stop profiling and write <prefix>.cpu.folded and <prefix>.alloc.txt"""
+        self.sampler.stop()
+        seconds = time.perf_counter() - self._started
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.sampler.write(prefix + ".cpu.folded")
+        # leave out the profiler's own bookkeeping
+        own = (tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__))
+        growth = snapshot.filter_traces(own).compare_to(self._baseline.filter_traces(own), "lineno")[:PROFILE_TOP_ALLOCATIONS]
+        with open(prefix + ".alloc.txt", "w", encoding="utf-8") as output:
+            output.write(f"{title}\n")
+            output.write(f"wall {seconds * 1000:.1f} ms, {self.sampler.samples} CPU samples, "
+                         f"traced peak {peak / 1024:.1f} KiB, still allocated {current / 1024:.1f} KiB\n\n")
+            output.write(f"Top {len(growth)} allocation sites by growth during the request:\n")
+            for stat in growth:
+                output.write(f"{stat}\n")
+        return {"seconds": round(seconds, 3), "samples": self.sampler.samples, "peak_kib": round(peak / 1024, 1)}
+
+def profile_call(prefix: str, title: str, fn: Callable, *args):
+    """Run fn(*args) under a profile of the calling thread, written to prefix"""
+    session = ProfileSession(thread_id=threading.get_ident()).start()
+    try:
+        return fn(*args)
+    finally:
+        session.finish(prefix, title)
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the time-boxed global toggle.
+
+    Profiling is admin-only: a request is profiled when it carries
+    X-Profile: 1 with the admin token, or when the global toggle is on and its
+    path is under PROFILE_PATHS. tracemalloc and the sampler are process-wide,
+    so one request is profiled at a time.
+    """
+
+    def __init__(self, admin_token: str = PROFILE_ADMIN_TOKEN, profile_dir: str = PROFILE_DIR):
+        self.admin_token = admin_token
+        self.profile_dir = profile_dir
+        self.toggle_until = 0.0
+        self.profiles_written = 0
+        self.skipped_busy = 0
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        return self.enabled and token is not None and hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8"))
+
+    def enable_for(self, seconds: int) -> int:
+        """Turn the global toggle on; returns the seconds granted"""
+        seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+        self.toggle_until = time.monotonic() + seconds
+        return seconds
+
+    def disable(self):
+        self.toggle_until = 0.0
+
+    def toggle_remaining(self) -> float:
+        return max(0.0, self.toggle_until - time.monotonic())
+
+    def wants(self, path: str, headers: Dict[bytes, bytes]) -> bool:
+        if not self.enabled:
+            return False
+        if headers.get(b"x-profile") == b"1" and self.is_admin(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            return True
+        return self.toggle_remaining() > 0 and any(path.startswith(prefix) for prefix in PROFILE_PATHS)
+
+    def try_begin(self) -> bool:
+        """Claim the profiler for one request; False while another is being profiled"""
+        if self._busy.acquire(blocking=False):
+            return True
+        self.skipped_busy += 1
+        return False
+
+    def end(self):
+        self.profiles_written += 1
+        self._busy.release()
+
+    def new_prefix(self, method: str, path: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.profile_dir, f"{stamp}_{method}_{slug}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "toggle_seconds_remaining": round(self.toggle_remaining(), 1),
+            "paths": PROFILE_PATHS,
+            "profile_dir": self.profile_dir,
+            "profiles_written": self.profiles_written,
+            "skipped_busy": self.skipped_busy,
+        }
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that profiles requests chosen by a RequestProfiler"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope["path"], dict(scope["headers"])):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.profiler.try_begin():
+            await self.app(scope, receive, self._with_header(send, b"x-profile", b"busy"))
+            return
+
+        prefix = self.profiler.new_prefix(scope["method"], scope["path"])
+        token = _current_prefix.set(prefix)
+        session = ProfileSession().start()
+        try:
+            await self.app(scope, receive, self._with_header(send, b"x-profile-id", os.path.basename(prefix).encode("latin-1")))
+        finally:
+            _current_prefix.reset(token)
+            try:
+                result = session.finish(prefix, f"{scope['method']} {scope['path']}")
+                print(f"🔬 Profiled {scope['method']} {scope['path']} in {result['seconds']}s -> {prefix}.*")
+            finally:
+                self.profiler.end()
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [(name, value)])
+            await send(message)
+        return send_wrapper
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+# Number of render processes; 0 renders on a thread in the API process instead
+EXPORT_RENDER_WORKERS = int(os.getenv("EXPORT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Renders allowed in flight at once; the rest wait in the queue
+EXPORT_RENDER_MAX_CONCURRENCY = int(os.getenv("EXPORT_RENDER_MAX_CONCURRENCY", str(max(1, EXPORT_RENDER_WORKERS))))
+# Waiting renders beyond this are rejected instead of piling up
+EXPORT_RENDER_MAX_QUEUE = int(os.getenv("EXPORT_RENDER_MAX_QUEUE", "32"))
+# spawn keeps render processes free of the API process's threads and sockets
+EXPORT_RENDER_START_METHOD = os.getenv("EXPORT_RENDER_START_METHOD", "spawn")
+# Where serialized entries and rendered PDFs are written
+EXPORT_WORK_DIR = os.getenv("EXPORT_WORK_DIR", tempfile.gettempdir())
+
+class RenderQueueFull(Exception):
+    """Raised when too many renders are already waiting"""
+
+# One ExportService per render process, built on first use
+_worker_export_service = None
+
+def _get_worker_export_service():
+    global _worker_export_service
+    if _worker_export_service is None:
+        from backend.services.export_service import ExportService
+        _worker_export_service = ExportService()
+    return _worker_export_service
+
+def _iter_rows(rows_path: str):
+    with open(rows_path, "r", encoding="utf-8") as rows_file:
+        for line in rows_file:
+            yield json.loads(line)
+
+def render_report_file(rows_path: str, report_type: str, output_dir: str, profile_prefix: Optional[str] = None) -> Tuple[str, float, float]:
+    """Render a PDF from a JSON-lines file of entries.
+
+    Runs inside a render process. Returns the PDF path plus wall-clock start
+    and finish times so the caller can tell queue time from render time.
+    With profile_prefix the render is profiled to <profile_prefix>.render.*.
+    """
+    started_at = time.time()
+    service = _get_worker_export_service()
+    fd, output_path = tempfile.mkstemp(prefix="chroni_export_", suffix=".pdf", dir=output_dir)
+    try:
+        with os.fdopen(fd, "wb") as output:
+            if profile_prefix is None:
+                service.write_pdf_report(output, lambda: _iter_rows(rows_path), report_type)
+            else:
+                from backend.services.profiling import profile_call
+                profile_call(
+                    profile_prefix + ".render", f"render {report_type} report",
+                    service.write_pdf_report, output, lambda: _iter_rows(rows_path), report_type
+                )
+    except Exception:
+        os.remove(output_path)
+        raise
+    return output_path, started_at, time.time()
+
+def entry_to_export_row(entry) -> Dict[str, Any]:
+    """Convert a JournalEntry row to the dict format used by the export service"""
+    return {
+        "id": entry.id,
+        "entry_type": entry.entry_type,
+        "date": entry.date,
+        "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
+        "morning_feeling": entry.morning_feeling,
+        "morning_hopes": entry.morning_hopes,
+        "morning_symptoms": entry.morning_symptoms,
+        "evening_day_review": entry.evening_day_review,
+        "evening_gratitude": entry.evening_gratitude,
+        "evening_symptoms": entry.evening_symptoms,
+        "mood_overall": entry.mood_overall,
+        "energy_level": entry.energy_level,
+        "anxiety_level": entry.anxiety_level,
+        "pain_level": entry.pain_level,
+        "fatigue_level": entry.fatigue_level,
+        "sleep_quality": entry.sleep_quality,
+        "additional_notes": entry.additional_notes,
+        "ai_summary": entry.ai_summary,
+        "ai_insights": entry.ai_insights
+    }
+
+def write_rows_file(rows: Iterable[Dict[str, Any]], work_dir: str = EXPORT_WORK_DIR) -> Tuple[str, int]:
+    """Serialize entry dicts to a JSON-lines file for a render process, returns (path, row count)"""
+    fd, rows_path = tempfile.mkstemp(prefix="chroni_rows_", suffix=".jsonl", dir=work_dir)
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as rows_file:
+            for row in rows:
+                rows_file.write(json.dumps(row, default=str))
+                rows_file.write("\n")
+                count += 1
+    except Exception:
+        os.remove(rows_path)
+        raise
+    return rows_path, count
+
+def _remove_orphaned_output(render: asyncio.Future):
+    """Delete the PDF of a render whose caller was cancelled"""
+    if render.cancelled() or render.exception() is not None:
+        return
+    try:
+        os.remove(render.result()[0])
+    except FileNotFoundError:
+        pass
+
+class RenderPool:
+    """Dispatches PDF rendering to a process pool with a concurrency cap and queue metrics"""
+
+    def __init__(
+        self,
+        max_workers: int = EXPORT_RENDER_WORKERS,
+        max_concurrency: int = EXPORT_RENDER_MAX_CONCURRENCY,
+        max_queue: int = EXPORT_RENDER_MAX_QUEUE,
+        work_dir: str = EXPORT_WORK_DIR
+    ):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.work_dir = work_dir
+        # Created lazily so that forking servers never inherit a running pool
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_render_seconds = 0.0
+        self.max_render_seconds = 0.0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 0:
+            return None  # default thread pool, render in-process
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(EXPORT_RENDER_START_METHOD)
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def render(self, rows_path: str, report_type: str, profile_prefix: Optional[str] = None) -> str:
+        """Render a report from a rows file written by write_rows_file, returns the PDF path"""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise RenderQueueFull(f"{self.waiting} exports already waiting to render")
+
+        enqueued_at = time.time()
+        self.waiting += 1
+        try:
+            await self._get_semaphore().acquire()
+        finally:
+            self.waiting -= 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            render = loop.run_in_executor(
+                self._get_executor(), render_report_file, rows_path, report_type, self.work_dir, profile_prefix
+            )
+        except Exception:
+            self.failed += 1
+            self._get_semaphore().release()
+            raise
+        # The slot is held until the render itself ends, even if the caller stops waiting for it
+        self.in_flight += 1
+        render.add_done_callback(self._render_done)
+        try:
+            output_path, started_at, finished_at = await asyncio.shield(render)
+        except asyncio.CancelledError:
+            # Client gone or timed out: the worker keeps rendering, and nobody will read its PDF
+            render.add_done_callback(_remove_orphaned_output)
+            raise
+
+        queue_seconds = max(0.0, started_at - enqueued_at)
+        render_seconds = finished_at - started_at
+        self.completed += 1
+        self.total_queue_seconds += queue_seconds
+        self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+        self.total_render_seconds += render_seconds
+        self.max_render_seconds = max(self.max_render_seconds, render_seconds)
+        return output_path
+
+    def _render_done(self, render: asyncio.Future):
+        self.in_flight -= 1
+        self._get_semaphore().release()
+        if render.cancelled() or render.exception() is not None:
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration plus queue and render timings"""
+        completed = self.completed or 1
+        return {
+            "workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "pool_started": self._executor is not None,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_queue_seconds": round(self.total_queue_seconds / completed, 4),
+            "max_queue_seconds": round(self.max_queue_seconds, 4),
+            "avg_render_seconds": round(self.total_render_seconds / completed, 4),
+            "max_render_seconds": round(self.max_render_seconds, 4),
+        }
+
+    def shutdown(self):
+        """Stop the render processes, letting running renders finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
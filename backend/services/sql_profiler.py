@@ -0,0 +1,136 @@
+import contextvars
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-request SQL profiling (Server-Timing headers, N+1 warnings, slow-query log); 0 disables
+SQL_PROFILE = int(os.getenv("SQL_PROFILE", "0"))
+# Slowest statements reported per request
+SQL_PROFILE_TOP = int(os.getenv("SQL_PROFILE_TOP", "3"))
+# The same SELECT run this many times in one request is reported as a likely N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+# Statements slower than this go to the slow-query log; 0 disables the log
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+SQL_SLOW_QUERY_LOG = os.getenv("SQL_SLOW_QUERY_LOG", os.path.join("data", "slow_queries.log"))
+SQL_SLOW_QUERY_LOG_BYTES = int(os.getenv("SQL_SLOW_QUERY_LOG_BYTES", str(5 * 1024 * 1024)))
+SQL_SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SQL_SLOW_QUERY_LOG_BACKUPS", "3"))
+
+_current: contextvars.ContextVar[Optional["QueryProfile"]] = contextvars.ContextVar("sql_profile", default=None)
+
+class QueryProfile:
+    """SQL statements run while handling one request"""
+
+    def __init__(self, label: str, top: int = SQL_PROFILE_TOP):
+        self.label = label
+        self.top = top
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.repeats: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        if statement.lstrip()[:6].upper() == "SELECT":
+            # bound parameters keep the text identical across rows, which is what makes N+1 loops visible
+            self.repeats[statement] = self.repeats.get(statement, 0) + 1
+        if len(self.slowest) < self.top or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self.top:]
+
+    def n_plus_one(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """SELECTs repeated at least threshold times, most repeated first"""
+        if threshold <= 0:
+            return []
+        suspects = [(statement, count) for statement, count in self.repeats.items() if count >= threshold]
+        return sorted(suspects, key=lambda item: item[1], reverse=True)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: total DB time, the slowest statements and N+1 suspects"""
+        metrics = [f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries"']
+        for index, (seconds, statement) in enumerate(self.slowest, start=1):
+            metrics.append(f'db-slow-{index};dur={seconds * 1000:.2f};desc="{_describe(statement)}"')
+        suspects = self.n_plus_one()
+        if suspects:
+            statement, count = suspects[0]
+            metrics.append(f'db-n-plus-one;desc="{count}x {_describe(statement)}"')
+        return ", ".join(metrics)
+
+def _describe(statement: str, limit: int = 80) -> str:
+    """One-line, header-safe prefix of a statement"""
+    text = " ".join(statement.split()).replace('"', "'").replace("\\", "/")
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def _slow_query_logger() -> Optional[logging.Logger]:
+    if SQL_SLOW_QUERY_MS <= 0:
+        return None
+    directory = os.path.dirname(SQL_SLOW_QUERY_LOG)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    logger = logging.getLogger("chronicompanion.slow_queries")
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            SQL_SLOW_QUERY_LOG, maxBytes=SQL_SLOW_QUERY_LOG_BYTES, backupCount=SQL_SLOW_QUERY_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+def profile_engine(engine: Engine):
+    """Record every statement into the current request's profile and the slow-query log"""
+    slow_log = _slow_query_logger()
+    slow_seconds = SQL_SLOW_QUERY_MS / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._profile_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._profile_started
+        profile = _current.get()
+        if profile is not None:
+            profile.record(statement, seconds)
+        if slow_log is not None and seconds >= slow_seconds:
+            # parameters are left out: they carry journal text
+            slow_log.info("%.1fms [%s] %s", seconds * 1000, profile.label if profile else "-", " ".join(statement.split()))
+
+class SQLProfilerMiddleware:
+    """Pure ASGI middleware that profiles each request's SQL.
+
+    Adds a Server-Timing header with the statements run before the response
+    started and prints a warning for likely N+1 query loops.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = _current.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1", "replace")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            for statement, count in profile.n_plus_one():
+                print(f"⚠️  Possible N+1 in {profile.label}: {count}x {_describe(statement, 160)}")
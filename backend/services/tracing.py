@@ -0,0 +1,295 @@
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Share of requests whose spans are recorded; 0 disables span recording (trace ids are still assigned)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Spans are written here as OTLP/JSON, one export request per line; empty disables the file
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join("data", "traces.jsonl"))
+# Optional OTLP/HTTP collector, e.g. http://localhost:4318/v1/traces
+TRACE_EXPORT_URL = os.getenv("TRACE_EXPORT_URL", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "chronicompanion-api")
+TRACE_BATCH_SECONDS = float(os.getenv("TRACE_BATCH_SECONDS", "2"))
+TRACE_MAX_QUEUE = int(os.getenv("TRACE_MAX_QUEUE", "10000"))
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+class Span:
+    """One timed operation within a trace, recorded only for sampled traces"""
+
+    def __init__(self, trace_id: str, name: str, parent: Optional["Span"], sampled: bool, kind: int = SPAN_KIND_INTERNAL):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+class SpanExporter:
+    """Batches finished spans on a background thread and writes them as OTLP/JSON"""
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH, url: str = TRACE_EXPORT_URL):
+        self.path = path
+        self.url = url
+        self.exported = 0
+        self.dropped = 0
+        self.failures = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=TRACE_MAX_QUEUE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, span: Span):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1  # never block a request on tracing
+
+    def _run(self):
+        running = True
+        while running:
+            batch: List[Span] = []
+            deadline = time.monotonic() + TRACE_BATCH_SECONDS
+            while True:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    running = False
+                    break
+                batch.append(span)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Span]):
+        payload = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", TRACE_SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "chronicompanion"}, "spans": [span.to_otlp() for span in batch]}],
+            }]
+        })
+        try:
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as output:
+                    output.write(payload + "\n")
+            if self.url:
+                request = urllib.request.Request(
+                    self.url, data=payload.encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+            self.exported += len(batch)
+        except Exception as e:
+            self.failures += 1
+            print(f"🚨 ERROR exporting {len(batch)} trace span(s): {type(e).__name__}: {e}")
+
+    def shutdown(self):
+        """Flush queued spans"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": TRACE_SAMPLE_RATE,
+            "export_path": self.path or None,
+            "export_url": self.url or None,
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
+
+exporter = SpanExporter()
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span is not None else None
+
+def trace_print(message: str):
+    """print() tagged with the current request's trace id, so log lines can be matched to traces"""
+    trace_id = current_trace_id()
+    print(f"[trace {trace_id}] {message}" if trace_id else message)
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Child span of the current one; a no-op outside sampled traces"""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    child = Span(parent.trace_id, name, parent, True, kind)
+    child.attributes.update(attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        child.end_ns = time.time_ns()
+        exporter.submit(child)
+
+def traced(name: str):
+    """Decorator form of span() for sync functions"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _parse_traceparent(value: str):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+class TracingMiddleware:
+    """Pure ASGI middleware that opens the root span of every request.
+
+    Continues the caller's trace from a traceparent header and otherwise
+    samples TRACE_SAMPLE_RATE of requests. Every response carries a
+    traceparent header with the trace id, sampled or not.
+    """
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                incoming = _parse_traceparent(value.decode("latin-1"))
+                break
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+
+        root = Span(trace_id, f"{scope['method']} {scope['path']}", None, sampled, SPAN_KIND_SERVER)
+        root.parent_id = parent_id
+        root.set("http.method", scope["method"])
+        root.set("http.target", scope["path"])
+        traceparent = f"00-{trace_id}-{root.span_id}-{'01' if sampled else '00'}".encode("latin-1")
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"traceparent", traceparent)])
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            if sampled:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.set("http.route", route)
+                root.set("http.status_code", status_code)
+                if status_code >= 500 and root.error is None:
+                    root.error = f"HTTP {status_code}"
+                root.end_ns = time.time_ns()
+                exporter.submit(root)
+
+def trace_engine(engine: Engine):
+    """Record a db.query span for every statement run inside a sampled trace"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is not None and parent.sampled:
+            child = Span(parent.trace_id, "db.query", parent, True, SPAN_KIND_CLIENT)
+            child.set("db.system", conn.dialect.name)
+            child.set("db.statement", " ".join(statement.split())[:500])
+            context._trace_span = child
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        child = getattr(context, "_trace_span", None)
+        if child is not None:
+            child.end_ns = time.time_ns()
+            exporter.submit(child)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        context = exception_context.execution_context
+        child = getattr(context, "_trace_span", None) if context is not None else None
+        if child is not None:
+            child.error = f"{type(exception_context.original_exception).__name__}"
+            child.end_ns = time.time_ns()
+            exporter.submit(child)
@@ -0,0 +1,320 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone covers every browser
+    brotli = None
+
+# Files at most this big are kept in memory; larger ones are streamed from disk uncompressed
+STATIC_MAX_CACHED_BYTES = int(os.getenv("STATIC_MAX_CACHED_BYTES", str(4 * 1024 * 1024)))
+# Smaller files gain less from compression than the header and CPU cost
+STATIC_MIN_COMPRESS_BYTES = int(os.getenv("STATIC_MIN_COMPRESS_BYTES", "1024"))
+# Pending connections; socketserver's default of 5 drops SYNs as soon as a few browsers load the page at once
+STATIC_BACKLOG = int(os.getenv("STATIC_BACKLOG", "1024"))
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/javascript", "application/json", "application/manifest+json",
+    "application/xml", "image/svg+xml",
+)
+# app.3f9a1c2b.js, app-3f9a1c2b.css: the content hash is in the name, so the URL never changes meaning
+FINGERPRINT = re.compile(r"[.-][0-9a-f]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # may be stored, but is checked with the ETag every time
+CHUNK_SIZE = 64 * 1024
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+class StaticFile:
+    """One file with its validators and precompressed variants"""
+
+    def __init__(self, path: str):
+        stat = os.stat(path)
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type == "application/javascript":
+            self.content_type += "; charset=utf-8"
+        self.body: Optional[bytes] = None
+        self.variants: Dict[str, bytes] = {}  # content-coding -> body
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as source:
+            if self.size <= STATIC_MAX_CACHED_BYTES:
+                self.body = source.read()
+                digest.update(self.body)
+            else:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        # Strong ETag from the content, so every server process and restart agrees on it
+        self.etag = f'"{digest.hexdigest()[:32]}"'
+
+        if self.body is not None and self.size >= STATIC_MIN_COMPRESS_BYTES and self.content_type.startswith(COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                self._add_variant("br", brotli.compress(self.body, quality=11))
+            self._add_variant("gzip", gzip.compress(self.body, compresslevel=9, mtime=0))
+
+    def etag_for(self, coding: Optional[str]) -> str:
+        """Each content-coding is its own representation, so it gets its own strong ETag"""
+        return self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+
+    def _add_variant(self, coding: str, body: bytes):
+        if len(body) < self.size:
+            self.variants[coding] = body
+
+    def is_stale(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return stat.st_mtime_ns != self.mtime_ns or stat.st_size != self.size
+
+class StaticSite:
+    """Files under root, precompressed when the site is built and rebuilt when they change on disk"""
+
+    def __init__(self, root: str, index: str = "index.html"):
+        self.root = os.path.realpath(root)
+        self.index = index
+        self._files: Dict[str, StaticFile] = {}
+        self._lock = threading.Lock()
+
+    def preload(self) -> int:
+        """Load and compress every file up front, so no request pays for it; returns the file count"""
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                self.get(os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/"))
+        return len(self._files)
+
+    def resolve(self, url_path: str) -> Optional[str]:
+        """Site-relative file path for a URL path, or None if it is outside root or missing"""
+        relative = unquote(url_path).lstrip("/")
+        if relative == "" or relative.endswith("/"):
+            relative += self.index
+        full_path = os.path.realpath(os.path.join(self.root, relative))
+        if full_path != self.root and not full_path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(full_path):
+            full_path = os.path.join(full_path, self.index)
+        if not os.path.isfile(full_path):
+            return None
+        return os.path.relpath(full_path, self.root).replace(os.sep, "/")
+
+    def get(self, relative: str) -> StaticFile:
+        static_file = self._files.get(relative)
+        if static_file is None or static_file.is_stale():
+            with self._lock:
+                static_file = self._files.get(relative)
+                if static_file is None or static_file.is_stale():
+                    static_file = StaticFile(os.path.join(self.root, relative))
+                    self._files[relative] = static_file
+        return static_file
+
+    def stats(self) -> Dict[str, int]:
+        files = list(self._files.values())
+        return {
+            "files": len(files),
+            "bytes": sum(static_file.size for static_file in files),
+            "gzip_bytes": sum(len(static_file.variants.get("gzip", static_file.body or b"")) for static_file in files),
+            "br_bytes": sum(len(static_file.variants["br"]) for static_file in files if "br" in static_file.variants),
+        }
+
+def cache_control(path: str, query: str) -> str:
+    """Fingerprinted names and ?v= versioned URLs are immutable; anything else is revalidated"""
+    if FINGERPRINT.search(path) or "v" in parse_qs(query):
+        return IMMUTABLE
+    return REVALIDATE
+
+def _etag_matches(header: str, static_file: StaticFile) -> bool:
+    # If-None-Match uses the weak comparison (W/"x" matches "x"); a cached copy in any coding is still current
+    current = {static_file.etag_for(coding) for coding in (None, *static_file.variants)}
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") in current for candidate in candidates)
+
+def _choose_coding(accept_encoding: str, variants: Dict[str, bytes]) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ("br", "gzip"):  # smallest first
+        if coding in variants and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(first, last) byte positions of a single bytes= range; None when it cannot be satisfied.
+
+    Raises ValueError for ranges we do not serve (malformed or multiple),
+    which are answered with the whole file as RFC 9110 allows.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError(header)
+    first, _, last = spec.strip().partition("-")
+    if first == "":
+        if not last.isdigit():
+            raise ValueError(header)
+        length = int(last)
+        if length == 0 or size == 0:
+            return None
+        return max(0, size - length), size - 1
+    if not first.isdigit() or (last and not last.isdigit()):
+        raise ValueError(header)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+class StaticRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD for a StaticSite with ETags, cache headers, precompressed variants and byte ranges"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so a page's assets reuse the browser's connections
+    site: StaticSite = None
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool):
+        url = urlsplit(self.path)
+        relative = self.site.resolve(url.path)
+        if relative is None:
+            self._send_error(HTTPStatus.NOT_FOUND, send_body)
+            return
+        static_file = self.site.get(relative)
+        cache = cache_control(url.path, url.query)
+        varies = bool(static_file.variants)
+        coding = _choose_coding(self.headers.get("Accept-Encoding", ""), static_file.variants)
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, static_file)
+        else:
+            not_modified = self._not_modified_since(static_file)
+        if not_modified:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_validators(static_file, coding, cache, varies)
+            self.end_headers()
+            return
+
+        body_range = None
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and (if_range is None or if_range.strip() in (static_file.etag, static_file.last_modified)):
+            try:
+                body_range = parse_range(range_header, static_file.size)
+            except ValueError:
+                range_header = None  # serve the whole file
+            else:
+                if body_range is None:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{static_file.size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+        else:
+            range_header = None
+
+        if range_header:
+            coding = None  # ranges refer to the identity bytes
+        if body_range is not None:
+            start, end = body_range
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{static_file.size}")
+            length = end - start + 1
+        else:
+            start, end = 0, static_file.size - 1
+            self.send_response(HTTPStatus.OK)
+            length = len(static_file.variants[coding]) if coding else static_file.size
+        self.send_header("Content-Type", static_file.content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        if coding:
+            self.send_header("Content-Encoding", coding)
+        self._send_validators(static_file, coding, cache, varies)
+        self.end_headers()
+        if not send_body:
+            return
+
+        if coding:
+            self.wfile.write(static_file.variants[coding])
+        elif static_file.body is not None:
+            self.wfile.write(static_file.body[start:end + 1])
+        else:
+            with open(static_file.path, "rb") as source:
+                source.seek(start)
+                remaining = length
+                while remaining > 0:
+                    chunk = source.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+    def _not_modified_since(self, static_file: StaticFile) -> bool:
+        header = self.headers.get("If-Modified-Since")
+        if not header:
+            return False
+        try:
+            since = parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            return False
+        return int(since.timestamp()) >= static_file.mtime_ns // 1_000_000_000
+
+    def _send_validators(self, static_file: StaticFile, coding: Optional[str], cache: str, varies: bool):
+        self.send_header("ETag", static_file.etag_for(coding))
+        self.send_header("Last-Modified", static_file.last_modified)
+        self.send_header("Cache-Control", cache)
+        if varies:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def _send_error(self, status: HTTPStatus, send_body: bool):
+        body = f"{status.value} {status.phrase}\n".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per asset drowns the console; errors still reach log_error
+
+    def log_error(self, format, *args):
+        print(f"⚠️  Frontend server: {format % args}")
+
+class StaticHTTPServer(ThreadingHTTPServer):
+    """One thread per connection, so slow clients and parallel asset requests don't queue behind each other"""
+
+    daemon_threads = True
+    request_queue_size = STATIC_BACKLOG
+
+def create_server(root: str, port: int, host: str = "") -> StaticHTTPServer:
+    """Threaded static server for root, with every file loaded and compressed before it starts listening"""
+    site = StaticSite(root)
+    site.preload()
+    handler = type("SiteRequestHandler", (StaticRequestHandler,), {"site": site})
+    server = StaticHTTPServer((host, port), handler)
+    server.site = site
+    return server
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Concurrent identical AI requests against a fake slow LLM
+
+Fires N callers at OpenAIService.generate_weekly_coaching with the same
+entries at the same moment (two dashboard tabs, a double-tap) and counts how
+many completions reach the upstream client. With single-flight coalescing
+that is one per round. Exits non-zero if any round made more than one call.
+
+Usage: python -m benchmarks.ai_coalescing [--callers 2 8 32] [--latency 0.5]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.llm_providers import fake_provider
+from backend.services.openai_service import OpenAIService
+from benchmarks.data_generator import generate_entries
+
+def run(callers: int, latency: float) -> dict:
+    service = OpenAIService(providers=[fake_provider(latency_ms=latency * 1000)])
+    entries = list(generate_entries(7))
+    barrier = threading.Barrier(callers)
+
+    def call():
+        barrier.wait()
+        return service.generate_weekly_coaching(entries)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(lambda _: call(), range(callers)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "callers": callers,
+        "upstream_calls": service.client.requests,
+        "identical_results": all(result == results[0] for result in results),
+        "wall_seconds": round(elapsed, 3),
+        "single_flight": service.single_flight.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = [run(callers, args.latency) for callers in args.callers]
+    print(json.dumps({"benchmark": "ai_coalescing", "results": results}, indent=2))
+    if any(result["upstream_calls"] != 1 or not result["identical_results"] for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tail latency of AI completions with and without hedging
+
+Drives OpenAIService.generate_weekly_coaching sequentially against a fake
+streaming LLM whose latency is mostly fast with an occasional slow outlier
+(--tail-rate of calls take --tail-ms). "plain" sends one request per call;
+"hedged" races a second request once a call passes the latency percentile.
+Reports p50/p95/p99 after a warm-up of MIN_SAMPLES calls (the hedger needs
+that many latencies before it hedges), upstream requests sent, and how many
+slow streams were cut short by cancellation.
+
+Usage: python -m benchmarks.ai_hedging [--calls 300] [--percentile 90]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from backend.services.hedging import Hedger
+from backend.services.llm_providers import fake_provider
+from backend.services.openai_service import OpenAIService
+from benchmarks.data_generator import generate_entries
+
+MIN_SAMPLES = 20
+
+def run(mode: str, calls: int, percentile: float, args) -> dict:
+    provider = fake_provider(latency_ms=args.fast_ms, tail_ms=args.tail_ms, tail_rate=args.tail_rate, seed=args.seed)
+    service = OpenAIService(providers=[provider])
+    service.hedger = Hedger(
+        percentile=percentile if mode == "hedged" else 0,
+        min_samples=MIN_SAMPLES,
+        min_delay_seconds=0.0,
+        token_budget_per_hour=10 ** 9
+    )
+
+    entries = list(generate_entries(7))
+    samples = []
+    for i in range(MIN_SAMPLES + calls):
+        goals = [f"goal {i}"]  # distinct prompts so single-flight never coalesces
+        started = time.perf_counter()
+        service.generate_weekly_coaching(entries, goals)
+        if i >= MIN_SAMPLES:
+            samples.append((time.perf_counter() - started) * 1000)
+    service.hedger.shutdown()
+
+    samples.sort()
+    percentile_at = lambda p: round(samples[min(len(samples) - 1, int(len(samples) * p))], 1)
+    return {
+        "mode": mode,
+        "calls": calls,
+        "mean_ms": round(statistics.mean(samples), 1),
+        "p50_ms": percentile_at(0.50),
+        "p95_ms": percentile_at(0.95),
+        "p99_ms": percentile_at(0.99),
+        "upstream_requests": service.client.requests,
+        "abandoned_streams": service.client.abandoned_streams,
+        "hedging": service.hedger.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--percentile", type=float, default=90)
+    parser.add_argument("--fast-ms", type=float, default=20)
+    parser.add_argument("--tail-ms", type=float, default=300)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = [run(mode, args.calls, args.percentile, args) for mode in ("plain", "hedged")]
+    print(json.dumps({"benchmark": "ai_hedging", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
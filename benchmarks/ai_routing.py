@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Latency-aware routing between two AI backends
+
+Configures a "slow" and a "fast" fake provider for weekly coaching, with the
+slow one listed first, and drives sequential calls through OpenAIService.
+The router should settle on the fast backend after one sample from each,
+sending only the exploration share to the slow one. Halfway through the run
+the fast backend degrades (--degraded-ms) and traffic should move back.
+
+Usage: python -m benchmarks.ai_routing [--calls 200] [--slow-ms 120 --fast-ms 20]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from backend.services.llm_providers import fake_provider
+from backend.services.openai_service import OpenAIService
+from benchmarks.data_generator import generate_entries
+
+def _phase(service: OpenAIService, entries, calls: int, offset: int) -> dict:
+    slow, fast = service.providers
+    before = {"slow": slow.client.requests, "fast": fast.client.requests}
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        service.generate_weekly_coaching(entries, [f"goal {offset + i}"])
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "calls": calls,
+        "requests": {
+            "slow": slow.client.requests - before["slow"],
+            "fast": fast.client.requests - before["fast"],
+        },
+        "mean_ms": round(statistics.mean(samples), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--slow-ms", type=float, default=120)
+    parser.add_argument("--fast-ms", type=float, default=20)
+    parser.add_argument("--degraded-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    slow = fake_provider("slow", latency_ms=args.slow_ms)
+    fast = fake_provider("fast", latency_ms=args.fast_ms)
+    service = OpenAIService(providers=[slow, fast], routes={"coaching": ["slow", "fast"]})
+    entries = list(generate_entries(7))
+
+    half = args.calls // 2
+    healthy = _phase(service, entries, half, 0)
+    fast.client.latency_ms = args.degraded_ms
+    degraded = _phase(service, entries, args.calls - half, half)
+
+    print(json.dumps({
+        "benchmark": "ai_routing",
+        "healthy": healthy,
+        "fast_degraded": degraded,
+        "routes": service.router.stats()["coaching"],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
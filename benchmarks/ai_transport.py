@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Connection reuse for AI calls against a local OpenAI-compatible mock server
+
+Sends --calls chat completions from --concurrency threads to
+benchmarks.mock_llm_server (HTTPS by default) in three ways:
+
+  client_per_call  a new client, and so a new TCP + TLS connection, per call
+  pooled           one provider client shared by all calls (what the app does)
+  pooled_warm      the shared client after LLMProvider.warm_up
+
+Reports latency percentiles, the mean latency of the first wave of calls
+(where warm-up matters), and how many connections the server accepted.
+
+Usage: python -m benchmarks.ai_transport [--calls 400] [--concurrency 16] [--no-tls]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.llm_providers import openai_provider
+from benchmarks.mock_llm_server import MockLLMServer
+
+def _provider(server: MockLLMServer):
+    return openai_provider("mock", "not-needed", "mock-llm", server.base_url, ca_bundle=server.cert_path)
+
+def _call(provider, i: int):
+    provider.client.chat.completions.create(
+        model=provider.model,
+        messages=[{"role": "user", "content": f"Summarize entry {i}"}],
+        max_tokens=50,
+        timeout=provider.timeout
+    )
+
+def run(mode: str, server: MockLLMServer, calls: int, concurrency: int) -> dict:
+    shared = None if mode == "client_per_call" else _provider(server)
+    if mode == "pooled_warm":
+        shared.warm_up(concurrency)
+    server.connections = 0
+
+    samples = [0.0] * calls
+
+    def one(i: int):
+        started = time.perf_counter()
+        if shared is None:
+            provider = _provider(server)
+            try:
+                _call(provider, i)
+            finally:
+                provider.close()
+        else:
+            _call(shared, i)
+        samples[i] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(calls)))
+    wall = time.perf_counter() - started
+    if shared is not None:
+        shared.close()
+
+    first_wave = samples[:concurrency]
+    ordered = sorted(samples)
+    return {
+        "mode": mode,
+        "calls": calls,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "calls_per_second": round(calls / wall, 1),
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "first_wave_mean_ms": round(statistics.mean(first_wave), 2),
+        "connections_accepted": server.connections,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--no-tls", action="store_true")
+    args = parser.parse_args()
+
+    server = MockLLMServer(latency_ms=args.latency_ms, tls=not args.no_tls).start()
+    try:
+        results = [
+            run(mode, server, args.calls, args.concurrency)
+            for mode in ("client_per_call", "pooled", "pooled_warm")
+        ]
+    finally:
+        server.stop()
+    print(json.dumps({"benchmark": "ai_transport", "tls": not args.no_tls, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of every API endpoint
+
+For each database URL and history size, loads synthetic entries
+(benchmarks.data_generator), starts the app in-process against that
+database with a fake LLM backend (AI_PROVIDERS=fake), and calls every
+endpoint in backend/main.py and backend/api/routes.py --requests times from
+--concurrency threads. Reports per-endpoint latency percentiles,
+throughput and peak memory as one JSON report, so runs against SQLite and
+a local Postgres (or before and after a change) can be diffed directly.
+
+Each run happens in a fresh subprocess because the app reads its
+configuration at import. Requests go through the ASGI app without sockets,
+so numbers exclude network and server overhead. Postgres databases must be
+empty unless --reset is given, which drops the app's tables first.
+
+Usage: python -m benchmarks.api_suite [--rows 1000 100000] [--database-url sqlite:///... postgresql://...]
+                                      [--requests 30] [--concurrency 4] [--output data/bench_report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+# (name, method, path, body) or a factory returning them per call, so writes target fresh rows
+Request = Tuple[str, str, Dict[str, Any]]
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _entry_body(i: int) -> Dict[str, Any]:
+    return {
+        "entry_type": "evening",
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "mood_overall": 4,
+        "energy_level": 3,
+        "pain_level": 7,
+        "fatigue_level": 6,
+        "evening_day_review": f"Benchmark entry {i}",
+        "evening_symptoms": "Pain",
+    }
+
+def _scenarios(client, requests: int, job_ids: List[str]) -> List[Tuple[str, Callable[[int], Request], Callable]]:
+    """(name, request factory, response check) for every endpoint; export jobs created are appended to job_ids"""
+    entry_ids = [entry["id"] for entry in client.get("/api/entries", params={"limit": requests}).json()]
+    created = [client.post("/api/entries", json=_entry_body(i)).json()["id"] for i in range(requests)]
+
+    def create_job(i):
+        return "POST", "/api/export/jobs", {"json": {"report_type": "comprehensive", "days": 7}}
+
+    def remember_job(response):
+        job_ids.append(response.json()["id"])
+        return response.status_code == 202
+
+    def ok(response):
+        return response.status_code < 400
+
+    def job_id(i):
+        return job_ids[i % len(job_ids)]
+
+    return [
+        ("GET /", lambda i: ("GET", "/", {}), ok),
+        ("GET /health", lambda i: ("GET", "/health", {}), ok),
+        ("GET /metrics", lambda i: ("GET", "/metrics", {}), ok),
+        ("GET /api/entries", lambda i: ("GET", "/api/entries", {"params": {"limit": 50}}), ok),
+        ("GET /api/entries/changes", lambda i: ("GET", "/api/entries/changes", {"params": {"since": 0, "limit": 500}}), ok),
+        ("GET /api/entries/{id}", lambda i: ("GET", f"/api/entries/{entry_ids[i % len(entry_ids)]}", {}), ok),
+        ("POST /api/entries", lambda i: ("POST", "/api/entries", {"json": _entry_body(i)}), ok),
+        ("PUT /api/entries/{id}", lambda i: ("PUT", f"/api/entries/{created[i % len(created)]}", {"json": {"mood_overall": 5}}), ok),
+        ("POST /api/entries/batch", lambda i: ("POST", "/api/entries/batch", {"json": {"operations": [
+            {"op": "create", "data": _entry_body(i)},
+            {"op": "update", "id": created[i % len(created)], "data": {"pain_level": 6}},
+        ]}}), ok),
+        ("GET /api/entries/stats/summary", lambda i: ("GET", "/api/entries/stats/summary", {}), ok),
+        ("POST /api/ai/feedback", lambda i: ("POST", "/api/ai/feedback", {"json": {"entry_id": entry_ids[i % len(entry_ids)]}}), ok),
+        ("GET /api/ai/weekly-reflection", lambda i: ("GET", "/api/ai/weekly-reflection", {"params": {"refresh": True}}), ok),
+        ("GET /api/ai/predictive-insights", lambda i: ("GET", "/api/ai/predictive-insights", {"params": {"refresh": True}}), ok),
+        ("POST /api/ai/coping-strategies", lambda i: ("POST", "/api/ai/coping-strategies", {"json": {"pain_level": 7, "fatigue_level": 6}}), ok),
+        ("GET /api/ai/crisis-check", lambda i: ("GET", "/api/ai/crisis-check", {}), ok),
+        ("GET /api/ai/weekly-coaching", lambda i: ("GET", "/api/ai/weekly-coaching", {"params": {"refresh": True}}), ok),
+        ("GET /api/ai/debug", lambda i: ("GET", "/api/ai/debug", {}), ok),
+        ("GET /api/analytics/trends", lambda i: ("GET", "/api/analytics/trends", {"params": {"days": 30, "refresh": True}}), ok),
+        ("GET /api/analytics/chart-data", lambda i: ("GET", "/api/analytics/chart-data", {"params": {"days": 30, "refresh": True}}), ok),
+        ("GET /api/export", lambda i: ("GET", "/api/export", {"params": {"days": 7}}), ok),
+        ("GET /api/export/doctor-summary", lambda i: ("GET", "/api/export/doctor-summary", {"params": {"days": 7}}), ok),
+        ("POST /api/export/jobs", create_job, remember_job),
+        ("GET /api/export/jobs/{id}", lambda i: ("GET", f"/api/export/jobs/{job_id(i)}", {}), ok),
+        ("GET /api/export/jobs/{id}/download", lambda i: ("GET", f"/api/export/jobs/{job_id(i)}/download", {}), ok),
+        ("GET /api/export/debug", lambda i: ("GET", "/api/export/debug", {}), ok),
+        ("GET /api/precompute/debug", lambda i: ("GET", "/api/precompute/debug", {}), ok),
+        ("GET /api/tracing/debug", lambda i: ("GET", "/api/tracing/debug", {}), ok),
+        ("DELETE /api/entries/{id}", lambda i: ("DELETE", f"/api/entries/{created[i % len(created)]}", {}), ok),
+    ]
+
+def _wait_for_jobs(client, job_ids: List[str], timeout: float = 300):
+    deadline = time.monotonic() + timeout
+    for job in job_ids:
+        while time.monotonic() < deadline:
+            if client.get(f"/api/export/jobs/{job}").json()["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.1)
+
+def _run_endpoint(client, name: str, factory, check, requests: int, concurrency: int) -> Dict[str, Any]:
+    samples = [0.0] * requests
+    errors = [0]
+
+    def one(i: int):
+        method, path, options = factory(i)
+        started = time.perf_counter()
+        response = client.request(method, path, **options)
+        samples[i] = (time.perf_counter() - started) * 1000
+        if not check(response):
+            errors[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    ordered = sorted(samples)
+    return {
+        "endpoint": name,
+        "requests": requests,
+        "errors": errors[0],
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(_percentile(ordered, 0.50), 2),
+        "p95_ms": round(_percentile(ordered, 0.95), 2),
+        "p99_ms": round(_percentile(ordered, 0.99), 2),
+        "throughput_rps": round(requests / wall, 1),
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "render_processes_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+def run_child(args) -> Dict[str, Any]:
+    """One (database, rows) run; executed in its own process"""
+    work_dir = tempfile.mkdtemp(prefix="chroni_bench_")
+    os.environ.update({
+        "DATABASE_URL": args.database_url,
+        "AI_PROVIDERS": "fake",
+        "AI_PROVIDER_FAKE_LATENCY_MS": str(args.llm_latency_ms),
+        "PRECOMPUTE_HOUR": "-1",
+        "EXPORT_CACHE_MAX_BYTES": "0",  # measure rendering, not cache hits
+        "EXPORT_JOBS_DIR": os.path.join(work_dir, "export_jobs"),
+        "PRECOMPUTE_LOCK_PATH": os.path.join(work_dir, "precompute.lock"),
+    })
+
+    from sqlalchemy import create_engine, inspect, text
+    from benchmarks.data_generator import load_database
+
+    engine = create_engine(args.database_url)
+    if inspect(engine).has_table("journal_entries"):
+        with engine.connect() as connection:
+            has_rows = connection.execute(text("SELECT 1 FROM journal_entries LIMIT 1")).first() is not None
+        if has_rows and not args.reset:
+            raise SystemExit(f"{engine.url.render_as_string(hide_password=True)} already has entries; pass --reset to drop the app's tables")
+        from backend.models import Base
+        Base.metadata.drop_all(bind=engine)
+    load_seconds = load_database(engine, args.rows)
+    engine.dispose()
+
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    endpoints = []
+    job_ids: List[str] = []
+    with TestClient(app) as client:
+        for name, factory, check in _scenarios(client, args.requests, job_ids):
+            if name == "GET /api/export/jobs/{id}":
+                _wait_for_jobs(client, job_ids)  # so status polls and downloads see finished jobs
+            endpoints.append(_run_endpoint(client, name, factory, check, args.requests, args.concurrency))
+
+    return {
+        "database": engine.dialect.name,
+        "database_url": engine.url.render_as_string(hide_password=True),
+        "rows": args.rows,
+        "load_seconds": round(load_seconds, 2),
+        "endpoints": endpoints,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000])
+    parser.add_argument("--database-url", nargs="+", default=None, help="default: a fresh SQLite file per run")
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--reset", action="store_true", help="drop the app's tables in non-empty databases first")
+    parser.add_argument("--output", default=os.path.join("data", "bench_report.json"))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.rows = args.rows[0]
+        args.database_url = args.database_url[0]
+        print(json.dumps(run_child(args)))
+        return
+
+    runs = []
+    for database_url in args.database_url or [None]:
+        for rows in args.rows:
+            url = database_url or f"sqlite:///{tempfile.mkdtemp(prefix='chroni_bench_')}/bench.db"
+            command = [
+                sys.executable, "-m", "benchmarks.api_suite", "--child",
+                "--database-url", url, "--rows", str(rows),
+                "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                "--llm-latency-ms", str(args.llm_latency_ms),
+            ] + (["--reset"] if args.reset else [])
+            print(f"Benchmarking {rows} rows on {url.split('@')[-1]} ...", file=sys.stderr)
+            # The app prints progress to stdout; the run's JSON is the last line
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = {
+        "benchmark": "api_suite",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency, "llm_latency_ms": args.llm_latency_ms},
+        "runs": runs,
+    }
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
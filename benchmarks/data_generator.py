@@ -0,0 +1,155 @@
+"""
+Synthetic journal data for ChroniCompanion benchmarks
+
+Produces entry dicts shaped like the ones the API hands to ExportService:
+one morning and one evening entry per day, newest first.
+
+Histories follow the shape of real data (current_health_data_backup.json):
+pain drifts day to day with occasional flares, and fatigue, anxiety, mood,
+energy and sleep move with it. Free text is short and often blank, with the
+occasional longer note.
+
+As a script it loads a database for the benchmark suite:
+
+Usage: python -m benchmarks.data_generator --rows 100000 [--database-url sqlite:///./data/bench.db]
+"""
+
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Optional
+
+SLEEP_QUALITIES = ["excellent", "good", "fair", "poor", "very_poor"]
+
+SAMPLE_SENTENCES = [
+    "Woke up stiff but the morning stretches helped a little.",
+    "Pain flared in the afternoon so I rested on the sofa.",
+    "Managed a short walk around the block before lunch.",
+    "Feeling foggy today, hard to concentrate on anything.",
+    "Grateful for a quiet evening and a warm cup of tea.",
+    "Slept badly and the fatigue has been heavy all day.",
+]
+
+# Short answers like the ones people actually type on a phone
+SHORT_ANSWERS = [
+    "Pain", "Tired", "Painkillers", "Sore joints", "Headache", "Nausea", "Rest", "Family",
+    "Brain fog", "Heat pad", "My cat", "Sunshine", "Dizzy", "Back pain", "Okay day", "Hopeful",
+]
+
+TEXT_FIELDS = [
+    "morning_feeling", "morning_hopes", "morning_symptoms",
+    "evening_day_review", "evening_gratitude", "evening_symptoms",
+]
+
+# (probability, min length, max length) per free-text field; length 0 means blank
+TEXT_LENGTHS = [(0.35, 0, 0), (0.45, 3, 20), (0.20, 40, 130)]
+
+def _free_text(rng: random.Random) -> str:
+    roll = rng.random()
+    for probability, low, high in TEXT_LENGTHS:
+        if roll < probability:
+            break
+        roll -= probability
+    if high == 0:
+        return ""
+    if high <= 20:
+        return rng.choice(SHORT_ANSWERS)
+    target = rng.randint(low, high)
+    text = rng.choice(SAMPLE_SENTENCES)
+    while len(text) < target:
+        text += " " + rng.choice(SAMPLE_SENTENCES)
+    return text[:target].rstrip()
+
+def _scale(rng: random.Random, value: float, noise: float, low: int = 0, high: int = 10) -> int:
+    return max(low, min(high, int(round(value + rng.gauss(0, noise)))))
+
+def generate_entries(days: int, seed: int = 42, end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Yield two entries per day for the given number of days, newest first"""
+    rng = random.Random(seed)
+    end = end or datetime.now()
+    entry_id = days * 2
+    # Baseline pain drifts slowly; flares add a few points for several days
+    pain_level = rng.uniform(3, 7)
+    flare_days = 0
+    for day in range(days):
+        day_start = (end - timedelta(days=day)).replace(hour=0, minute=0, second=0, microsecond=0)
+        pain_level = min(8.0, max(1.0, pain_level + rng.gauss(0, 0.6)))
+        if flare_days == 0 and rng.random() < 0.05:
+            flare_days = rng.randint(2, 6)
+        daily_pain = pain_level + (3 if flare_days else 0)
+        flare_days = max(0, flare_days - 1)
+        for entry_type, hour in (("evening", 21), ("morning", 8)):
+            timestamp = day_start + timedelta(hours=hour, minutes=rng.randint(-90, 150))
+            pain = _scale(rng, daily_pain, 1.0)
+            fatigue = _scale(rng, 0.8 * pain + 1.5, 1.3)
+            entry = {
+                "id": entry_id,
+                "entry_type": entry_type,
+                "date": day_start.strftime("%Y-%m-%d"),
+                "timestamp": timestamp.isoformat(),
+                "mood_overall": _scale(rng, 10 - 0.8 * pain, 1.3, low=1),
+                "energy_level": _scale(rng, 10.5 - 0.9 * fatigue, 1.2, low=1),
+                "anxiety_level": _scale(rng, 0.6 * pain + 2.5, 1.6, low=1),
+                "pain_level": pain,
+                "fatigue_level": fatigue,
+                "sleep_quality": SLEEP_QUALITIES[_scale(rng, fatigue / 2.2, 0.8, high=4)],
+                "additional_notes": _free_text(rng),
+                "ai_summary": None,
+                "ai_insights": None,
+            }
+            if entry_type == "morning":
+                entry.update(morning_feeling=_free_text(rng), morning_hopes=_free_text(rng), morning_symptoms=_free_text(rng))
+            else:
+                entry.update(evening_day_review=_free_text(rng), evening_gratitude=_free_text(rng), evening_symptoms=_free_text(rng))
+            entry_id -= 1
+            yield entry
+
+def generate_rows(rows: int, seed: int = 42, end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Yield exactly rows entries (morning/evening pairs), newest first"""
+    for index, entry in enumerate(generate_entries(math.ceil(rows / 2), seed, end)):
+        if index >= rows:
+            return
+        yield entry
+
+def load_database(engine, rows: int, seed: int = 42, batch_size: int = 5000) -> float:
+    """Insert rows synthetic entries (and their sync change records) into an empty database; returns seconds taken"""
+    from sqlalchemy import literal, select
+    from backend.models import Base, EntryChange, JournalEntry
+
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    batch = []
+    with engine.begin() as connection:
+        for entry in generate_rows(rows, seed):
+            # executemany needs the same keys in every row
+            entry = {**dict.fromkeys(TEXT_FIELDS), **entry, "timestamp": datetime.fromisoformat(entry["timestamp"])}
+            entry.pop("id")  # oldest-first ids would need the whole history in memory; let the database assign them
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                connection.execute(JournalEntry.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(JournalEntry.__table__.insert(), batch)
+        # Sync clients and cache keys read the change log, so seed it like init_db does
+        connection.execute(EntryChange.__table__.insert().from_select(
+            ["entry_id", "operation"],
+            select(JournalEntry.id, literal("upsert")).order_by(JournalEntry.id)
+        ))
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--database-url", default="sqlite:///./data/bench.db")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    engine = create_engine(args.database_url)
+    seconds = load_database(engine, args.rows, args.seed)
+    print(f"Loaded {args.rows} entries into {engine.url.render_as_string(hide_password=True)} in {seconds:.1f}s")
+
+if __name__ == "__main__":
+    main()
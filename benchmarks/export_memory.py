@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Peak memory of PDF export: the original buffered path vs chunked rendering
+
+Both modes read the same synthetic entries from a fresh SQLite database.
+"baseline" is the export path from before chunked rendering, run on a
+frozen copy of that ExportService (benchmarks.baseline_export_service):
+every entry is loaded with .all(), converted to a list of dicts and
+rendered into a BytesIO. "chunked" is what /api/export does now:
+rows are read with yield_per() and fed to generate_pdf_report_chunked,
+which renders into a spooled temp file. Timing and peak memory come from
+separate runs because tracemalloc slows ReportLab down several times over.
+
+Usage: python -m benchmarks.export_memory [--days 30 365 3650] [--report-type comprehensive]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+def _measure(fn):
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak / (1024 * 1024), 2), "pdf_bytes": size}
+
+def run(days: int, report_type: str) -> dict:
+    from backend.database import SessionLocal, engine
+    from backend.models import Base, JournalEntry
+    from backend.services.export_service import ExportService
+    from backend.services.render_pool import entry_to_export_row
+    from benchmarks.baseline_export_service import ExportService as BaselineExportService
+    from benchmarks.data_generator import load_database
+
+    # Batch size /api/export reads rows with (backend.main reads the same variable)
+    yield_per = int(os.getenv("EXPORT_YIELD_PER", "200"))
+    Base.metadata.drop_all(bind=engine)
+    load_database(engine, days * 2)
+    baseline_service = BaselineExportService()
+    service = ExportService()
+
+    def query(db):
+        start_date = datetime.now() - timedelta(days=days)
+        return db.query(JournalEntry).filter(JournalEntry.timestamp >= start_date).order_by(JournalEntry.timestamp.desc())
+
+    def baseline():
+        # The original /api/export: all rows as ORM objects, then a full list of dicts, then a BytesIO
+        db = SessionLocal()
+        try:
+            entries = query(db).all()
+            entries_data = [entry_to_export_row(entry) for entry in entries]
+            buffer = baseline_service.generate_pdf_report(entries_data, report_type)
+            return len(buffer.getvalue())
+        finally:
+            db.close()
+
+    def chunked():
+        db = SessionLocal()
+        try:
+            pdf_file = service.generate_pdf_report_chunked(
+                lambda: (entry_to_export_row(entry) for entry in query(db).yield_per(yield_per)), report_type
+            )
+        finally:
+            db.close()
+        try:
+            size = 0
+            while True:
+                chunk = pdf_file.read(64 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+            return size
+        finally:
+            pdf_file.close()
+
+    return {
+        "days": days,
+        "entries": days * 2,
+        "report_type": report_type,
+        "baseline": _measure(baseline),
+        "chunked": _measure(chunked),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 3650])
+    parser.add_argument("--report-type", default="comprehensive")
+    args = parser.parse_args()
+
+    # The app reads its configuration at import
+    work_dir = tempfile.mkdtemp(prefix="chroni_export_memory_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir}/export.db"
+
+    results = [run(days, args.report_type) for days in args.days]
+    print(json.dumps({"benchmark": "export_memory", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
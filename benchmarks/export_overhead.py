@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Per-report overhead of PDF export for small reports
+
+Most exports cover a week or two, so fixed per-report costs dominate.
+"fresh" builds a new ExportService for every report (paying the stylesheet
+and table style setup each time); "shared" reuses one instance the way a
+render process does.
+
+Usage: python -m benchmarks.export_overhead [--days 1 7 14] [--iterations 50]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from backend.services.export_service import ExportService
+from benchmarks.data_generator import generate_entries
+
+def _timings(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+    }
+
+def run(days: int, report_type: str, iterations: int) -> dict:
+    entries = list(generate_entries(days))
+    shared = ExportService()
+
+    return {
+        "days": days,
+        "entries": len(entries),
+        "report_type": report_type,
+        "service_init": _timings(ExportService, iterations),
+        "fresh": _timings(lambda: ExportService().generate_pdf_report(entries, report_type), iterations),
+        "shared": _timings(lambda: shared.generate_pdf_report(entries, report_type), iterations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 14])
+    parser.add_argument("--report-type", default="comprehensive")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    results = [run(days, args.report_type, args.iterations) for days in args.days]
+    print(json.dumps({"benchmark": "export_overhead", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Serialization and compression cost of the largest JSON responses
+
+Loads --rows synthetic entries (benchmarks.data_generator) into a fresh
+SQLite database, then requests GET /api/entries?limit=100 (in full, as
+view=summary and with a short fields= list), GET /api/entries/changes and
+GET /api/analytics/chart-data --requests times each, once per
+Accept-Encoding (none, gzip, br), and reports median and p95 latency with
+the bytes sent on the wire. Requests go through the ASGI app in-process,
+so latency is the query plus the app's own encoding and compression work.
+
+--text-bytes rewrites every journal and AI text field to about that many
+characters, for long-form journals; the generator's own text is short.
+
+Run it on the old and new code (e.g. from a git worktree of the previous
+commit) and diff the reports.
+
+Usage: python -m benchmarks.response_encoding [--rows 2000] [--requests 200] [--text-bytes 1500]
+                                              [--output data/encoding_report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+ENDPOINTS = [
+    ("GET /api/entries?limit=100", "/api/entries", {"limit": 100}),
+    ("GET /api/entries?limit=100&view=summary", "/api/entries", {"limit": 100, "view": "summary"}),
+    ("GET /api/entries?limit=100&fields=date,pain_level", "/api/entries", {"limit": 100, "fields": "date,pain_level"}),
+    ("GET /api/entries/changes", "/api/entries/changes", {"since": 0, "limit": 500}),
+    ("GET /api/analytics/chart-data", "/api/analytics/chart-data", {"days": 90, "refresh": True}),
+]
+ENCODINGS = ["identity", "gzip", "br"]
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def _lengthen_text(engine, text_bytes: int, seed: int = 42):
+    """Rewrite every text field of every entry to about text_bytes characters of varied sentences"""
+    from sqlalchemy import bindparam, select, update
+    from backend.models import JournalEntry
+    from benchmarks.data_generator import SAMPLE_SENTENCES, TEXT_FIELDS
+
+    rng = random.Random(seed)
+    names = TEXT_FIELDS + ["additional_notes", "ai_summary", "ai_insights"]
+
+    def text():
+        sentences = []
+        while sum(len(sentence) + 1 for sentence in sentences) < text_bytes:
+            sentences.append(rng.choice(SAMPLE_SENTENCES))
+        return " ".join(sentences)[:text_bytes]
+
+    with engine.begin() as connection:
+        ids = connection.execute(select(JournalEntry.id)).scalars().all()
+        connection.execute(
+            update(JournalEntry).where(JournalEntry.id == bindparam("entry_id")).values({name: bindparam(name) for name in names}),
+            [{"entry_id": entry_id, **{name: text() for name in names}} for entry_id in ids]
+        )
+
+def _measure(client, path: str, params: Dict[str, Any], encoding: str, requests: int) -> Dict[str, Any]:
+    headers = {"Accept-Encoding": encoding}
+    client.get(path, params=params, headers=headers)  # warm caches and lazy imports
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, params=params, headers=headers)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+    samples.sort()
+    return {
+        "content_encoding": response.headers.get("content-encoding", "identity"),
+        "wire_bytes": response.num_bytes_downloaded,
+        "json_bytes": len(response.content),
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(_percentile(samples, 0.95) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--text-bytes", type=int, default=0, help="length of every text field; 0 keeps the generated text")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    # The app reads its configuration at import
+    work_dir = tempfile.mkdtemp(prefix="chroni_encoding_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir}/encoding.db"
+    os.environ["EXPORT_JOBS_DIR"] = os.path.join(work_dir, "export_jobs")
+    os.environ["PRECOMPUTE_LOCK_PATH"] = os.path.join(work_dir, "precompute.lock")
+
+    from fastapi.testclient import TestClient
+    from backend.database import engine
+    from backend.main import app
+    from benchmarks.data_generator import load_database
+
+    load_database(engine, args.rows)
+    if args.text_bytes:
+        _lengthen_text(engine, args.text_bytes)
+    endpoints = {}
+    with TestClient(app) as client:
+        for name, path, params in ENDPOINTS:
+            endpoints[name] = {encoding: _measure(client, path, params, encoding, args.requests) for encoding in ENCODINGS}
+
+    report = {
+        "benchmark": "response_encoding",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "requests": args.requests,
+        "text_bytes": args.text_bytes,
+        "endpoints": endpoints,
+    }
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
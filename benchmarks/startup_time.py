@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of the API
+
+Starts the app --runs times, each in a fresh interpreter, and reports the
+median time to import backend.main, run the startup events and answer the
+first request (GET /health), plus the total from process spawn to that
+first response. One extra run under python -X importtime lists the modules
+with the largest cumulative import time, and the report records whether
+the heavy optional libraries (openai, reportlab) were loaded by then.
+
+Pass --env KEY=VALUE to start with production-like settings (e.g.
+OPENAI_API_KEY=sk-test). With --baseline, exits non-zero when the median
+time to first request regressed by more than --max-regression.
+
+Usage: python -m benchmarks.startup_time [--runs 5] [--env OPENAI_API_KEY=sk-test]
+                                          [--output data/startup_report.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+HEAVY_MODULES = ("openai", "reportlab")
+
+def run_child() -> Dict[str, Any]:
+    """One cold start; executed in its own process"""
+    started = time.perf_counter()
+    from backend.main import app
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    client = TestClient(app)
+    client_ready = time.perf_counter()  # the test client's own import is not part of the app's startup
+    client.__enter__()
+    started_up = time.perf_counter()
+    response = client.get("/health")
+    answered = time.perf_counter()
+    loaded = {name: name in sys.modules for name in HEAVY_MODULES}
+    client.__exit__(None, None, None)
+
+    return {
+        "status": response.status_code,
+        "finished_at": time.time(),
+        "import_seconds": imported - started,
+        "startup_seconds": started_up - client_ready,
+        "first_request_seconds": answered - started_up,
+        "loaded_modules": loaded,
+    }
+
+def _child_env(overrides: List[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    work_dir = tempfile.mkdtemp(prefix="chroni_startup_")
+    env.setdefault("DATABASE_URL", f"sqlite:///{work_dir}/startup.db")
+    env["EXPORT_JOBS_DIR"] = os.path.join(work_dir, "export_jobs")
+    env["PRECOMPUTE_LOCK_PATH"] = os.path.join(work_dir, "precompute.lock")
+    for override in overrides:
+        key, _, value = override.partition("=")
+        env[key] = value
+    return env
+
+def _cold_start(overrides: List[str]) -> Dict[str, Any]:
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_time", "--child"],
+        env=_child_env(overrides), check=True, capture_output=True, text=True
+    ).stdout
+    # The app prints progress to stdout; the run's JSON is the last line
+    run = json.loads(output.strip().splitlines()[-1])
+    run["time_to_first_request_seconds"] = run.pop("finished_at") - spawned
+    return run
+
+def _slowest_imports(overrides: List[str], top: int) -> List[Dict[str, Any]]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        env=_child_env(overrides), check=True, capture_output=True, text=True
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # import time: <self us> | <cumulative us> | <indented module>
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000, "self_ms": int(self_us) / 1000})
+    imports.sort(key=lambda item: item["cumulative_ms"], reverse=True)
+    return imports[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--top-imports", type=int, default=15)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None, help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed slowdown vs the baseline, as a fraction")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child()))
+        return
+
+    runs = [_cold_start(args.env) for _ in range(args.runs)]
+    medians = {
+        key: round(statistics.median(run[key] for run in runs) * 1000, 1)
+        for key in ("import_seconds", "startup_seconds", "first_request_seconds", "time_to_first_request_seconds")
+    }
+    report = {
+        "benchmark": "startup_time",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "env": [override.split("=", 1)[0] for override in args.env],  # names only, values may be secrets
+        "median_ms": {key.replace("_seconds", ""): value for key, value in medians.items()},
+        "loaded_modules": runs[-1]["loaded_modules"],
+        "slowest_imports": _slowest_imports(args.env, args.top_imports),
+    }
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            before = json.load(baseline_file)["median_ms"]["time_to_first_request"]
+        after = report["median_ms"]["time_to_first_request"]
+        change = (after - before) / before
+        print(f"Time to first request: {before:.0f}ms -> {after:.0f}ms ({change:+.0%})", file=sys.stderr)
+        if change > args.max_regression:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Concurrent page loads: old vs new frontend server
+
+Serves the same directory with the previous server (single-threaded
+socketserver.TCPServer + SimpleHTTPRequestHandler) and with
+backend.static_server, then simulates --browsers browsers loading the
+page at once. Each page load fetches every file under the root over up to
+--connections parallel connections, as browsers do, and accepts gzip/br.
+
+"first" is a cold cache. "repeat" replays a return visit: files the first
+response marked immutable are not requested at all, the rest are
+revalidated with If-None-Match / If-Modified-Since.
+
+Usage: python -m benchmarks.static_server [--root www] [--browsers 20] [--pages 200] [--connections 6]
+"""
+
+import argparse
+import functools
+import http.client
+import http.server
+import json
+import os
+import socketserver
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from backend.static_server import create_server
+
+REQUEST_TIMEOUT = 10
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def _old_server(root: str):
+    return socketserver.TCPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=root))
+
+def _new_server(root: str):
+    return create_server(root, 0, "127.0.0.1")
+
+def _files(root: str) -> List[str]:
+    paths = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            relative = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/")
+            paths.append("/" if relative == "index.html" else "/" + relative)
+    return sorted(paths, key=lambda path: path != "/")  # the page first, then its assets
+
+def _fetch_all(port: int, paths: List[str], cache: Dict[str, Dict[str, str]], record: bool) -> int:
+    """Fetch paths over one keep-alive connection (re-opened if the server closes it); returns bytes received"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=REQUEST_TIMEOUT)
+    received = 0
+    try:
+        for path in paths:
+            headers = {"Accept-Encoding": "gzip, br"}
+            cached = cache.get(path)
+            if cached is not None and not record:
+                if "immutable" in cached.get("cache-control", ""):
+                    continue  # a browser would not ask at all
+                if "etag" in cached:
+                    headers["If-None-Match"] = cached["etag"]
+                elif "last-modified" in cached:
+                    headers["If-Modified-Since"] = cached["last-modified"]
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+            received += len(body)
+            if record:
+                cache[path] = {name.lower(): value for name, value in response.getheaders()}
+    finally:
+        connection.close()
+    return received
+
+def _page_load(port: int, paths: List[str], connections: int, cache: Dict[str, Dict[str, str]], record: bool):
+    """(seconds, bytes) for one page load, or None if any request failed or timed out"""
+    started = time.perf_counter()
+    try:
+        received = _load_files(port, paths, connections, cache, record)
+    except (OSError, http.client.HTTPException):
+        return None
+    return time.perf_counter() - started, received
+
+def _load_files(port: int, paths: List[str], connections: int, cache: Dict[str, Dict[str, str]], record: bool) -> int:
+    # The page itself first, then its assets spread over the browser's connections
+    received = _fetch_all(port, paths[:1], cache, record)
+    assets = paths[1:]
+    lanes = [assets[lane::connections] for lane in range(connections) if assets[lane::connections]]
+    with ThreadPoolExecutor(max_workers=len(lanes) or 1) as pool:
+        received += sum(pool.map(lambda lane: _fetch_all(port, lane, cache, record), lanes))
+    return received
+
+def _run(server, paths: List[str], browsers: int, pages: int, connections: int) -> Dict[str, Any]:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    try:
+        cache: Dict[str, Dict[str, str]] = {}
+        _load_files(port, paths, connections, cache, record=True)
+        results = {}
+        for visit, record in (("first", True), ("repeat", False)):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=browsers) as pool:
+                loads = list(pool.map(lambda _: _page_load(port, paths, connections, dict(cache), record), range(pages)))
+            wall = time.perf_counter() - started
+            completed = [load for load in loads if load is not None]
+            if not completed:
+                results[visit] = {"failed_pages": pages}
+                continue
+            latencies = sorted(seconds * 1000 for seconds, _ in completed)
+            results[visit] = {
+                "pages_per_second": round(len(completed) / wall, 1),
+                "failed_pages": pages - len(completed),
+                "p50_ms": round(statistics.median(latencies), 1),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+                "kib_per_page": round(statistics.mean(received for _, received in completed) / 1024, 1),
+            }
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default="www")
+    parser.add_argument("--browsers", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--connections", type=int, default=6)
+    args = parser.parse_args()
+
+    paths = _files(args.root)
+    report = {
+        "root": args.root,
+        "files": len(paths),
+        "browsers": args.browsers,
+        "pages": args.pages,
+        "old_server": _run(_old_server(args.root), paths, args.browsers, args.pages, args.connections),
+        "new_server": _run(_new_server(args.root), paths, args.browsers, args.pages, args.connections),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
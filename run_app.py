@@ -4,13 +4,63 @@ ChroniCompanion Application Runner
 
 This script starts the FastAPI backend server.
 The frontend can be opened by navigating to frontend/index.html in your browser.
+
+Development (default): one auto-reloading process on 127.0.0.1:8000.
+Production: python run_app.py --production [--workers N] [--port 8000]
+starts pre-forked workers on 0.0.0.0 (see backend/server.py); SIGTERM
+drains in-flight requests before exiting.
 """
 
+import argparse
 import uvicorn
 import os
 import sys
 
+def parse_args():
+    from backend.server import (
+        SERVER_BACKLOG, SERVER_GRACEFUL_TIMEOUT, SERVER_HOST, SERVER_KEEP_ALIVE_SECONDS,
+        SERVER_LIMIT_CONCURRENCY, SERVER_PORT, SERVER_PRELOAD, SERVER_WORKERS
+    )
+    parser = argparse.ArgumentParser(description="Start the ChroniCompanion backend")
+    parser.add_argument("--production", action="store_true", help="multi-worker server without auto-reload")
+    production = parser.add_argument_group("production options")
+    production.add_argument("--host", default=SERVER_HOST)
+    production.add_argument("--port", type=int, default=SERVER_PORT)
+    production.add_argument("--workers", type=int, default=SERVER_WORKERS, help="default: one per CPU core")
+    production.add_argument("--keep-alive", type=int, default=SERVER_KEEP_ALIVE_SECONDS, help="idle keep-alive seconds")
+    production.add_argument("--backlog", type=int, default=SERVER_BACKLOG)
+    production.add_argument("--graceful-timeout", type=int, default=SERVER_GRACEFUL_TIMEOUT, help="seconds to drain on SIGTERM")
+    production.add_argument("--limit-concurrency", type=int, default=SERVER_LIMIT_CONCURRENCY, help="per worker, 0 = unlimited")
+    production.add_argument("--no-preload", dest="preload", action="store_false", default=bool(SERVER_PRELOAD))
+    return parser.parse_args()
+
+def run_production(args):
+    from backend.server import available_cores, event_loop_name, http_protocol_name, serve
+
+    workers = args.workers or available_cores()
+    print("🌿 Starting ChroniCompanion Backend Server (production)...")
+    print("📋 Server Configuration:")
+    print(f"   • Bind: {args.host}:{args.port} (backlog {args.backlog})")
+    print(f"   • Workers: {workers}{' (app preloaded before fork)' if args.preload and workers > 1 else ''}")
+    print(f"   • Event loop: {event_loop_name()}, HTTP parser: {http_protocol_name()}")
+    if event_loop_name() == "asyncio" or http_protocol_name() == "h11":
+        print("     Install uvloop and httptools (pip install 'uvicorn[standard]') for faster ones")
+    print(f"   • Keep-alive: {args.keep_alive}s, graceful shutdown: {args.graceful_timeout}s")
+    print("=" * 60)
+    serve(
+        args.host, args.port, args.workers, args.preload,
+        keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        graceful_timeout=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency
+    )
+
 def main():
+    args = parse_args()
+    if args.production:
+        run_production(args)
+        return
+
     print("🌿 Starting ChroniCompanion Backend Server...")
     print("💚 Built with care for the chronic illness community")
     print("")
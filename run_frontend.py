@@ -4,8 +4,6 @@ ChroniCompanion Frontend Server
 Starts a local HTTP server and opens the app in your browser
 """
 
-import http.server
-import socketserver
 import webbrowser
 import os
 import sys
@@ -40,9 +38,13 @@ def main():
     print(f"   • URL: http://localhost:{PORT}")
     print()
     
-    # Create HTTP server
+    # Create HTTP server: threaded, with ETags, cache headers and precompressed assets
     try:
-        with socketserver.TCPServer(("", PORT), http.server.SimpleHTTPRequestHandler) as httpd:
+        from backend.static_server import create_server
+
+        with create_server(".", PORT) as httpd:
+            stats = httpd.site.stats()
+            print(f"📦 {stats['files']} files ready ({stats['bytes'] // 1024} KiB, {stats['gzip_bytes'] // 1024} KiB gzipped)")
             print(f"🚀 Frontend server starting on http://localhost:{PORT}")
             print("📊 Your beautiful dashboard awaits!")
             print()
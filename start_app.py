@@ -4,9 +4,8 @@ ChroniCompanion Complete Startup Script
 Starts both backend and frontend servers and opens the app in your browser
 """
 
+import errno
 import subprocess
-import http.server
-import socketserver
 import webbrowser
 import os
 import sys
@@ -16,8 +15,14 @@ import threading
 from pathlib import Path
 
 class ChroniCompanionLauncher:
-    def __init__(self):
+    def __init__(self, backend_args=None):
         self.backend_process = None
+        # Extra run_app.py arguments, e.g. ["--production"]
+        self.backend_args = backend_args or []
+        # run_app.py drains in-flight requests for up to this long on SIGTERM
+        self.backend_stop_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")) + 15
+        # Pid of the backend this launcher started, so the next run in this checkout can stop it
+        self.backend_pidfile = os.path.join("data", "backend.pid")
         self.frontend_port = 3000
         self.backend_port = 8000
         self.frontend_dir = "frontend"
@@ -42,17 +47,39 @@ class ChroniCompanionLauncher:
         print("✅ Project structure looks good!")
         return True
     
+    def previous_backend_pid(self):
+        """Pid from the pidfile if that backend is still running, else None"""
+        try:
+            with open(self.backend_pidfile) as pid_file:
+                pid = int(pid_file.read())
+            os.kill(pid, 0)
+        except (OSError, ValueError):
+            # No pidfile, a process that has exited, or one we may not signal
+            return None
+        cmdline = f"/proc/{pid}/cmdline"
+        if os.path.exists(cmdline):
+            # The pid may have been reused since; an exited (zombie) backend has an empty cmdline
+            with open(cmdline, "rb") as cmdline_file:
+                if b"run_app.py" not in cmdline_file.read():
+                    return None
+        return pid
+    
     def kill_existing_processes(self):
-        """Kill any existing backend processes"""
+        """Stop the backend left running by a previous launcher in this checkout"""
         print("🧹 Cleaning up any existing processes...")
         try:
-            # Kill existing backend processes
-            subprocess.run(["pkill", "-f", "python3 run_app.py"], 
-                         capture_output=True, text=True)
-            # Kill existing frontend processes
-            subprocess.run(["pkill", "-f", "python.*http.server"], 
-                         capture_output=True, text=True)
-            time.sleep(1)  # Give processes time to die
+            pid = self.previous_backend_pid()
+            if pid is not None:
+                # Same drain as on shutdown: SIGTERM, then wait out the graceful timeout
+                print(f"🔸 Stopping previous backend server (pid {pid})...")
+                os.kill(pid, signal.SIGTERM)
+                deadline = time.monotonic() + self.backend_stop_timeout
+                while self.previous_backend_pid() == pid and time.monotonic() < deadline:
+                    time.sleep(0.2)
+                if self.previous_backend_pid() == pid:
+                    print("⚠️  Previous backend did not stop in time, killing it")
+                    os.killpg(pid, signal.SIGKILL)
+            # The frontend is served by the launcher process itself, so there is no separate server to stop
             print("✅ Cleanup complete!")
         except Exception as e:
             print(f"⚠️  Cleanup warning: {e}")
@@ -61,13 +88,13 @@ class ChroniCompanionLauncher:
         """Start the backend server"""
         print("🚀 Starting backend server...")
         try:
-            # Start backend in background
-            self.backend_process = subprocess.Popen(
-                ["python3", "run_app.py"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # Start backend in background; its logs go to this terminal, since an unread pipe
+            # would eventually fill up and block the server. Its own process group gets one
+            # SIGTERM from cleanup() rather than Ctrl+C's SIGINT, and can be killed with its workers
+            self.backend_process = subprocess.Popen([sys.executable, "run_app.py", *self.backend_args], start_new_session=True)
+            os.makedirs(os.path.dirname(self.backend_pidfile), exist_ok=True)
+            with open(self.backend_pidfile, "w") as pid_file:
+                pid_file.write(str(self.backend_process.pid))
             
             # Wait a moment for backend to start
             time.sleep(3)
@@ -98,8 +125,9 @@ class ChroniCompanionLauncher:
         os.chdir(self.frontend_dir)
         
         try:
-            with socketserver.TCPServer(("", self.frontend_port), 
-                                      http.server.SimpleHTTPRequestHandler) as httpd:
+            from backend.static_server import create_server
+
+            with create_server(".", self.frontend_port) as httpd:
                 
                 print(f"✅ Frontend server running on http://localhost:{self.frontend_port}")
                 print()
@@ -129,9 +157,10 @@ class ChroniCompanionLauncher:
                 httpd.serve_forever()
                 
         except OSError as e:
-            if e.errno == 48:  # Address already in use
+            if e.errno == errno.EADDRINUSE:
                 print(f"❌ Error: Port {self.frontend_port} is already in use!")
-                print("Try killing existing processes: pkill -f 'python.*http.server'")
+                print("Another launcher may still be serving it; stop that one with Ctrl+C.")
+                print(f"To see what holds the port: lsof -i :{self.frontend_port}")
             else:
                 print(f"❌ Error starting frontend server: {e}")
             return False
@@ -145,19 +174,20 @@ class ChroniCompanionLauncher:
         print("\n\n🛑 Shutting down ChroniCompanion...")
         
         if self.backend_process:
-            print("🔸 Stopping backend server...")
+            # SIGTERM lets the server finish in-flight AI calls and PDF renders
+            print("🔸 Stopping backend server (finishing in-flight requests)...")
             self.backend_process.terminate()
             try:
-                self.backend_process.wait(timeout=5)
+                self.backend_process.wait(timeout=self.backend_stop_timeout)
             except subprocess.TimeoutExpired:
-                self.backend_process.kill()
-                
-        print("🔸 Cleaning up any remaining processes...")
-        try:
-            subprocess.run(["pkill", "-f", "python3 run_app.py"], 
-                         capture_output=True)
-        except Exception:
-            pass
+                print("⚠️  Backend did not stop in time, killing it")
+                os.killpg(self.backend_process.pid, signal.SIGKILL)
+                self.backend_process.wait()
+            self.backend_process = None
+            try:
+                os.remove(self.backend_pidfile)
+            except OSError:
+                pass
             
         print("✅ Shutdown complete!")
         print("Thanks for using ChroniCompanion! 🌿✨")
@@ -174,6 +204,7 @@ class ChroniCompanionLauncher:
             sys.exit(0)
         
         signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
         
         try:
             # Check project structure
@@ -196,7 +227,8 @@ class ChroniCompanionLauncher:
             self.cleanup()
 
 def main():
-    launcher = ChroniCompanionLauncher()
+    # Arguments are passed on to run_app.py, e.g. python3 start_app.py --production
+    launcher = ChroniCompanionLauncher(sys.argv[1:])
     launcher.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its configuration at import, so point it at a throwaway database and a fake AI backend first
+_work_dir = tempfile.mkdtemp(prefix="chroni_tests_")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_work_dir}/test.db",
+    "AI_PROVIDERS": "fake",
+    "AI_PROVIDER_FAKE_LATENCY_MS": "0",
+    "PRECOMPUTE_HOUR": "-1",
+    "PRECOMPUTE_SPACING_SECONDS": "0",
+    "EXPORT_JOBS_DIR": os.path.join(_work_dir, "export_jobs"),
+    "PRECOMPUTE_LOCK_PATH": os.path.join(_work_dir, "precompute.lock"),
+    "TRACE_EXPORT_PATH": "",
+})
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def entry(client):
+    response = client.post("/api/entries", json={
+        "entry_type": "evening",
+        "date": "2026-10-18",
+        "mood_overall": 4,
+        "energy_level": 3,
+        "pain_level": 7,
+        "fatigue_level": 6,
+        "evening_day_review": "A slow day, pain flared after lunch",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,35 @@
+from sqlalchemy.exc import IntegrityError
+
+from backend.database import SessionLocal, get_db
+from backend.main import app
+
+def _session_failing_commit():
+    db = SessionLocal()
+
+    def commit():
+        raise IntegrityError("INSERT", {}, Exception("constraint failed"))
+
+    db.commit = commit
+    try:
+        yield db
+    finally:
+        db.close()
+
+def test_integrity_error_without_idempotency_key_is_a_normal_error(client, entry):
+    app.dependency_overrides[get_db] = _session_failing_commit
+    try:
+        response = client.post("/api/ai/feedback", json={"entry_id": entry["id"]})
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 500
+    assert response.json()["detail"].startswith("Failed to generate AI feedback: (builtins.Exception) constraint failed")
+
+def test_feedback_with_idempotency_key_is_replayed(client, entry):
+    headers = {"Idempotency-Key": "feedback-replay-test"}
+    first = client.post("/api/ai/feedback", json={"entry_id": entry["id"]}, headers=headers)
+    second = client.post("/api/ai/feedback", json={"entry_id": entry["id"]}, headers=headers)
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers.get("Idempotent-Replayed") == "true"
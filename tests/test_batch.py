@@ -0,0 +1,34 @@
+import uuid
+
+def _create(key, pain_level):
+    return {"op": "create", "idempotency_key": key, "data": {"entry_type": "morning", "date": "2026-10-18", "pain_level": pain_level}}
+
+def test_replayed_key_returns_the_stored_result(client):
+    key = str(uuid.uuid4())
+    first = client.post("/api/entries/batch", json={"operations": [_create(key, 4)]}).json()["results"][0]
+    again = client.post("/api/entries/batch", json={"operations": [_create(key, 4)]}).json()["results"][0]
+
+    assert first["status"] == 201
+    assert again["replayed"] is True
+    assert again["id"] == first["id"]
+
+def test_key_reused_for_a_different_operation_is_rejected(client):
+    key = str(uuid.uuid4())
+    first = client.post("/api/entries/batch", json={"operations": [_create(key, 4)]}).json()["results"][0]
+    results = client.post(
+        "/api/entries/batch", json={"operations": [_create(key, 9), _create(str(uuid.uuid4()), 2)]}
+    ).json()["results"]
+
+    assert results[0]["status"] == 422
+    assert results[0]["error"] == "Idempotency-Key was already used for a different request"
+    assert results[0]["id"] is None
+    assert results[1]["status"] == 201
+
+def test_key_repeated_in_one_batch_must_match(client):
+    key = str(uuid.uuid4())
+    results = client.post(
+        "/api/entries/batch", json={"operations": [_create(key, 4), _create(key, 4), _create(key, 9)]}
+    ).json()["results"]
+
+    assert [result["status"] for result in results] == [201, 201, 422]
+    assert results[1]["replayed"] is True and results[1]["id"] == results[0]["id"]
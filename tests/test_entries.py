@@ -0,0 +1,14 @@
+def test_fields_returns_only_those_columns_and_id(client, entry):
+    response = client.get("/api/entries", params={"fields": "pain_level,date"})
+    assert response.status_code == 200
+    assert all(set(row) == {"id", "date", "pain_level"} for row in response.json())
+
+def test_view_and_fields_together_are_rejected(client, entry):
+    response = client.get("/api/entries", params={"view": "summary", "fields": "pain_level"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Pass either view or fields, not both"
+
+def test_partial_entry_shape_is_documented(client):
+    schemas = client.get("/openapi.json").json()["components"]["schemas"]
+    assert "JournalEntryFields" in schemas
+    assert schemas["JournalEntryFields"].get("required", []) == ["id"]
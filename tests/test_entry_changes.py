@@ -0,0 +1,36 @@
+from backend.api.routes import change_log
+from backend.database import SessionLocal
+from backend.models import EntryChange, EntryChangeCompaction
+
+def _change_count():
+    db = SessionLocal()
+    try:
+        return db.query(EntryChange).count()
+    finally:
+        db.close()
+
+def test_reading_changes_does_not_compact(client, entry):
+    # A second change to the same entry supersedes the first
+    assert client.put(f"/api/entries/{entry['id']}", json={"pain_level": 3}).status_code == 200
+    before = _change_count()
+
+    response = client.get("/api/entries/changes", params={"since": 0})
+    assert response.status_code == 200
+    assert _change_count() == before
+
+    result = change_log.run_compaction()
+    assert result["superseded"] >= 1
+    assert _change_count() < before
+
+def test_cursor_older_than_compaction_must_resync(client, entry):
+    db = SessionLocal()
+    try:
+        db.add(EntryChangeCompaction(horizon=10**6))
+        db.commit()
+        response = client.get("/api/entries/changes", params={"since": 1})
+        assert response.status_code == 410
+        assert client.get("/api/entries/changes", params={"since": 0}).status_code == 200
+    finally:
+        db.query(EntryChangeCompaction).delete()
+        db.commit()
+        db.close()
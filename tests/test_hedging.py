@@ -0,0 +1,48 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.hedging import Hedger
+
+def _attempt(seconds):
+    def run(cancelled, report_tokens=None):
+        time.sleep(seconds)
+        if report_tokens is not None:
+            report_tokens(10)
+        return "ok"
+    return run
+
+def _warm(hedger, key, seconds, calls):
+    for _ in range(calls):
+        hedger.call(key, _attempt(seconds), _attempt(seconds), hedge_tokens=100)
+
+def test_queued_primaries_do_not_fire_hedges():
+    hedger = Hedger(percentile=90, min_samples=5, min_delay_seconds=0.05, max_workers=2)
+    _warm(hedger, "key", 0.02, 5)
+    try:
+        # Far more concurrent calls than workers: most primaries wait for a worker well past the hedge delay
+        with ThreadPoolExecutor(max_workers=12) as callers:
+            results = list(callers.map(lambda _: hedger.call("key", _attempt(0.02), _attempt(0.02), hedge_tokens=100), range(12)))
+    finally:
+        hedger.shutdown()
+    assert results == ["ok"] * 12
+    assert hedger.hedges_fired == 0
+
+def test_slow_primary_is_hedged_and_charged_reported_tokens():
+    hedger = Hedger(percentile=90, min_samples=5, min_delay_seconds=0.01, max_workers=4)
+    _warm(hedger, "key", 0.01, 5)
+    slow_cancelled = threading.Event()
+
+    def slow_primary(cancelled):
+        cancelled.wait(2)
+        slow_cancelled.set()
+        return "slow"
+
+    try:
+        assert hedger.call("key", slow_primary, _attempt(0.01), hedge_tokens=500) == "ok"
+        assert slow_cancelled.wait(1)
+    finally:
+        hedger.shutdown()
+    stats = hedger.stats()
+    assert stats["hedges_won"] == 1
+    assert stats["hedge_tokens_last_hour"] == 10  # the reported usage replaced the 500-token reservation
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+from backend.services.leader_lock import LeaderLock
+
+class _FakeServer:
+    """Advisory locks as a PostgreSQL server tracks them: per connection, gone when it drops"""
+
+    def __init__(self):
+        self.owner = None
+
+    def connect(self):
+        return _FakeConnection(self)
+
+class _FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.dropped = False
+
+    def execute(self, statement, params=None):
+        if self.dropped:
+            raise ConnectionError("server closed the connection unexpectedly")
+        sql = str(statement)
+        if "pg_try_advisory_lock" in sql:
+            acquired = self.server.owner in (None, self)
+            if acquired:
+                self.server.owner = self
+            return SimpleNamespace(scalar=lambda: acquired)
+        if "pg_locks" in sql:
+            return SimpleNamespace(scalar=lambda: self.server.owner is self)
+        if "pg_advisory_unlock" in sql and self.server.owner is self:
+            self.server.owner = None
+        return SimpleNamespace(scalar=lambda: None)
+
+    def drop(self):
+        self.dropped = True
+        if self.server.owner is self:
+            self.server.owner = None
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def invalidate(self):
+        pass
+
+def _lock(server):
+    engine = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), connect=server.connect)
+    return LeaderLock("test.leader", engine, lock_path="")
+
+def test_dropped_connection_gives_up_leadership():
+    server = _FakeServer()
+    first, second = _lock(server), _lock(server)
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+    first._connection.drop()
+    assert second.try_acquire()
+    # The old leader notices before its next run instead of trusting its connection object
+    assert not first.try_acquire()
+    assert not first.held
+
+def test_leader_keeps_a_live_lock():
+    server = _FakeServer()
+    lock = _lock(server)
+    assert lock.try_acquire()
+    connection = lock._connection
+    assert lock.try_acquire()
+    assert lock._connection is connection
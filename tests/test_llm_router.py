@@ -0,0 +1,26 @@
+from backend.services.llm_providers import LLMRouter, fake_provider
+
+def _router():
+    healthy = fake_provider(latency_ms=0)
+    healthy.name = "healthy"
+    failing = fake_provider(latency_ms=0)
+    failing.name = "failing"
+    return LLMRouter([failing, healthy], explore_rate=0, failure_seconds=30)
+
+def test_instant_failures_do_not_make_a_backend_preferred():
+    router = _router()
+    failing, healthy = router.candidates("summary")
+    router.record(healthy, 1.5, success=True)
+    for _ in range(3):
+        router.record(failing, 0.001, success=False)
+
+    assert [target.provider.name for target in router.candidates("summary")] == ["healthy", "failing"]
+    assert failing.latency_ewma >= 30
+
+def test_failures_never_lower_the_average():
+    router = _router()
+    failing, _ = router.candidates("summary")
+    router.record(failing, 2.0, success=True)
+    router.record(failing, 0.001, success=False)
+
+    assert failing.latency_ewma > 2.0
@@ -0,0 +1,39 @@
+import asyncio
+
+from backend.database import SessionLocal
+from backend.models import PrecomputedArtifact
+
+AI_KINDS = {"weekly_reflection", "weekly_coaching", "predictive_insights"}
+
+def _artifact_kinds():
+    db = SessionLocal()
+    try:
+        return {kind for (kind,) in db.query(PrecomputedArtifact.kind).all()}
+    finally:
+        db.close()
+
+def test_failed_ai_calls_store_no_artifacts(client, entry, monkeypatch):
+    from backend.main import openai_service, precompute_scheduler
+
+    def unavailable(**request):
+        raise ConnectionError("provider unavailable")
+
+    for provider in openai_service.providers:
+        monkeypatch.setattr(provider.client.chat.completions, "create", unavailable)
+
+    asyncio.run(precompute_scheduler.run())
+
+    kinds = _artifact_kinds()
+    assert "analytics_trends" in kinds
+    assert not kinds & AI_KINDS
+    # The endpoints still answer with their placeholders
+    response = client.get("/api/ai/weekly-coaching")
+    assert response.status_code == 200
+    assert response.json()["coaching"]["weekly_summary"]
+
+def test_successful_ai_calls_store_artifacts(client, entry):
+    from backend.main import precompute_scheduler
+
+    asyncio.run(precompute_scheduler.run())
+
+    assert AI_KINDS <= _artifact_kinds()
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from backend.services import render_pool as render_pool_module
+from backend.services.render_pool import RenderPool
+
+def _slow_render(release: threading.Event):
+    def render(rows_path, report_type, output_dir, profile_prefix=None):
+        started_at = time.time()
+        release.wait(5)
+        output_path = os.path.join(output_dir, "orphan.pdf")
+        with open(output_path, "wb") as output:
+            output.write(b"%PDF-")
+        return output_path, started_at, time.time()
+    return render
+
+def test_cancelled_render_keeps_its_slot_and_removes_its_output(tmp_path, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(render_pool_module, "render_report_file", _slow_render(release))
+    pool = RenderPool(max_workers=0, max_concurrency=1, work_dir=str(tmp_path))
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.render("rows", "summary"), timeout=0.05)
+        # The render is still running in its worker, so it still counts against the cap
+        assert pool.stats()["in_flight"] == 1
+        assert pool._get_semaphore().locked()
+
+        release.set()
+        while pool.in_flight:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert not pool._get_semaphore().locked()
+    assert not os.path.exists(tmp_path / "orphan.pdf")
+    assert pool.stats()["failed"] == 0
@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.services.llm_providers import fake_provider
+from backend.services.openai_service import OpenAIService
+from backend.services.single_flight import SingleFlight
+
+CALLERS = 8
+
+def _wait_for_callers(flight, calls):
+    deadline = time.monotonic() + 5
+    while flight.stats()["calls"] < calls and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+def _slow_upstream(flight, outcome):
+    """Upstream that counts its calls and holds until every caller has joined"""
+    upstream_calls = []
+
+    def call():
+        upstream_calls.append(1)
+        _wait_for_callers(flight, CALLERS)
+        time.sleep(0.05)
+        return outcome()
+    return call, upstream_calls
+
+def _concurrently(fn):
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(fn) for _ in range(CALLERS)]
+    return futures
+
+def test_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    call, upstream_calls = _slow_upstream(flight, lambda: {"summary": object()})
+
+    results = [future.result() for future in _concurrently(lambda: flight.do("key", call))]
+
+    assert len(upstream_calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": CALLERS, "executions": 1, "coalesced": CALLERS - 1, "failures": 0, "in_flight": 0}
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+
+    def fail():
+        raise ConnectionError("upstream down")
+    call, upstream_calls = _slow_upstream(flight, fail)
+
+    for future in _concurrently(lambda: flight.do("key", call)):
+        with pytest.raises(ConnectionError, match="upstream down"):
+            future.result()
+    assert len(upstream_calls) == 1
+
+    # The failure is not remembered: the next call runs again
+    assert flight.do("key", lambda: "fresh") == "fresh"
+    assert flight.stats()["executions"] == 2
+
+def test_identical_service_calls_reach_the_provider_once():
+    service = OpenAIService(providers=[fake_provider(latency_ms=300)])
+    entries = [{"entry_type": "evening", "date": "2026-10-18", "mood_overall": 4, "pain_level": 7}]
+    barrier = threading.Barrier(CALLERS)
+
+    def call():
+        barrier.wait()
+        return service.generate_weekly_coaching(entries)
+
+    results = [future.result() for future in _concurrently(call)]
+
+    assert service.client.requests == 1
+    assert results[0] and all(result == results[0] for result in results)